@@ -9,7 +9,8 @@ class Algorithm:
 
     def __init__(self, name, cascade_iterations, block_size_function, biconf_iterations,
                  biconf_error_free_streak, biconf_correct_complement, biconf_cascade,
-                 sub_block_reuse, block_parity_inference):
+                 sub_block_reuse, block_parity_inference, prefetch_top_block_parities=False,
+                 binary_speculation_depth=1):
         """
         Create a new Cascade algorithm.
 
@@ -29,7 +30,18 @@ class Algorithm:
             biconf_cascade (bool): Correct cascading errors during BICONF iterations?
             sub_block_reuse (bool): If False, consider only top-level blocks for cascading errors.
             If True, consider blocks of all sizes for cascading errors.
-            block_parity_inference (bool): TODO
+            block_parity_inference (bool): If False, only infer the correct parity of a block from
+            the correct parities of its parent and sibling blocks. If True, also infer it from
+            all correct parities that Alice revealed so far, and don't ask Alice for it if it is
+            implied by them.
+            prefetch_top_block_parities (bool): If False, ask Alice for the correct parities of the
+            top-level blocks of each normal Cascade iteration when that iteration starts. If True,
+            choose the shuffles of all normal Cascade iterations up front, and ask Alice for the
+            correct parities of all their top-level blocks in the first message.
+            binary_speculation_depth (int): The number of levels of the bisection tree for which
+            BINARY asks Alice for the correct parities in one message. 1 means ask for one
+            sub-block at a time. A depth d needs about d times fewer messages to find an error,
+            but asks for the correct parities of up to 2^d - 1 sub-blocks instead of d.
         """
         self.name = name
         self.cascade_iterations = cascade_iterations
@@ -40,6 +52,8 @@ class Algorithm:
         self.biconf_cascade = biconf_cascade
         self.sub_block_reuse = sub_block_reuse
         self.block_parity_inference = block_parity_inference
+        self.prefetch_top_block_parities = prefetch_top_block_parities
+        self.binary_speculation_depth = binary_speculation_depth
         ALGORITHMS[name] = self
 
 def get_algorithm_by_name(name):
@@ -74,7 +88,9 @@ _ORIGINAL_ALGORITHM = Algorithm(name="original",
                                 biconf_correct_complement=False,
                                 biconf_cascade=False,
                                 sub_block_reuse=False,
-                                block_parity_inference=False)
+                                block_parity_inference=False,
+                                prefetch_top_block_parities=False,
+                                binary_speculation_depth=1)
 
 # Name in Demystifying paper: Cascade mod. (1)
 # Name in Andre Reis Thesis : biconf
@@ -94,7 +110,9 @@ _BICONF_ALGORITHM = Algorithm(name="biconf",
                               biconf_correct_complement=False,
                               biconf_cascade=False,
                               sub_block_reuse=False,
-                              block_parity_inference=False)
+                              block_parity_inference=False,
+                              prefetch_top_block_parities=False,
+                              binary_speculation_depth=1)
 
 # Name in Demystifying paper: Cascade opt. (2)
 # Name in Andre Reis Thesis : yanetal (Yan et al.)
@@ -116,7 +134,9 @@ _YANETAL_ALGORITHM = Algorithm(name="yanetal",
                                biconf_correct_complement=False,
                                biconf_cascade=False,
                                sub_block_reuse=False,
-                               block_parity_inference=False)
+                               block_parity_inference=False,
+                                prefetch_top_block_parities=False,
+                                binary_speculation_depth=1)
 
 # Name in Demystifying paper: Cascade opt. (3)
 # Name in Andre Reis Thesis : -
@@ -139,7 +159,9 @@ _OPTION3_ALGORITHM = Algorithm(name="option3",
                                biconf_correct_complement=False,
                                biconf_cascade=False,
                                sub_block_reuse=False,
-                               block_parity_inference=False)
+                               block_parity_inference=False,
+                                prefetch_top_block_parities=False,
+                                binary_speculation_depth=1)
 
 # Name in Demystifying paper: Cascade opt. (4)
 # Name in Andre Reis Thesis : -
@@ -152,7 +174,9 @@ _OPTION4_ALGORITHM = Algorithm(name="option4",
                                biconf_correct_complement=False,
                                biconf_cascade=False,
                                sub_block_reuse=True,
-                               block_parity_inference=False)
+                               block_parity_inference=False,
+                                prefetch_top_block_parities=False,
+                                binary_speculation_depth=1)
 
 # Note: Cascade opt. (5) from the Demystifying paper is not supported yet:
 # TODO: need to add support for deterministic shuffling
@@ -180,7 +204,9 @@ _OPTION7_ALGORITHM = Algorithm(name="option7",
                                biconf_correct_complement=False,
                                biconf_cascade=False,
                                sub_block_reuse=True,
-                               block_parity_inference=False)
+                               block_parity_inference=False,
+                                prefetch_top_block_parities=False,
+                                binary_speculation_depth=1)
 
 # Name in Demystifying paper: Cascade opt. (8)
 # Name in Andre Reis Thesis : option-8
@@ -205,4 +231,6 @@ _OPTION8_ALGORITHM = Algorithm(name="option8",
                                biconf_correct_complement=False,
                                biconf_cascade=False,
                                sub_block_reuse=True,
-                               block_parity_inference=False)
+                               block_parity_inference=False,
+                                prefetch_top_block_parities=False,
+                                binary_speculation_depth=1)
@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+
+class AsyncClassicalChannel(ABC):
+    """
+    An abstract base class that abstracts the interactions that Bob has with Alice over the
+    classical channel, for reconciliations that run as asyncio tasks (see
+    Reconciliation.reconcile_async). It is the same as ClassicalChannel, except that all methods
+    are coroutines, so that a reconciliation that waits for Alice's answer lets other
+    reconciliations in the same event loop make progress.
+    """
+
+    @abstractmethod
+    async def start_reconciliation(self):
+        """
+        Bob tells Alice that he is starting a new Cascade reconciliation.
+        """
+
+    @abstractmethod
+    async def end_reconciliation(self):
+        """
+        Bob tells Alice that he is finished with a Cascade reconciliation.
+        """
+
+    @abstractmethod
+    async def ask_parities(self, blocks):
+        """
+        Bob asks Alice to compute the parities for a list of blocks.
+
+        Params:
+            blocks (list): A list of blocks for which the ask the parities.
+
+        Returns:
+            parities (list): A list of parities, where each parity is an int value 0 or 1. The list
+            of parities must be in the same order as the list of blocks.
+        """
+
+    def get_last_message_sizes(self):
+        """
+        Get the sizes of the messages that the last ask_parities call actually exchanged with
+        Alice, if the channel encodes them (see parity_protocol).
+
+        Returns:
+            A tuple (ask_size, reply_size) with the sizes of the question and the answer in bytes,
+            not counting the framing, or None if the channel does not encode the messages, e.g.
+            because it calls Alice directly.
+        """
+        return None
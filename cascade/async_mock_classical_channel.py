@@ -0,0 +1,32 @@
+import asyncio
+
+from cascade.async_classical_channel import AsyncClassicalChannel
+from cascade.mock_classical_channel import MockClassicalChannel
+
+class AsyncMockClassicalChannel(AsyncClassicalChannel):
+    """
+    A mock concrete implementation of the AsyncClassicalChannel base class, which answers like
+    MockClassicalChannel, after a simulated round-trip latency.
+    """
+
+    def __init__(self, correct_key, latency=0.0):
+        """
+        Create an async mock classical channel.
+
+        Args:
+            correct_key (Key): Alice's correct key.
+            latency (float): The simulated round-trip time in seconds of every ask_parities call.
+        """
+        self._mock_classical_channel = MockClassicalChannel(correct_key)
+        self._latency = latency
+
+    async def start_reconciliation(self):
+        self._mock_classical_channel.start_reconciliation()
+
+    async def end_reconciliation(self):
+        self._mock_classical_channel.end_reconciliation()
+
+    async def ask_parities(self, blocks):
+        parities = self._mock_classical_channel.ask_parities(blocks)
+        await asyncio.sleep(self._latency)
+        return parities
@@ -0,0 +1,85 @@
+import asyncio
+import socket
+
+from cascade.async_classical_channel import AsyncClassicalChannel
+from cascade import parity_protocol
+
+class AsyncSocketClassicalChannel(AsyncClassicalChannel):
+    """
+    A concrete implementation of the AsyncClassicalChannel base class that talks to Alice's parity
+    server (see ParityServer) over a TCP or Unix domain socket, using asyncio streams.
+    """
+
+    def __init__(self, address, key_number):
+        """
+        Create an async socket classical channel. The connection is made when the first
+        reconciliation starts, and stays open until close is called.
+
+        Args:
+            address (tuple or str): The address of the parity server: a tuple (host, port) for
+                TCP, or the path of a Unix domain socket.
+            key_number (int): The number of the correct key in Alice's key store.
+        """
+        self._address = address
+        self._key_number = key_number
+        self._reader = None
+        self._writer = None
+        self._last_message_sizes = None
+
+    def set_key_number(self, key_number):
+        """
+        Set the number of the correct key in Alice's key store for the next reconciliation.
+
+        Args:
+            key_number (int): The number of the key.
+        """
+        self._key_number = key_number
+
+    async def close(self):
+        """
+        Close the connection to the parity server, if it is open.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._reader = None
+            self._writer = None
+
+    async def start_reconciliation(self):
+        if self._writer is None:
+            if isinstance(self._address, str):
+                (self._reader, self._writer) = await asyncio.open_unix_connection(self._address)
+            else:
+                (self._reader, self._writer) = await asyncio.open_connection(*self._address)
+                self._writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP,
+                                                                 socket.TCP_NODELAY, 1)
+        self._send(parity_protocol.encode_start(self._key_number))
+
+    async def end_reconciliation(self):
+        self._send(parity_protocol.encode_end())
+        await self._writer.drain()
+
+    async def ask_parities(self, blocks):
+        questions = [(block.get_shuffle().get_identifier(), block.get_start_index(),
+                      block.get_end_index()) for block in blocks]
+        wire_order = parity_protocol.get_wire_order(questions)
+        ask_message = parity_protocol.encode_ask(questions, wire_order)
+        self._send(ask_message)
+        await self._writer.drain()
+        reply_message = await self._receive()
+        self._last_message_sizes = (len(ask_message), len(reply_message))
+        return parity_protocol.decode_reply(reply_message, wire_order)
+
+    def get_last_message_sizes(self):
+        return self._last_message_sizes
+
+    def _send(self, message):
+        self._writer.write(parity_protocol.encode_frame(message))
+
+    async def _receive(self):
+        try:
+            (message_size,) = parity_protocol.FRAME_HEADER.unpack(
+                await self._reader.readexactly(parity_protocol.FRAME_HEADER.size))
+            return await self._reader.readexactly(message_size)
+        except asyncio.IncompleteReadError as error:
+            raise ConnectionError("parity server closed the connection") from error
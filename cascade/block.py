@@ -1,3 +1,5 @@
+import sys
+
 class Block:
     """
     A block is a contiguous subset of bits in a shuffled key.
@@ -10,7 +12,7 @@ class Block:
     ERRORS_UNKNOWN = None
     """We don't know whether the block contains an even or an odd number of errors."""
 
-    def __init__(self, key, shuffle, start_index, end_index, parent_block):
+    def __init__(self, key, shuffle, start_index, end_index, parent_block, pool=None):
         """
         Create a block, which is a contiguous subset of bits in a shuffled key.
 
@@ -24,6 +26,8 @@ class Block:
                 end_index > start_index.
             parent_block (Block): The parent block. None if there is no parent, i.e. if this is a
                 top-level block.
+            pool (BlockPool): The block pool that creates this block, if any. The sub-blocks of
+                this block are then created from the same pool.
         """
 
         # Store block attributes.
@@ -39,12 +43,16 @@ class Block:
         self._left_sub_block = None
         self._right_sub_block = None
 
-        # Calculate the current parity for this block.
-        self._current_parity = shuffle.calculate_parity(key, start_index, end_index)
+        # The current parity for this block is only calculated when it is first needed.
+        self._current_parity = None
 
         # We don't yet know the correct parity for this block.
         self._correct_parity = None
 
+        # The block pool that created this block (see BlockPool), if any. The sub-blocks of this
+        # block are created from the same pool.
+        self._pool = pool
+
     @staticmethod
     def create_covering_blocks(key, shuffle, block_size):
         """
@@ -58,20 +66,45 @@ class Block:
                 one, will be exactly this size. The last block may be smaller.
 
         Returns:
-            A list of blocks that cover the shuffled key.
+            A list of blocks that cover the shuffled key. The current parities of the blocks are
+            already calculated.
         """
 
-        # Generate the blocks.
-        blocks = []
+        # Determine the ranges of the blocks.
+        shuffle_ranges = []
         remaining_bits = shuffle.get_size()
         start_index = 0
         while remaining_bits > 0:
             actual_block_size = min(block_size, remaining_bits)
             end_index = start_index + actual_block_size
-            block = Block(key, shuffle, start_index, end_index, None)
-            blocks.append(block)
+            shuffle_ranges.append((start_index, end_index))
             start_index += actual_block_size
             remaining_bits -= actual_block_size
+
+        return Block.create_blocks(key, shuffle, shuffle_ranges)
+
+    @staticmethod
+    def create_blocks(key, shuffle, shuffle_ranges):
+        """
+        Create a list of top-level blocks for given ranges of a shuffled key.
+
+        Args:
+            key (Key): The key for which to create the blocks.
+            shuffle (Shuffle): The shuffle to apply to the key before creating the blocks.
+            shuffle_ranges (sequence): The tuples (shuffle_start_index, shuffle_end_index) of the
+                blocks, as for the start_index and end_index of a single block.
+
+        Returns:
+            A list with one block per range, in the same order as the ranges. The current parities
+            of the blocks are already calculated.
+        """
+        # We will need the current parities of all blocks, so calculate them all at once.
+        blocks = []
+        parities = shuffle.calculate_parities(key, shuffle_ranges)
+        for ((start_index, end_index), parity) in zip(shuffle_ranges, parities):
+            block = Block(key, shuffle, start_index, end_index, None)
+            block.set_current_parity(parity)
+            blocks.append(block)
         return blocks
 
     def __repr__(self):
@@ -150,6 +183,16 @@ class Block:
         """
         return self._end_index - self._start_index
 
+    def get_memory_bytes(self):
+        """
+        Get the number of bytes of memory used to store this block object, not including the key,
+        the shuffle, or any other blocks that it refers to.
+
+        Returns:
+            The number of bytes.
+        """
+        return sys.getsizeof(self) + sys.getsizeof(self.__dict__)
+
     def get_key_indexes(self):
         """
         Get a list of key indexes for this block.
@@ -171,8 +214,55 @@ class Block:
         Returns:
             The current parity (0 or 1) of the block.
         """
+        if self._current_parity is None:
+            self._current_parity = self._shuffle.calculate_parity(self._key, self._start_index,
+                                                                  self._end_index)
         return self._current_parity
 
+    def set_current_parity(self, current_parity):
+        """
+        Set the current parity of the block, e.g. after calculating the parities of many blocks at
+        once. The parity must be the parity of the current bits in the block.
+
+        Params:
+            current_parity (int): The current parity (0 or 1).
+        """
+        self._current_parity = current_parity
+
+    def is_current_parity_known(self):
+        """
+        Has the current parity of the block already been calculated or derived?
+
+        Returns:
+            True if the current parity is known, False if it will be calculated when first needed.
+        """
+        return self._current_parity is not None
+
+    def try_derive_current_parity(self):
+        """
+        Try to derive the current parity of the block from the current parities of the parent block
+        and the sibling block, instead of calculating it from the bits in the block. This is only
+        possible if the current parity of the block is not yet known, and the current parities of
+        both the parent block and the sibling block are already known.
+
+        Returns:
+            True if the current parity was derived, False otherwise.
+        """
+        parent_block = self._parent_block
+        if self._current_parity is not None or parent_block is None:
+            return False
+        if parent_block.get_left_sub_block() is self:
+            sibling_block = parent_block.get_right_sub_block()
+        else:
+            sibling_block = parent_block.get_left_sub_block()
+        if sibling_block is None or not sibling_block.is_current_parity_known() or \
+           not parent_block.is_current_parity_known():
+            return False
+        # Both parities are known, so getting them does not calculate anything.
+        self._current_parity = parent_block.get_current_parity() ^ \
+                               sibling_block.get_current_parity()
+        return True
+
     def get_correct_parity(self):
         """
         Get the correct parity of the block, if we know it.
@@ -228,8 +318,12 @@ class Block:
             The left sub-block.
         """
         middle_index = self._start_index + (self._end_index - self._start_index + 1) // 2
-        self._left_sub_block = Block(self._key, self._shuffle, self._start_index, middle_index,
-                                     self)
+        if self._pool is None:
+            self._left_sub_block = Block(self._key, self._shuffle, self._start_index, middle_index,
+                                         self)
+        else:
+            self._left_sub_block = self._pool.create_block(self._key, self._shuffle,
+                                                           self._start_index, middle_index, self)
         return self._left_sub_block
 
     def get_right_sub_block(self):
@@ -250,7 +344,29 @@ class Block:
             The right sub-block.
         """
         middle_index = self._start_index + (self._end_index - self._start_index + 1) // 2
-        self._right_sub_block = Block(self._key, self._shuffle, middle_index, self._end_index, self)
+        if self._pool is None:
+            self._right_sub_block = Block(self._key, self._shuffle, middle_index, self._end_index,
+                                          self)
+        else:
+            self._right_sub_block = self._pool.create_block(self._key, self._shuffle, middle_index,
+                                                            self._end_index, self)
+        return self._right_sub_block
+
+    def get_sub_block_containing(self, shuffle_index):
+        """
+        Return the sub-block of this block that contains a given shuffle index, if that sub-block
+        has been created.
+
+        Params:
+            shuffle_index: The shuffle index. Must be in the range of this block.
+
+        Returns:
+            The left or the right sub-block, or None if the sub-block that contains the shuffle
+            index has not been created.
+        """
+        middle_index = self._start_index + (self._end_index - self._start_index + 1) // 2
+        if shuffle_index < middle_index:
+            return self._left_sub_block
         return self._right_sub_block
 
     def get_error_parity(self):
@@ -266,7 +382,7 @@ class Block:
         """
         if self._correct_parity is None:
             return Block.ERRORS_UNKNOWN
-        if self._current_parity == self._correct_parity:
+        if self.get_current_parity() == self._correct_parity:
             return Block.ERRORS_EVEN
         return Block.ERRORS_ODD
 
@@ -296,4 +412,7 @@ class Block:
         Flip the current parity of this block. This is needed when a single bit in the block is
         flipped as a result of a single bit error correction.
         """
-        self._current_parity = 1 - self._current_parity
+        # If the current parity has not been calculated yet, it will be calculated from the bits
+        # of the block (including the flipped bit) when it is needed.
+        if self._current_parity is not None:
+            self._current_parity = 1 - self._current_parity
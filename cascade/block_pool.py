@@ -0,0 +1,95 @@
+from cascade.block import Block
+
+class BlockPool:
+    """
+    A pool of Block objects that can be reused once they are no longer needed.
+
+    Creating a Python object, and later collecting it as garbage (blocks refer to their parent and
+    sub-blocks, so they can only be collected by the cyclic garbage collector), is much more
+    expensive than re-initializing an existing object. The pool hands out blocks, including all
+    sub-blocks that are created from them. When a top-level block and its sub-blocks are no longer
+    needed, they are released back into the pool, and re-initialized when they are handed out
+    again.
+    """
+
+    def __init__(self):
+        """
+        Create an empty block pool.
+        """
+        self._free_blocks = []
+
+    def get_free_block_count(self):
+        """
+        Get the number of released blocks that are available for reuse.
+
+        Returns:
+            The number of free blocks.
+        """
+        return len(self._free_blocks)
+
+    def create_block(self, key, shuffle, start_index, end_index, parent_block):
+        """
+        Create a block, reusing a free block if there is one. The arguments are the same as for the
+        Block constructor, except for the pool.
+
+        Returns:
+            The block.
+        """
+        if self._free_blocks:
+            block = self._free_blocks.pop()
+            block.__init__(key, shuffle, start_index, end_index, parent_block, self)
+        else:
+            block = Block(key, shuffle, start_index, end_index, parent_block, self)
+        return block
+
+    def create_blocks(self, key, shuffle, shuffle_ranges):
+        """
+        Create a list of top-level blocks for given ranges of a shuffled key, reusing free blocks.
+        The arguments are the same as for Block.create_blocks.
+
+        Returns:
+            A list with one block per range, in the same order as the ranges. The current parities
+            of the blocks are already calculated.
+        """
+        blocks = [self.create_block(key, shuffle, start_index, end_index, None)
+                  for (start_index, end_index) in shuffle_ranges]
+        parities = shuffle.calculate_parities(key, shuffle_ranges)
+        for (block, parity) in zip(blocks, parities):
+            block.set_current_parity(parity)
+        return blocks
+
+    def release_blocks(self, blocks):
+        """
+        Release blocks and all of their sub-blocks, so that they can be reused. The released blocks
+        must not be used anymore. They stop referring to the key and shuffle that they were created
+        for, so that the pool does not keep those alive.
+
+        Args:
+            blocks (iterable): The blocks to release. They must have been created by this pool, and
+                must not be sub-blocks of each other.
+
+        Returns:
+            The number of released blocks, including the sub-blocks.
+        """
+        free_blocks = self._free_blocks
+        nr_free_blocks = len(free_blocks)
+        free_blocks.extend(blocks)
+        # The released blocks double as the work list: walk them in order, adding the sub-blocks of
+        # each one to the end.
+        # pylint:disable=protected-access
+        index = nr_free_blocks
+        while index < len(free_blocks):
+            block = free_blocks[index]
+            for sub_block in (block._left_sub_block, block._right_sub_block):
+                if sub_block is not None:
+                    free_blocks.append(sub_block)
+            block._key = None
+            block._shuffle = None
+            index += 1
+        return len(free_blocks) - nr_free_blocks
+
+    def clear(self):
+        """
+        Drop all free blocks from the pool.
+        """
+        self._free_blocks.clear()
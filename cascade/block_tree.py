@@ -0,0 +1,626 @@
+import sys
+from array import array
+from bisect import bisect_right
+from cascade.block import Block
+
+# The state of each node is packed into a single byte, using the following bits.
+_CURRENT_PARITY = 0x01
+_CORRECT_PARITY = 0x02
+_CORRECT_PARITY_KNOWN = 0x04
+_CREATED = 0x08
+_CURRENT_PARITY_KNOWN = 0x10
+
+class _SparseNodes(dict):
+    """
+    The node states of a sparse block tree: only the nodes of created blocks are stored. Nodes that
+    are not stored read as 0, just like the nodes of a dense block tree that were never written.
+    """
+
+    def __missing__(self, node):
+        return 0
+
+class BlockTree:
+    """
+    All blocks of a shuffled key for one iteration, stored in arrays instead of in Block objects.
+
+    Each top-level block is the root of an implicit binary tree of sub-blocks: the node with heap
+    index h has its left sub-block at heap index 2h and its right sub-block at heap index 2h+1 (the
+    root has heap index 1). Every top-level block reserves the same number of nodes, so the node
+    number of any block is top_block_nr * nodes_per_top_block + heap_index. The current parity,
+    the correct parity (or unknown), and whether the block has been created are kept as bit fields
+    in a single byte per node, in an array indexed by node number.
+
+    Only a small fraction of the nodes of a large top-level block is ever created: BINARY creates
+    about two sub-blocks per level, and only in blocks that contain an error. Hence, when the
+    top-level blocks are large (e.g. the two halves of the key in a BICONF iteration), the tree is
+    sparse: the node states are kept in a dict that only contains the created nodes.
+
+    Blocks are handed out as BlockView objects, which are lightweight and created on demand. Two
+    views of the same block compare equal. A BlockTree is also a sequence of the views of its
+    top-level blocks.
+    """
+
+    SPARSE_NODES_PER_TOP_BLOCK = 256
+    """Use a sparse tree if a top-level block has more than this number of nodes."""
+
+    def __init__(self, key, shuffle, top_block_boundaries, top_block_parities=None):
+        """
+        Create a block tree. The current parities of the blocks are calculated when first needed,
+        unless they are given for the top-level blocks.
+
+        Args:
+            key (Key): The key for which to create the blocks.
+            shuffle (Shuffle): The shuffle to apply to the key before creating the blocks.
+            top_block_boundaries (sequence): The shuffle indexes at which the top-level blocks
+                start, in increasing order, followed by the shuffle index (exclusive) at which the
+                last top-level block ends. A list with a single element means that there are no
+                blocks.
+            top_block_parities (sequence): The current parities of the top-level blocks, in order.
+                None means that they are calculated when first needed, just like for sub-blocks.
+        """
+        self._key = key
+        self._shuffle = shuffle
+        self._top_block_boundaries = array("q", top_block_boundaries)
+        self._top_block_count = len(top_block_boundaries) - 1
+        max_top_block_size = 1
+        for top_block_nr in range(self._top_block_count):
+            max_top_block_size = max(max_top_block_size,
+                                     top_block_boundaries[top_block_nr + 1] -
+                                     top_block_boundaries[top_block_nr])
+        # A block of size s is split into sub-blocks of size ceil(s/2) and floor(s/2), so there are
+        # at most ceil(log2(s)) levels below a top-level block.
+        levels = (max_top_block_size - 1).bit_length()
+        self._nodes_per_top_block = 2 ** (levels + 1)
+        if self._nodes_per_top_block > self.SPARSE_NODES_PER_TOP_BLOCK:
+            self._nodes = _SparseNodes()
+        else:
+            self._nodes = bytearray(self._top_block_count * self._nodes_per_top_block)
+        for top_block_nr in range(self._top_block_count):
+            self._nodes[top_block_nr * self._nodes_per_top_block + 1] = _CREATED
+        if top_block_parities is not None:
+            for (top_block_nr, parity) in enumerate(top_block_parities):
+                self._nodes[top_block_nr * self._nodes_per_top_block + 1] |= \
+                    _CURRENT_PARITY_KNOWN | parity
+        self._block_count = self._top_block_count
+
+    @staticmethod
+    def create_covering_tree(key, shuffle, block_size):
+        """
+        Create a block tree with top-level blocks of a given size that cover a given shuffled key.
+
+        Args:
+            key (Key): The key for which to create the blocks.
+            shuffle (Shuffle): The shuffle to apply to the key before creating the blocks.
+            block_size (int): The size of each top-level block. Each block, except for the last
+                one, will be exactly this size. The last block may be smaller.
+
+        Returns:
+            A block tree whose top-level blocks cover the shuffled key. The current parities of the
+            top-level blocks are already calculated.
+        """
+        size = shuffle.get_size()
+        top_block_boundaries = list(range(0, size, block_size))
+        top_block_boundaries.append(size)
+        shuffle_ranges = list(zip(top_block_boundaries, top_block_boundaries[1:]))
+        return BlockTree.create_tree(key, shuffle, top_block_boundaries, shuffle_ranges)
+
+    @staticmethod
+    def create_tree(key, shuffle, top_block_boundaries, shuffle_ranges):
+        """
+        Create a block tree, and calculate the current parities of its top-level blocks.
+
+        Args:
+            key (Key): The key for which to create the blocks.
+            shuffle (Shuffle): The shuffle to apply to the key before creating the blocks.
+            top_block_boundaries (sequence): The boundaries of the top-level blocks, as for the
+                BlockTree constructor.
+            shuffle_ranges (sequence): The tuples (shuffle_start_index, shuffle_end_index) of the
+                top-level blocks, i.e. the pairs of consecutive top_block_boundaries.
+
+        Returns:
+            A block tree whose current parities of the top-level blocks are already calculated.
+        """
+        # We will need the current parities of all top-level blocks, so calculate them all at once.
+        parities = shuffle.calculate_parities(key, shuffle_ranges)
+        return BlockTree(key, shuffle, top_block_boundaries, parities)
+
+    def __len__(self):
+        """
+        Get the number of top-level blocks.
+
+        Returns:
+            The number of top-level blocks.
+        """
+        return self._top_block_count
+
+    def __getitem__(self, top_block_nr):
+        """
+        Get a view of a top-level block.
+
+        Args:
+            top_block_nr (int): The number of the top-level block, in range [0, len(self)).
+
+        Returns:
+            A view of the top-level block.
+        """
+        if not 0 <= top_block_nr < self._top_block_count:
+            raise IndexError("top-level block number out of range")
+        return BlockView(self, top_block_nr * self._nodes_per_top_block + 1,
+                         self._top_block_boundaries[top_block_nr],
+                         self._top_block_boundaries[top_block_nr + 1])
+
+    def __iter__(self):
+        """
+        Iterate over views of all top-level blocks, in order.
+        """
+        for top_block_nr in range(self._top_block_count):
+            yield self[top_block_nr]
+
+    def get_key(self):
+        """
+        Get the key for which the blocks were created.
+
+        Returns:
+            The key.
+        """
+        return self._key
+
+    def get_shuffle(self):
+        """
+        Get the shuffle for the blocks.
+
+        Returns:
+            The shuffle.
+        """
+        return self._shuffle
+
+    def get_top_block_containing(self, shuffle_index):
+        """
+        Get a view of the top-level block that contains a given shuffle index.
+
+        Args:
+            shuffle_index (int): The shuffle index.
+
+        Returns:
+            A view of the top-level block, or None if no top-level block contains the shuffle index.
+        """
+        top_block_nr = bisect_right(self._top_block_boundaries, shuffle_index) - 1
+        if not 0 <= top_block_nr < self._top_block_count:
+            return None
+        return self[top_block_nr]
+
+    def get_memory_bytes(self):
+        """
+        Get the number of bytes of memory used to store the blocks.
+
+        Returns:
+            The number of bytes.
+        """
+        boundaries = self._top_block_boundaries
+        memory_bytes = boundaries.itemsize * len(boundaries)
+        if self.is_sparse():
+            memory_bytes += sys.getsizeof(self._nodes)
+            memory_bytes += sum(sys.getsizeof(node) for node in self._nodes)
+        else:
+            memory_bytes += len(self._nodes)
+        return memory_bytes
+
+    def get_block_count(self):
+        """
+        Get the number of blocks in the tree, i.e. the top-level blocks and all sub-blocks that
+        were created.
+
+        Returns:
+            The number of blocks.
+        """
+        return self._block_count
+
+    def is_sparse(self):
+        """
+        Is the tree sparse, i.e. does it only store the nodes of the blocks that were created?
+
+        Returns:
+            True if the tree is sparse, False if it stores all nodes.
+        """
+        return isinstance(self._nodes, _SparseNodes)
+
+    def _get_block_view(self, node):
+        # Find the start and end index of the block by descending from its top-level block; the
+        # bits of the heap index below the most significant one give the path (0=left, 1=right).
+        top_block_nr = node // self._nodes_per_top_block
+        heap_index = node % self._nodes_per_top_block
+        start_index = self._top_block_boundaries[top_block_nr]
+        end_index = self._top_block_boundaries[top_block_nr + 1]
+        for bit_nr in reversed(range(heap_index.bit_length() - 1)):
+            middle_index = start_index + (end_index - start_index + 1) // 2
+            if (heap_index >> bit_nr) & 1:
+                start_index = middle_index
+            else:
+                end_index = middle_index
+        return BlockView(self, node, start_index, end_index)
+
+    def _create_sub_block_view(self, sub_node, start_index, end_index):
+        self._nodes[sub_node] = _CREATED
+        self._block_count += 1
+        return BlockView(self, sub_node, start_index, end_index)
+
+class BlockView:
+    """
+    A lightweight view of one block in a BlockTree. It offers the same methods as a Block.
+    """
+
+    __slots__ = ("_tree", "_node", "_start_index", "_end_index")
+
+    def __init__(self, tree, node, start_index, end_index):
+        """
+        Create a view of a block in a block tree. Use the methods of BlockTree and BlockView to
+        get views, instead of creating them directly.
+
+        Args:
+            tree (BlockTree): The block tree.
+            node (int): The node number of the block in the tree.
+            start_index (int): The shuffle index, inclusive, at which the block starts.
+            end_index (int): The shuffle index, exclusive, at which the block ends.
+        """
+        self._tree = tree
+        self._node = node
+        self._start_index = start_index
+        self._end_index = end_index
+
+    def __eq__(self, other):
+        """
+        Is this view a view of the same block as the other view?
+
+        Returns:
+            True if both views are views of the same block in the same block tree.
+        """
+        # pylint:disable=protected-access
+        if not isinstance(other, BlockView):
+            return False
+        return self._tree is other._tree and self._node == other._node
+
+    def __hash__(self):
+        return hash((id(self._tree), self._node))
+
+    def __repr__(self):
+        """
+        Get the unambiguous string representation of the block.
+
+        Returns:
+            The unambiguous string representation of the block.
+        """
+        # pylint:disable=protected-access
+        shuffle = self._tree._shuffle
+        string = "Block:"
+        for shuffle_index in range(self._start_index, self._end_index):
+            key_index = shuffle.get_key_index(shuffle_index)
+            key_bit = shuffle.get_bit(self._tree._key, shuffle_index)
+            string += f" {shuffle_index}->{key_index}={key_bit}"
+        return string
+
+    def __str__(self):
+        """
+        Get the human-readable string representation of the block.
+
+        Returns:
+            The human-readable string representation of the block.
+        """
+        # pylint:disable=protected-access
+        string = ""
+        for shuffle_index in range(self._start_index, self._end_index):
+            string += str(self._tree._shuffle.get_bit(self._tree._key, shuffle_index))
+        return string
+
+    def __lt__(self, other):
+        """
+        Is this block "less than" the other block? This is needed to insert the blocks in a priority
+        queue. We don't care about the order of blocks within a given block size, so we simply order
+        based on the node number.
+
+        Returns:
+            True if self < other, False otherwise.
+        """
+        # pylint:disable=protected-access
+        return (self._node, id(self._tree)) < (other._node, id(other._tree))
+
+    def get_tree(self):
+        """
+        Get the block tree that contains this block.
+
+        Returns:
+            The block tree.
+        """
+        return self._tree
+
+    def get_start_index(self):
+        """
+        Get the start index of the block, i.e. the shuffled key index for the first bit in the
+        block.
+
+        Returns:
+            The start index.
+        """
+        return self._start_index
+
+    def get_end_index(self):
+        """
+        Get the end index of the block, i.e. the shuffled key index for the first bit after the last
+        bit in the block.
+
+        Returns:
+            The end index.
+        """
+        return self._end_index
+
+    def get_shuffle(self):
+        """
+        Get the shuffle for this block.
+
+        Returns:
+            The shuffle for this block.
+        """
+        # pylint:disable=protected-access
+        return self._tree._shuffle
+
+    def get_size(self):
+        """
+        Get the size of the block in bits.
+
+        Returns:
+            The size of the block in bits.
+        """
+        return self._end_index - self._start_index
+
+    def get_key_indexes(self):
+        """
+        Get a list of key indexes for this block.
+
+        Returns:
+            The key indexes for this block (the ordering of the list is undefined; in particular
+            don't assume that the key indexes are in increasing order.)
+        """
+        get_key_index = self.get_shuffle().get_key_index
+        return [get_key_index(shuffle_index)
+                for shuffle_index in range(self._start_index, self._end_index)]
+
+    def get_current_parity(self):
+        """
+        Get the current parity of the block.
+
+        Returns:
+            The current parity (0 or 1) of the block.
+        """
+        # pylint:disable=protected-access
+        nodes = self._tree._nodes
+        node_state = nodes[self._node]
+        if not node_state & _CURRENT_PARITY_KNOWN:
+            current_parity = self._tree._shuffle.calculate_parity(self._tree._key,
+                                                                  self._start_index,
+                                                                  self._end_index)
+            node_state |= _CURRENT_PARITY_KNOWN | current_parity
+            nodes[self._node] = node_state
+        return node_state & _CURRENT_PARITY
+
+    def set_current_parity(self, current_parity):
+        """
+        Set the current parity of the block, e.g. after calculating the parities of many blocks at
+        once. The parity must be the parity of the current bits in the block.
+
+        Params:
+            current_parity (int): The current parity (0 or 1).
+        """
+        # pylint:disable=protected-access
+        nodes = self._tree._nodes
+        nodes[self._node] = ((nodes[self._node] & ~_CURRENT_PARITY) | _CURRENT_PARITY_KNOWN |
+                             current_parity)
+
+    def is_current_parity_known(self):
+        """
+        Has the current parity of the block already been calculated or derived?
+
+        Returns:
+            True if the current parity is known, False if it will be calculated when first needed.
+        """
+        # pylint:disable=protected-access
+        return bool(self._tree._nodes[self._node] & _CURRENT_PARITY_KNOWN)
+
+    def try_derive_current_parity(self):
+        """
+        Try to derive the current parity of the block from the current parities of the parent block
+        and the sibling block, instead of calculating it from the bits in the block. This is only
+        possible if the current parity of the block is not yet known, and the current parities of
+        both the parent block and the sibling block are already known.
+
+        Returns:
+            True if the current parity was derived, False otherwise.
+        """
+        # pylint:disable=protected-access
+        nodes = self._tree._nodes
+        heap_index = self._get_heap_index()
+        if nodes[self._node] & _CURRENT_PARITY_KNOWN or heap_index == 1:
+            return False
+        parent_state = nodes[self._node - heap_index + heap_index // 2]
+        sibling_state = nodes[self._node ^ 1]
+        if not parent_state & sibling_state & _CURRENT_PARITY_KNOWN:
+            return False
+        nodes[self._node] |= (_CURRENT_PARITY_KNOWN |
+                              ((parent_state ^ sibling_state) & _CURRENT_PARITY))
+        return True
+
+    def get_correct_parity(self):
+        """
+        Get the correct parity of the block, if we know it.
+
+        Returns:
+            The current parity (0 or 1) of the block, or None if we don't know it.
+        """
+        # pylint:disable=protected-access
+        node_state = self._tree._nodes[self._node]
+        if not node_state & _CORRECT_PARITY_KNOWN:
+            return None
+        return (node_state & _CORRECT_PARITY) >> 1
+
+    def set_correct_parity(self, correct_parity):
+        """
+        Set the correct parity of the block.
+
+        Params:
+            correct_parity (int): The current parity (0 or 1).
+        """
+        # pylint:disable=protected-access
+        nodes = self._tree._nodes
+        nodes[self._node] = ((nodes[self._node] & ~_CORRECT_PARITY) | _CORRECT_PARITY_KNOWN |
+                             (correct_parity << 1))
+
+    def _get_heap_index(self):
+        # pylint:disable=protected-access
+        return self._node % self._tree._nodes_per_top_block
+
+    def is_top_block(self):
+        """
+        Is this block a top-level block?
+
+        Returns:
+            True if the block is a top-level block of the block tree. False if the block was created
+            by splitting a block into sub-blocks.
+        """
+        return self._get_heap_index() == 1
+
+    def get_parent_block(self):
+        """
+        Return the parent block of this block, if it has one.
+
+        Returns:
+            The parent block, or None if there is no parent block.
+        """
+        # pylint:disable=protected-access
+        heap_index = self._get_heap_index()
+        if heap_index == 1:
+            return None
+        return self._tree._get_block_view(self._node - heap_index + heap_index // 2)
+
+    def _get_middle_index(self):
+        return self._start_index + (self._end_index - self._start_index + 1) // 2
+
+    def _get_left_sub_node(self):
+        # Only meaningful for blocks of at least 2 bits; for smaller blocks this node number may be
+        # beyond the end of the tree or belong to the next top-level block.
+        return self._node + self._get_heap_index()
+
+    def get_left_sub_block(self):
+        """
+        Return the left sub-block of this block, if it has one.
+
+        Returns:
+            The left sub-block, or None if there is no left sub-block.
+        """
+        # pylint:disable=protected-access
+        left_sub_node = self._get_left_sub_node()
+        if self.get_size() < 2 or not self._tree._nodes[left_sub_node] & _CREATED:
+            return None
+        return BlockView(self._tree, left_sub_node, self._start_index, self._get_middle_index())
+
+    def create_left_sub_block(self):
+        """
+        Create the left sub-block of this block. If the block has an odd size, the left sub-block
+        will be one bit larger than the right sub-block. The block must be at least 2 bits in size.
+
+        Returns:
+            The left sub-block.
+        """
+        # pylint:disable=protected-access
+        return self._tree._create_sub_block_view(self._get_left_sub_node(), self._start_index,
+                                                 self._get_middle_index())
+
+    def get_right_sub_block(self):
+        """
+        Return the right sub-block of this block, if it has one.
+
+        Returns:
+            The right sub-block, or None if there is no right sub-block.
+        """
+        # pylint:disable=protected-access
+        right_sub_node = self._get_left_sub_node() + 1
+        if self.get_size() < 2 or not self._tree._nodes[right_sub_node] & _CREATED:
+            return None
+        return BlockView(self._tree, right_sub_node, self._get_middle_index(), self._end_index)
+
+    def create_right_sub_block(self):
+        """
+        Create the right sub-block of this block. If the block has an odd size, the left sub-block
+        will be one bit larger than the right sub-block. The block must be at least 2 bits in size.
+
+        Returns:
+            The right sub-block.
+        """
+        # pylint:disable=protected-access
+        return self._tree._create_sub_block_view(self._get_left_sub_node() + 1,
+                                                 self._get_middle_index(), self._end_index)
+
+    def get_sub_block_containing(self, shuffle_index):
+        """
+        Return the sub-block of this block that contains a given shuffle index, if that sub-block
+        has been created.
+
+        Params:
+            shuffle_index: The shuffle index. Must be in the range of this block.
+
+        Returns:
+            The left or the right sub-block, or None if the sub-block that contains the shuffle
+            index has not been created.
+        """
+        if shuffle_index < self._get_middle_index():
+            return self.get_left_sub_block()
+        return self.get_right_sub_block()
+
+    def get_error_parity(self):
+        """
+        Does this block have an odd or an even number of errors?
+
+        Returns:
+            * ERRORS_ODD = The block contains an odd number of errors.
+            * ERRORS_EVEN = The block contains an even number of errors.
+            * ERRORS_UNKNOWN = We don't yet know whether the block contains an odd or even number of
+              errors because we have not yet asked what the parity of the original key (witout
+              noise) is.
+        """
+        correct_parity = self.get_correct_parity()
+        if correct_parity is None:
+            return Block.ERRORS_UNKNOWN
+        if self.get_current_parity() == correct_parity:
+            return Block.ERRORS_EVEN
+        return Block.ERRORS_ODD
+
+    def get_key_index(self, shuffle_index):
+        """
+        The the key index that corresponds to a given shuffle index.
+
+        Params:
+            shuffle_index: The shuffle index.
+
+        Returns:
+            The key index.
+        """
+        return self.get_shuffle().get_key_index(shuffle_index)
+
+    def flip_bit(self, flipped_shuffle_index):
+        """
+        Flip a bit in the block.
+
+        Params:
+            flipped_shuffle_index: The shuffle index of the bit to flip.
+        """
+        # pylint:disable=protected-access
+        self._tree._shuffle.flip_bit(self._tree._key, flipped_shuffle_index)
+
+    def flip_parity(self):
+        """
+        Flip the current parity of this block. This is needed when a single bit in the block is
+        flipped as a result of a single bit error correction.
+        """
+        # pylint:disable=protected-access
+        # If the current parity has not been calculated yet, it will be calculated from the bits
+        # of the block (including the flipped bit) when it is needed.
+        nodes = self._tree._nodes
+        if nodes[self._node] & _CURRENT_PARITY_KNOWN:
+            nodes[self._node] ^= _CURRENT_PARITY
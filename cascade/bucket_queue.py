@@ -0,0 +1,84 @@
+import collections
+import heapq
+
+class BucketQueue:
+    """
+    A priority queue of blocks, ordered by block size (smallest block first), and in first-in
+    first-out order for blocks of the same size. Each block is queued with a boolean flag.
+
+    Block sizes come from a small set (the sizes of the top-level blocks and their halvings), so
+    the queue keeps one bucket per block size, and a heap of the distinct block sizes that have a
+    non-empty bucket. Pushing or popping a block is O(1), except when a bucket is created or
+    emptied, which is O(log s) where s is the number of distinct block sizes.
+    """
+
+    def __init__(self):
+        """
+        Create an empty bucket queue.
+        """
+        # Each bucket is a pair of deques: the blocks and their flags, in the same order. Emptied
+        # buckets are kept as spare buckets, to be reused for the next block size.
+        self._buckets = {}
+        self._spare_buckets = []
+        self._sizes = []
+        self._len = 0
+
+    def __len__(self):
+        """
+        Get the number of blocks in the queue.
+
+        Returns:
+            The number of blocks in the queue.
+        """
+        return self._len
+
+    def push(self, block, flag):
+        """
+        Add a block to the queue.
+
+        Args:
+            block (Block): The block.
+            flag (bool): The flag that is returned with the block when it is popped.
+        """
+        size = block.get_size()
+        bucket = self._buckets.get(size)
+        if bucket is None:
+            if self._spare_buckets:
+                bucket = self._spare_buckets.pop()
+            else:
+                bucket = (collections.deque(), collections.deque())
+            self._buckets[size] = bucket
+            heapq.heappush(self._sizes, size)
+        bucket[0].append(block)
+        bucket[1].append(flag)
+        self._len += 1
+
+    def pop(self):
+        """
+        Remove the smallest block from the queue. If there are multiple smallest blocks, remove the
+        one that was pushed first. The queue must not be empty.
+
+        Returns:
+            A tuple (block, flag) for the removed block.
+        """
+        size = self._sizes[0]
+        (blocks, flags) = self._buckets[size]
+        block = blocks.popleft()
+        flag = flags.popleft()
+        if not blocks:
+            self._spare_buckets.append(self._buckets.pop(size))
+            heapq.heappop(self._sizes)
+        self._len -= 1
+        return (block, flag)
+
+    def clear(self):
+        """
+        Remove all blocks from the queue.
+        """
+        for (blocks, flags) in self._buckets.values():
+            blocks.clear()
+            flags.clear()
+            self._spare_buckets.append((blocks, flags))
+        self._buckets.clear()
+        self._sizes.clear()
+        self._len = 0
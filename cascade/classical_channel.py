@@ -30,3 +30,15 @@ class ClassicalChannel(ABC):
             parities (list): A list of parities, where each parity is an int value 0 or 1. The list
             of parities must be in the same order as the list of blocks.
         """
+
+    def get_last_message_sizes(self):
+        """
+        Get the sizes of the messages that the last ask_parities call actually exchanged with
+        Alice, if the channel encodes them (see parity_protocol).
+
+        Returns:
+            A tuple (ask_size, reply_size) with the sizes of the question and the answer in bytes,
+            not counting the framing, or None if the channel does not encode the messages, e.g.
+            because it calls Alice directly.
+        """
+        return None
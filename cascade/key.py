@@ -1,6 +1,9 @@
-import copy
+import math
 import random
 
+# Translation table from the characters "0" and "1" to the byte values 0 and 1.
+_BIT_CHARACTERS_TO_BIT_VALUES = bytes.maketrans(b"01", b"\x00\x01")
+
 class Key:
     """
     A key that the Cascade protocol reconciles.
@@ -11,12 +14,29 @@ class Key:
     ERROR_METHOD_EXACT = "exact"
     ERROR_METHODS = [ERROR_METHOD_BERNOULLI, ERROR_METHOD_EXACT]
 
+    RANDOM_METHOD_PER_BIT = "per-bit"
+    """Draw random key bits and Bernoulli noise one bit at a time (reproduces the original
+    sequences for a given seed)."""
+    RANDOM_METHOD_BULK = "bulk"
+    """Draw random key bits and Bernoulli noise in bulk (much faster, different sequences)."""
+    RANDOM_METHODS = [RANDOM_METHOD_PER_BIT, RANDOM_METHOD_BULK]
+
+    _random_method = RANDOM_METHOD_PER_BIT
+
     def __init__(self):
         """
         Create an empty key.
         """
         self._size = 0
-        self._bits = {}  # Bits are stored as dictionary, indexed by index [0..size), value 0 or 1.
+        # Bits are packed 8 per byte: bit index i is stored in byte i // 8 at bit position i % 8
+        # (least significant bit first). Padding bits in the last byte are always zero.
+        self._bits = bytearray()
+        # True if the bits bytearray may be shared with another key (see copy_on_write), in which
+        # case it must be copied before it is changed.
+        self._bits_shared = False
+        # Parity indexes that must be kept up to date when a bit changes, keyed by shuffle
+        # identifier.
+        self._parity_indexes = {}
 
     @staticmethod
     def create_random_key(size):
@@ -32,10 +52,77 @@ class Key:
         # pylint:disable=protected-access
         key = Key()
         key._size = size
-        for i in range(size):
-            key._bits[i] = Key._random.randint(0, 1)
+        if Key._random_method == Key.RANDOM_METHOD_BULK:
+            value = Key._random.getrandbits(size)
+            key._bits = bytearray(value.to_bytes((size + 7) // 8, "little"))
+        else:
+            # Draw one random bit at a time, in the same order as always, so that a given seed
+            # keeps producing the same keys. Packing happens in one go after all bits are drawn.
+            randint = Key._random.randint
+            key._bits = Key._pack_bits([randint(0, 1) for _ in range(size)], size)
         return key
 
+    @staticmethod
+    def create_key_from_packed_bits(size, packed_bits):
+        """
+        Create a key from packed bits, as returned by get_packed_bits.
+
+        Args:
+            size (int): The size of the key in bits. Must be >= 0.
+            packed_bits (bytes-like): The bits, packed 8 per byte, least significant bit first. Must
+                be (size + 7) // 8 bytes long.
+
+        Returns:
+            A key with the given bits.
+        """
+        # pylint:disable=protected-access
+        key = Key()
+        key._size = size
+        key._bits = bytearray(packed_bits)
+        assert len(key._bits) == (size + 7) // 8
+        # Make sure that the padding bits in the last byte are zero.
+        if size & 7:
+            key._bits[-1] &= (1 << (size & 7)) - 1
+        return key
+
+    def get_packed_bits(self):
+        """
+        Get the bits of the key, packed.
+
+        Returns:
+            The bits of the key as bytes, packed 8 per byte, least significant bit first.
+        """
+        return bytes(self._bits)
+
+    @staticmethod
+    def _pack_bits(bit_values, size):
+        """
+        Pack a sequence of bit values into a bytearray, 8 bits per byte, least significant bit
+        first.
+
+        Args:
+            bit_values (sequence): The bit values (0 or 1) to pack, in key index order.
+            size (int): The number of bit values.
+
+        Returns:
+            A bytearray with the packed bits.
+        """
+        if size == 0:
+            return bytearray()
+        # Build the bits as a binary string with the highest index first, and let int() do the
+        # packing.
+        value = int("".join(map(str, reversed(bit_values))), 2)
+        return bytearray(value.to_bytes((size + 7) // 8, "little"))
+
+    def _to_int(self):
+        """
+        Get the key as a (potentially very large) integer in which bit i is key bit i.
+
+        Returns:
+            The key as an integer.
+        """
+        return int.from_bytes(self._bits, "little")
+
     def __repr__(self):
         """
         Get the unambiguous string representation of the key.
@@ -52,10 +139,9 @@ class Key:
         Returns:
             The human-readable string representation of the key.
         """
-        string = ""
-        for i in range(self._size):
-            string += str(self._bits[i])
-        return string
+        if self._size == 0:
+            return ""
+        return format(self._to_int(), f"0{self._size}b")[::-1]
 
     @staticmethod
     def set_random_seed(seed):
@@ -71,6 +157,27 @@ class Key:
         """
         Key._random = random.Random(seed)
 
+    @staticmethod
+    def set_random_method(random_method):
+        """
+        Set the method that the key module uses to draw random key bits (in create_random_key) and
+        Bernoulli noise (in copy with ERROR_METHOD_BERNOULLI).
+
+        RANDOM_METHOD_PER_BIT is the default. It draws one random number per key bit and, for a
+        given seed, produces exactly the same sequence of keys as earlier versions of this module
+        did. Use it to reproduce old experiments. RANDOM_METHOD_BULK draws all bits of a key in a
+        single call, and draws only the positions of the Bernoulli errors (by sampling the gaps
+        between errors) instead of one random number per key bit. It is seedable in the same way
+        but produces a different sequence of keys.
+
+        The ERROR_METHOD_EXACT noise is the same for both methods.
+
+        Args:
+            random_method (str): The random method. Must be one of the methods in RANDOM_METHODS.
+        """
+        assert random_method in Key.RANDOM_METHODS
+        Key._random_method = random_method
+
     def get_size(self):
         """
         Get the size of the key in bits.
@@ -90,7 +197,18 @@ class Key:
         Returns:
             The value (0 or 1) of the key bit at the given index.
         """
-        return self._bits[index]
+        return (self._bits[index >> 3] >> (index & 7)) & 1
+
+    def get_bits(self):
+        """
+        Get the values of all bits in the key, unpacked.
+
+        Returns:
+            A bytearray with one byte per key bit, indexed by key index, with value 0 or 1.
+        """
+        if self._size == 0:
+            return bytearray()
+        return bytearray(self.__str__().encode().translate(_BIT_CHARACTERS_TO_BIT_VALUES))
 
     def set_bit(self, index, value):
         """
@@ -100,7 +218,15 @@ class Key:
             index (int): The index of the bit. Index must be in range [0, key.size).
             value (int): The new value of the bit. Must be 0 or 1.
         """
-        self._bits[index] = value
+        if self._parity_indexes and value != self.get_bit(index):
+            for parity_index in self._parity_indexes.values():
+                parity_index.flip_key_bit(index)
+        if self._bits_shared:
+            self._unshare_bits()
+        if value:
+            self._bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self._bits[index >> 3] &= ~(1 << (index & 7))
 
     def flip_bit(self, index):
         """
@@ -109,7 +235,69 @@ class Key:
         Args:
             index (int): The index of the bit. Index must be in range [0, key.size).
         """
-        self._bits[index] = 1 - self._bits[index]
+        if self._bits_shared:
+            self._unshare_bits()
+        self._bits[index >> 3] ^= 1 << (index & 7)
+        for parity_index in self._parity_indexes.values():
+            parity_index.flip_key_bit(index)
+
+    def _unshare_bits(self):
+        self._bits = bytearray(self._bits)
+        self._bits_shared = False
+
+    def copy_on_write(self):
+        """
+        Copy a key without copying its bits yet: the copy shares the bits with this key until
+        either key changes a bit. Parity indexes are not copied.
+
+        Returns:
+            A new Key instance, which is a copy of this key.
+        """
+        # pylint:disable=protected-access
+        key = Key()
+        key._size = self._size
+        key._bits = self._bits
+        key._bits_shared = True
+        self._bits_shared = True
+        return key
+
+    def add_parity_index(self, parity_index):
+        """
+        Add a parity index for this key. From now on, the parity index is kept up to date when
+        bits in the key are set or flipped, and shuffles use it to calculate parities over this
+        key.
+
+        Args:
+            parity_index (ParityIndex): The parity index. It must have been created for this key.
+        """
+        self._parity_indexes[parity_index.get_shuffle().get_identifier()] = parity_index
+
+    def remove_parity_index(self, shuffle):
+        """
+        Remove the parity index for a given shuffle of this key, if there is one.
+
+        Args:
+            shuffle (Shuffle): The shuffle for which to remove the parity index.
+        """
+        self._parity_indexes.pop(shuffle.get_identifier(), None)
+
+    def remove_all_parity_indexes(self):
+        """
+        Remove all parity indexes for this key.
+        """
+        self._parity_indexes = {}
+
+    def get_parity_index(self, shuffle):
+        """
+        Get the parity index for a given shuffle of this key, if there is one.
+
+        Args:
+            shuffle (Shuffle): The shuffle.
+
+        Returns:
+            The parity index, or None if there is no parity index for the shuffle.
+        """
+        return self._parity_indexes.get(shuffle.get_identifier())
 
     def copy(self, error_rate, error_method):
         """
@@ -124,24 +312,55 @@ class Key:
             A new Key instance, which is a copy of this key, with noise applied.
         """
         # pylint:disable=protected-access
-        key = Key()
-        key._size = self._size
-        key._bits = copy.deepcopy(self._bits)
+        bits_to_flip = []
 
         if error_method == self.ERROR_METHOD_EXACT:
             error_count = round(error_rate * self._size)
-            bits = list(self._bits.keys())
-            bits_to_flip = Key._random.sample(bits, error_count)
-            for index in bits_to_flip:
-                key._bits[index] = 1 - key._bits[index]
+            bits_to_flip = Key._random.sample(range(self._size), error_count)
 
         if error_method == self.ERROR_METHOD_BERNOULLI:
-            for index in self._bits.keys():
-                if Key._random.random() <= error_rate:
-                    key._bits[index] = 1 - key._bits[index]
+            if Key._random_method == Key.RANDOM_METHOD_BULK:
+                bits_to_flip = self._bulk_bernoulli_error_indexes(error_rate)
+            else:
+                random_function = Key._random.random
+                bits_to_flip = [index for index in range(self._size)
+                                if random_function() <= error_rate]
 
+        # Apply all the errors at once by XOR-ing the key with a noise mask.
+        noise_mask = bytearray(len(self._bits))
+        for index in bits_to_flip:
+            noise_mask[index >> 3] |= 1 << (index & 7)
+        key = Key()
+        key._size = self._size
+        noisy_value = self._to_int() ^ int.from_bytes(noise_mask, "little")
+        key._bits = bytearray(noisy_value.to_bytes(len(self._bits), "little"))
         return key
 
+    def _bulk_bernoulli_error_indexes(self, error_rate):
+        """
+        Choose the indexes of the bits to flip for Bernoulli noise, by drawing the (geometrically
+        distributed) gaps between consecutive errors instead of drawing one random number per bit.
+
+        Args:
+            error_rate (float): The probability that any given bit is flipped.
+
+        Returns:
+            A list of key indexes, in increasing order.
+        """
+        if error_rate <= 0.0:
+            return []
+        if error_rate >= 1.0:
+            return list(range(self._size))
+        random_function = Key._random.random
+        log_no_error = math.log(1.0 - error_rate)
+        indexes = []
+        index = -1
+        while True:
+            index += 1 + int(math.log(1.0 - random_function()) / log_no_error)
+            if index >= self._size:
+                return indexes
+            indexes.append(index)
+
     def difference(self, other_key):
         """
         Return the number of bits that are different between this key and the other_key (also known
@@ -154,9 +373,5 @@ class Key:
         Returns:
             The number of bits that are different between this key and the other key.
         """
-        difference = 0
-        for i in range(self._size):
-            # pylint:disable=protected-access
-            if self._bits[i] != other_key._bits[i]:
-                difference += 1
-        return difference
+        # pylint:disable=protected-access
+        return (self._to_int() ^ other_key._to_int()).bit_count()
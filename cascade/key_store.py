@@ -0,0 +1,79 @@
+import mmap
+import struct
+
+from cascade.key import Key
+
+class KeyStore:
+    """
+    A file with keys, which is memory-mapped so that a key can be loaded without reading the
+    other keys in the file. Alice's parity server uses a key store to look up the correct key of
+    each session.
+
+    The file starts with a header: the magic bytes b"CASCKEYS" and the number of keys, followed by
+    an entry (offset, size in bits) for each key. All numbers are 8-byte unsigned little-endian
+    integers. The bits of each key are stored at its offset, packed as by Key.get_packed_bits.
+    """
+
+    _MAGIC = b"CASCKEYS"
+    _HEADER = struct.Struct("<8sQ")
+    _ENTRY = struct.Struct("<QQ")
+
+    def __init__(self, path):
+        """
+        Open a key store.
+
+        Args:
+            path (str): The path of the key store file, as written by KeyStore.write.
+        """
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self._key_count) = self._HEADER.unpack_from(self._mmap, 0)
+        assert magic == self._MAGIC
+
+    @staticmethod
+    def write(path, keys):
+        """
+        Write keys to a new key store file.
+
+        Args:
+            path (str): The path of the key store file. An existing file is overwritten.
+            keys (list): The keys to store. Key number i is keys[i].
+        """
+        offset = KeyStore._HEADER.size + len(keys) * KeyStore._ENTRY.size
+        with open(path, "wb") as file:
+            file.write(KeyStore._HEADER.pack(KeyStore._MAGIC, len(keys)))
+            for key in keys:
+                file.write(KeyStore._ENTRY.pack(offset, key.get_size()))
+                offset += (key.get_size() + 7) // 8
+            for key in keys:
+                file.write(key.get_packed_bits())
+
+    def close(self):
+        """
+        Close the key store. Keys that were already loaded can still be used.
+        """
+        self._mmap.close()
+
+    def get_key_count(self):
+        """
+        Get the number of keys in the key store.
+
+        Returns:
+            The number of keys.
+        """
+        return self._key_count
+
+    def get_key(self, key_number):
+        """
+        Load a key from the key store.
+
+        Args:
+            key_number (int): The number of the key. Must be in range [0, key_count).
+
+        Returns:
+            A new Key instance with the bits of the stored key.
+        """
+        assert 0 <= key_number < self._key_count
+        (offset, size) = self._ENTRY.unpack_from(self._mmap,
+                                                 self._HEADER.size + key_number * self._ENTRY.size)
+        return Key.create_key_from_packed_bits(size, self._mmap[offset:offset + (size + 7) // 8])
@@ -1,15 +1,22 @@
 from cascade.classical_channel import ClassicalChannel
+from cascade.parity_index import ParityIndex
+from cascade.shuffle import Shuffle
 
 class MockClassicalChannel(ClassicalChannel):
     """
     A mock concrete implementation of the ClassicalChannel base class, which is used for the
-    experiments.
+    experiments. It computes the parities of Alice's correct key, so the parity server also uses
+    it to answer the questions of each session.
     """
 
     def __init__(self, correct_key):
         self._correct_key = correct_key
         self._id_to_shuffle = {}
         self._reconciliation_started = False
+        # Parity indexes over the correct key, by shuffle identifier. We keep them here instead of
+        # adding them to the correct key, so that we don't modify the caller's key.
+        self._parity_indexes = {}
+        self._asked_shuffle_identifiers = set()
 
     def start_reconciliation(self):
         self._reconciliation_started = True
@@ -17,13 +24,76 @@ class MockClassicalChannel(ClassicalChannel):
     def end_reconciliation(self):
         self._reconciliation_started = False
         self._id_to_shuffle = {}
+        self._parity_indexes = {}
+        self._asked_shuffle_identifiers = set()
 
     def ask_parities(self, blocks):
-        parities = []
+        # Group the questions by shuffle, so that we can calculate the parities for all blocks of
+        # one shuffle at once.
+        shuffles = {}
+        shuffle_ranges = {}
         for block in blocks:
             shuffle = block.get_shuffle()
-            start_index = block.get_start_index()
-            end_index = block.get_end_index()
-            parity = shuffle.calculate_parity(self._correct_key, start_index, end_index)
-            parities.append(parity)
-        return parities
+            identifier = shuffle.get_identifier()
+            if identifier not in shuffles:
+                shuffles[identifier] = shuffle
+                shuffle_ranges[identifier] = []
+            shuffle_ranges[identifier].append((block.get_start_index(), block.get_end_index()))
+        shuffle_parities = self._calculate_shuffle_parities(shuffles, shuffle_ranges)
+        return [shuffle_parities[block.get_shuffle().get_identifier()].pop() for block in blocks]
+
+    def ask_parities_by_identifier(self, questions):
+        """
+        Compute the parities for a list of questions that identify the shuffle by its identifier
+        instead of by a Shuffle object, as they arrive over a real classical channel. Alice
+        reconstructs each shuffle from its identifier once per reconciliation.
+
+        Args:
+            questions (list): A list of tuples (shuffle_identifier, shuffle_start_index,
+                shuffle_end_index).
+
+        Returns:
+            A list of parities, in the same order as the questions.
+        """
+        shuffles = {}
+        shuffle_ranges = {}
+        for (identifier, shuffle_start_index, shuffle_end_index) in questions:
+            if identifier not in shuffles:
+                shuffle = self._id_to_shuffle.get(identifier)
+                if shuffle is None:
+                    shuffle = Shuffle.create_shuffle_from_identifier(identifier)
+                    self._id_to_shuffle[identifier] = shuffle
+                shuffles[identifier] = shuffle
+                shuffle_ranges[identifier] = []
+            shuffle_ranges[identifier].append((shuffle_start_index, shuffle_end_index))
+        shuffle_parities = self._calculate_shuffle_parities(shuffles, shuffle_ranges)
+        return [shuffle_parities[identifier].pop() for (identifier, _start, _end) in questions]
+
+    def _calculate_shuffle_parities(self, shuffles, shuffle_ranges):
+        # Calculate the parities of the ranges of each shuffle, reversed, so that the caller can
+        # pop the parities in the order of the questions.
+        shuffle_parities = {}
+        for (identifier, shuffle) in shuffles.items():
+            parity_index = self._get_parity_index(shuffle)
+            ranges = shuffle_ranges[identifier]
+            if parity_index is None:
+                parities = shuffle.calculate_parities(self._correct_key, ranges)
+            else:
+                parities = [parity_index.calculate_parity(start_index, end_index)
+                            for (start_index, end_index) in ranges]
+            parities.reverse()
+            shuffle_parities[identifier] = parities
+        self._asked_shuffle_identifiers |= shuffles.keys()
+        return shuffle_parities
+
+    def _get_parity_index(self, shuffle):
+        # Index the parities of the correct key for a shuffle when Bob asks about it in a second
+        # message; shuffles that Bob only asks about once are not worth indexing. Implicit shuffles
+        # are never indexed, since that would compute the permutation for every bit.
+        identifier = shuffle.get_identifier()
+        parity_index = self._parity_indexes.get(identifier)
+        if parity_index is None and identifier in self._asked_shuffle_identifiers and \
+           not shuffle.is_implicit():
+            parity_index = ParityIndex(self._correct_key, shuffle)
+            self._parity_indexes[identifier] = parity_index
+        return parity_index
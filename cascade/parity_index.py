@@ -0,0 +1,99 @@
+class ParityIndex:
+    """
+    An index over the bits of a shuffled key that answers parity questions for any contiguous range
+    of shuffle indexes in O(log n) time, and that is updated in O(log n) time when a key bit flips.
+    """
+
+    def __init__(self, key, shuffle):
+        """
+        Create a parity index for a shuffled key. The index is a binary indexed tree (also known as
+        a Fenwick tree) over the bits of the shuffled key, where each node stores the parity of a
+        range of bits instead of a sum.
+
+        The index does not follow changes to the key by itself: add it to the key with
+        Key.add_parity_index to keep it up to date and to have Shuffle.calculate_parity use it.
+
+        Args:
+            key (Key): The key.
+            shuffle (Shuffle): The shuffle to apply to the key. The size of the shuffle must be
+                equal to the size of the key.
+        """
+        self._key = key
+        self._shuffle = shuffle
+        self._size = shuffle.get_size()
+        # Tree node i (1-based) stores the parity of shuffled bits [i - lowbit(i), i), where
+        # lowbit(i) is the value of the least significant set bit in i. That range is an aligned
+        # group of lowbit(i) bits, so we compute the tree level by level: the parities of the
+        # groups of 2^k bits are the XOR of pairs of parities of groups of 2^(k-1) bits, and they
+        # go into the tree nodes (2j+1) * 2^k. Each level is computed with slices and one big
+        # integer XOR, so that all the per-bit work is done in C.
+        self._tree = bytearray(self._size + 1)
+        level_parities = bytes(shuffle.get_shuffled_bits(key))
+        group_size = 1
+        while level_parities:
+            self._tree[group_size::2 * group_size] = level_parities[0::2]
+            pairs = len(level_parities) // 2
+            level_parities = self._xor_bytes(level_parities[0:2 * pairs:2],
+                                             level_parities[1:2 * pairs:2])
+            group_size *= 2
+
+    @staticmethod
+    def _xor_bytes(bytes_1, bytes_2):
+        xor = int.from_bytes(bytes_1, "little") ^ int.from_bytes(bytes_2, "little")
+        return xor.to_bytes(len(bytes_1), "little")
+
+    def get_key(self):
+        """
+        Get the key that this parity index was created for.
+
+        Returns:
+            The key.
+        """
+        return self._key
+
+    def get_shuffle(self):
+        """
+        Get the shuffle that this parity index was created for.
+
+        Returns:
+            The shuffle.
+        """
+        return self._shuffle
+
+    def _prefix_parity(self, shuffle_end_index):
+        tree = self._tree
+        parity = 0
+        node = shuffle_end_index
+        while node > 0:
+            parity ^= tree[node]
+            node &= node - 1
+        return parity
+
+    def calculate_parity(self, shuffle_start_index, shuffle_end_index):
+        """
+        Calculate the parity of a contiguous sub-range of bits in the shuffled key.
+
+        Args:
+            shuffle_start_index (int): The index of the first bit (inclusive) in the range of
+                bits in the shuffled key over which to calculate the parity.
+            shuffle_end_index (int): The index of the last bit (exclusive) in the range of
+                bits in the shuffled key over which to calculate the parity.
+
+        Returns:
+            The parity of the contiguous sub-range of bits in the shuffled key.
+        """
+        return self._prefix_parity(shuffle_end_index) ^ self._prefix_parity(shuffle_start_index)
+
+    def flip_key_bit(self, key_index):
+        """
+        Update the index for a key bit that was flipped.
+
+        Args:
+            key_index (int): The key index of the bit that was flipped.
+        """
+        tree = self._tree
+        size = self._size
+        node = self._shuffle.get_shuffle_index(key_index) + 1
+        while node <= size:
+            tree[node] ^= 1
+            node += node & -node
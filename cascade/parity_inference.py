@@ -0,0 +1,176 @@
+class ParityInference:
+    """
+    Infer the correct parities of blocks from the correct parities that Alice already revealed.
+
+    Every revealed parity is a linear equation over GF(2): the XOR of the bits of Alice's key in a
+    range [start, end) of a shuffled key is known. Write P(s, i) for the XOR of the first i bits of
+    Alice's key after shuffle s (the prefix parity). Then the equation becomes
+    P(s, start) XOR P(s, end) = parity, i.e. every equation has exactly two variables. P(s, 0) is 0
+    for every shuffle, and P(s, n), where n is the key size, is the parity of the whole key for
+    every shuffle, so those variables are shared by all shuffles.
+
+    A system of equations with two variables each is kept in echelon form as a spanning forest: a
+    union-find structure in which every variable knows the XOR of itself and its parent. The
+    parity of a range is implied by the revealed parities if and only if its two variables are in
+    the same tree, and then it is the XOR of their values relative to the root. Adding an equation
+    or answering a question takes nearly constant amortized time (union by rank and path
+    compression), so the cost of inference is bounded no matter how many parities are revealed.
+
+    Relations that combine ranges of different shuffles in other ways than through the parity of
+    the whole key are not found; for random shuffles such relations are very rare.
+    """
+
+    _ZERO = 0
+    _FULL = 1
+
+    def __init__(self, key_size):
+        """
+        Create a parity inference engine without any revealed parities.
+
+        Args:
+            key_size (int): The size of the key in bits.
+        """
+        self._key_size = key_size
+        # The parent of each variable (missing means the variable is a root), the XOR of the value
+        # of each variable and the value of its parent, and the rank of each root.
+        self._parents = {}
+        self._parities = {}
+        self._ranks = {}
+        self._equation_count = 0
+        self._redundant_equation_count = 0
+        self._step_count = 0
+
+    def get_equation_count(self):
+        """
+        Get the number of revealed parities that were added.
+
+        Returns:
+            The number of equations.
+        """
+        return self._equation_count
+
+    def get_redundant_equation_count(self):
+        """
+        Get the number of revealed parities that were added, but that were already implied by the
+        parities that were added before them.
+
+        Returns:
+            The number of redundant equations.
+        """
+        return self._redundant_equation_count
+
+    def get_step_count(self):
+        """
+        Get the number of steps that were taken to find the roots of variables, which is a measure
+        of the cost of inference.
+
+        Returns:
+            The number of steps.
+        """
+        return self._step_count
+
+    def _variable(self, shuffle_identifier, shuffle_index):
+        if shuffle_index == 0:
+            return self._ZERO
+        if shuffle_index == self._key_size:
+            return self._FULL
+        return (shuffle_identifier, shuffle_index)
+
+    def _find(self, variable):
+        # Find the root of the tree of the variable, and the XOR of the values of the variable and
+        # the root. Compress the path, so that all variables on it point directly to the root.
+        parents = self._parents
+        parities = self._parities
+        path = []
+        parity = 0
+        while variable in parents:
+            path.append(variable)
+            parity ^= parities[variable]
+            variable = parents[variable]
+        self._step_count += len(path) + 1
+        root = variable
+        path_parity = parity
+        for path_variable in path:
+            parent_parity = parities[path_variable]
+            parents[path_variable] = root
+            parities[path_variable] = path_parity
+            path_parity ^= parent_parity
+        return (root, parity)
+
+    def add_parity(self, shuffle_identifier, shuffle_start_index, shuffle_end_index, parity):
+        """
+        Add a parity that Alice revealed.
+
+        Args:
+            shuffle_identifier (int): The identifier of the shuffle.
+            shuffle_start_index (int): The shuffle index (inclusive) at which the range starts.
+            shuffle_end_index (int): The shuffle index (exclusive) at which the range ends.
+            parity (int): The parity of the range of Alice's shuffled key.
+        """
+        (start_root, start_parity) = self._find(self._variable(shuffle_identifier,
+                                                               shuffle_start_index))
+        (end_root, end_parity) = self._find(self._variable(shuffle_identifier, shuffle_end_index))
+        self._equation_count += 1
+        if start_root == end_root:
+            self._redundant_equation_count += 1
+            return
+        start_rank = self._ranks.get(start_root, 0)
+        end_rank = self._ranks.get(end_root, 0)
+        if start_rank < end_rank:
+            (start_root, end_root) = (end_root, start_root)
+        elif start_rank == end_rank:
+            self._ranks[start_root] = start_rank + 1
+        self._parents[end_root] = start_root
+        self._parities[end_root] = start_parity ^ end_parity ^ parity
+
+    def get_parity(self, shuffle_identifier, shuffle_start_index, shuffle_end_index):
+        """
+        Get the parity of a range of Alice's shuffled key, if it is implied by the revealed
+        parities.
+
+        Args:
+            shuffle_identifier (int): The identifier of the shuffle.
+            shuffle_start_index (int): The shuffle index (inclusive) at which the range starts.
+            shuffle_end_index (int): The shuffle index (exclusive) at which the range ends.
+
+        Returns:
+            The parity of the range, or None if it is not implied by the revealed parities.
+        """
+        (start_root, start_parity) = self._find(self._variable(shuffle_identifier,
+                                                               shuffle_start_index))
+        (end_root, end_parity) = self._find(self._variable(shuffle_identifier, shuffle_end_index))
+        if start_root != end_root:
+            return None
+        return start_parity ^ end_parity
+
+    def get_implied_questions(self, questions):
+        """
+        For a list of questions that are asked in one message, find the questions whose answer is
+        implied by the revealed parities together with the answers to the questions before them in
+        the list. Those questions don't have to be asked: once the answers to the other questions
+        are added, get_parity returns their answer.
+
+        Args:
+            questions (list): A list of tuples (shuffle_identifier, shuffle_start_index,
+                shuffle_end_index).
+
+        Returns:
+            A list with, for each question, True if its answer is implied and False otherwise.
+        """
+        # Connect the trees of the variables of every question that is not implied, without
+        # knowing its answer yet, by linking their roots in a separate union-find structure.
+        links = {}
+        implied_questions = []
+        for (shuffle_identifier, shuffle_start_index, shuffle_end_index) in questions:
+            (start_root, _) = self._find(self._variable(shuffle_identifier, shuffle_start_index))
+            (end_root, _) = self._find(self._variable(shuffle_identifier, shuffle_end_index))
+            while start_root in links:
+                start_root = links[start_root]
+            while end_root in links:
+                end_root = links[end_root]
+            if start_root == end_root:
+                implied_questions.append(True)
+            else:
+                links[end_root] = start_root
+                implied_questions.append(False)
+        return implied_questions
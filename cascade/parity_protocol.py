@@ -0,0 +1,244 @@
+import struct
+
+# The messages that Bob and Alice's parity server exchange over a socket.
+#
+# Every message is sent as a frame: the length of the message as a 4-byte unsigned big-endian
+# integer, followed by the message. The first byte of a message is its type:
+#
+# * MESSAGE_START (Bob to Alice): start a reconciliation of the key with the given key number.
+# * MESSAGE_END (Bob to Alice): end the reconciliation.
+# * MESSAGE_ASK (Bob to Alice): ask for the correct parities of a list of shuffle ranges.
+# * MESSAGE_REPLY (Alice to Bob): the correct parities, in the same order as the ranges.
+#
+# Alice only replies to MESSAGE_ASK; a connection can be used for any number of reconciliations,
+# one after the other.
+#
+# A MESSAGE_ASK groups the questions by shuffle identifier (in order of first appearance), and
+# sorts the ranges of each group by start index and end index; this is the wire order, see
+# get_wire_order. After the message type, it contains the number of groups, and for each group
+# the shuffle identifier, the number of ranges, and for each range the difference between its start
+# index and the end index of the previous range in the group (zigzag-encoded, since ranges may
+# overlap; the first range starts from 0) and its size. All of these numbers are varints: 7 bits
+# per byte, least significant first, with the high bit set in all bytes but the last. Sub-blocks
+# and consecutive top-level blocks mostly start where the previous range ends, so most ranges
+# take 2 or 3 bytes.
+#
+# A MESSAGE_REPLY contains the parities in wire order, packed 8 per byte, least significant bit
+# first.
+
+MESSAGE_START = 1
+MESSAGE_END = 2
+MESSAGE_ASK = 3
+MESSAGE_REPLY = 4
+
+FRAME_HEADER = struct.Struct(">I")
+"""The header of a frame: the length of the message."""
+
+MAX_MESSAGE_SIZE = 1 << 30
+"""The maximum size of a message in bytes."""
+
+_START = struct.Struct("<BQ")
+
+def _append_varint(data, value):
+    while value >= 0x80:
+        data.append((value & 0x7f) | 0x80)
+        value >>= 7
+    data.append(value)
+
+def _read_varint(message, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = message[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return (value, offset)
+        shift += 7
+
+def encode_frame(message):
+    """
+    Frame a message.
+
+    Args:
+        message (bytes): The message.
+
+    Returns:
+        The frame, i.e. the message preceded by its length.
+    """
+    return FRAME_HEADER.pack(len(message)) + message
+
+def get_message_type(message):
+    """
+    Get the type of a message.
+
+    Args:
+        message (bytes): The message.
+
+    Returns:
+        The type of the message, e.g. MESSAGE_ASK.
+    """
+    return message[0]
+
+def encode_start(key_number):
+    """
+    Encode a MESSAGE_START message.
+
+    Args:
+        key_number (int): The number of the key in Alice's key store.
+
+    Returns:
+        The message.
+    """
+    return _START.pack(MESSAGE_START, key_number)
+
+def decode_start(message):
+    """
+    Decode a MESSAGE_START message.
+
+    Args:
+        message (bytes): The message.
+
+    Returns:
+        The number of the key in Alice's key store.
+    """
+    (_message_type, key_number) = _START.unpack(message)
+    return key_number
+
+def encode_end():
+    """
+    Encode a MESSAGE_END message.
+
+    Returns:
+        The message.
+    """
+    return bytes([MESSAGE_END])
+
+def get_wire_order(questions):
+    """
+    Get the order in which a MESSAGE_ASK message sends a list of questions, and in which the
+    MESSAGE_REPLY message returns the parities.
+
+    Args:
+        questions (list): A list of tuples (shuffle_identifier, shuffle_start_index,
+            shuffle_end_index).
+
+    Returns:
+        A list with the positions in the list of questions, in wire order.
+    """
+    group_nrs = {}
+    for (shuffle_identifier, _shuffle_start_index, _shuffle_end_index) in questions:
+        if shuffle_identifier not in group_nrs:
+            group_nrs[shuffle_identifier] = len(group_nrs)
+    return sorted(range(len(questions)),
+                  key=lambda question_nr: (group_nrs[questions[question_nr][0]],
+                                           questions[question_nr][1], questions[question_nr][2]))
+
+def encode_ask(questions, wire_order=None):
+    """
+    Encode a MESSAGE_ASK message.
+
+    Args:
+        questions (list): A list of tuples (shuffle_identifier, shuffle_start_index,
+            shuffle_end_index).
+        wire_order (list): The wire order of the questions, as returned by get_wire_order. None
+            means compute it.
+
+    Returns:
+        The message.
+    """
+    if wire_order is None:
+        wire_order = get_wire_order(questions)
+    groups = []
+    previous_shuffle_identifier = None
+    for question_nr in wire_order:
+        question = questions[question_nr]
+        if question[0] != previous_shuffle_identifier:
+            previous_shuffle_identifier = question[0]
+            groups.append((previous_shuffle_identifier, []))
+        groups[-1][1].append(question)
+    data = bytearray([MESSAGE_ASK])
+    _append_varint(data, len(groups))
+    for (shuffle_identifier, group_questions) in groups:
+        _append_varint(data, shuffle_identifier)
+        _append_varint(data, len(group_questions))
+        previous_end_index = 0
+        for (_shuffle_identifier, shuffle_start_index, shuffle_end_index) in group_questions:
+            delta = shuffle_start_index - previous_end_index
+            _append_varint(data, 2 * delta if delta >= 0 else -2 * delta - 1)
+            _append_varint(data, shuffle_end_index - shuffle_start_index)
+            previous_end_index = shuffle_end_index
+    return bytes(data)
+
+def decode_ask(message):
+    """
+    Decode a MESSAGE_ASK message.
+
+    Args:
+        message (bytes): The message.
+
+    Returns:
+        A list of tuples (shuffle_identifier, shuffle_start_index, shuffle_end_index), in wire
+        order.
+    """
+    questions = []
+    (group_count, offset) = _read_varint(message, 1)
+    for _ in range(group_count):
+        (shuffle_identifier, offset) = _read_varint(message, offset)
+        (range_count, offset) = _read_varint(message, offset)
+        previous_end_index = 0
+        for _ in range(range_count):
+            (zigzag_delta, offset) = _read_varint(message, offset)
+            (size, offset) = _read_varint(message, offset)
+            if zigzag_delta & 1:
+                shuffle_start_index = previous_end_index - (zigzag_delta + 1) // 2
+            else:
+                shuffle_start_index = previous_end_index + zigzag_delta // 2
+            previous_end_index = shuffle_start_index + size
+            questions.append((shuffle_identifier, shuffle_start_index, previous_end_index))
+    return questions
+
+def encode_reply(parities):
+    """
+    Encode a MESSAGE_REPLY message.
+
+    Args:
+        parities (list): The parities, each 0 or 1, in wire order.
+
+    Returns:
+        The message.
+    """
+    data = bytearray(1 + (len(parities) + 7) // 8)
+    data[0] = MESSAGE_REPLY
+    for (parity_nr, parity) in enumerate(parities):
+        if parity:
+            data[1 + (parity_nr >> 3)] |= 1 << (parity_nr & 7)
+    return bytes(data)
+
+def get_reply_size(parity_count):
+    """
+    Get the size of a MESSAGE_REPLY message.
+
+    Args:
+        parity_count (int): The number of parities in the message.
+
+    Returns:
+        The size of the message in bytes.
+    """
+    return 1 + (parity_count + 7) // 8
+
+def decode_reply(message, wire_order):
+    """
+    Decode a MESSAGE_REPLY message.
+
+    Args:
+        message (bytes): The message.
+        wire_order (list): The wire order of the questions, as returned by get_wire_order.
+
+    Returns:
+        The list of parities, in the order of the questions (not in wire order).
+    """
+    parities = [0] * len(wire_order)
+    for (parity_nr, question_nr) in enumerate(wire_order):
+        parities[question_nr] = (message[1 + (parity_nr >> 3)] >> (parity_nr & 7)) & 1
+    return parities
@@ -0,0 +1,166 @@
+import asyncio
+import socket
+import struct
+
+from cascade.mock_classical_channel import MockClassicalChannel
+from cascade import parity_protocol
+from cascade.shuffle import Shuffle
+
+class ParityServer:
+    """
+    Alice's side of the classical channel: a server that answers the parity questions of any
+    number of concurrent Bobs (one reconciliation session per connection at a time) over TCP or
+    Unix domain sockets, in a single asyncio event loop. The correct keys are loaded from a key
+    store, and the shuffles are reconstructed from the shuffle identifiers in the questions.
+    """
+
+    def __init__(self, key_store):
+        """
+        Create a parity server.
+
+        Args:
+            key_store (KeyStore): The key store with Alice's correct keys.
+        """
+        self._key_store = key_store
+        self._server = None
+        self._session_count = 0
+        self._active_session_count = 0
+        self._ask_message_count = 0
+
+    async def start(self, address):
+        """
+        Start accepting connections.
+
+        Args:
+            address (tuple or str): The address to listen on: a tuple (host, port) for TCP, or the
+                path of a Unix domain socket. Port 0 means choose a free port.
+
+        Returns:
+            The address that the server listens on, in the same format; for TCP, the port is the
+            actual port.
+        """
+        if isinstance(address, str):
+            self._server = await asyncio.start_unix_server(self._handle_connection, address)
+            return address
+        self._server = await asyncio.start_server(self._handle_connection, *address)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """
+        Keep accepting connections until the server is closed.
+        """
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stop accepting connections.
+        """
+        self._server.close()
+        await self._server.wait_closed()
+
+    def get_session_count(self):
+        """
+        Get the number of reconciliation sessions that were started.
+
+        Returns:
+            The number of sessions.
+        """
+        return self._session_count
+
+    def get_active_session_count(self):
+        """
+        Get the number of reconciliation sessions that were started but not yet ended.
+
+        Returns:
+            The number of active sessions.
+        """
+        return self._active_session_count
+
+    def get_ask_message_count(self):
+        """
+        Get the number of parity questions messages that were answered.
+
+        Returns:
+            The number of messages.
+        """
+        return self._ask_message_count
+
+    async def _handle_connection(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # The session of the current reconciliation: it computes the parities of the correct key,
+        # and caches the shuffles and the parity indexes for the reconciliation.
+        session = None
+        key_size = None
+        try:
+            while True:
+                try:
+                    (message_size,) = parity_protocol.FRAME_HEADER.unpack(
+                        await reader.readexactly(parity_protocol.FRAME_HEADER.size))
+                    if message_size > parity_protocol.MAX_MESSAGE_SIZE:
+                        break
+                    message = await reader.readexactly(message_size)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                try:
+                    message_type = parity_protocol.get_message_type(message)
+                    if message_type == parity_protocol.MESSAGE_START:
+                        key_number = parity_protocol.decode_start(message)
+                    elif message_type == parity_protocol.MESSAGE_ASK:
+                        questions = parity_protocol.decode_ask(message)
+                except (IndexError, ValueError, struct.error):
+                    # A truncated or otherwise malformed message: drop the connection.
+                    break
+                if message_type == parity_protocol.MESSAGE_START:
+                    if session is not None:
+                        self._end_session(session)
+                        session = None
+                    if not 0 <= key_number < self._key_store.get_key_count():
+                        break
+                    key = self._key_store.get_key(key_number)
+                    key_size = key.get_size()
+                    session = MockClassicalChannel(key)
+                    session.start_reconciliation()
+                    self._session_count += 1
+                    self._active_session_count += 1
+                elif message_type == parity_protocol.MESSAGE_END and session is not None:
+                    self._end_session(session)
+                    session = None
+                elif message_type == parity_protocol.MESSAGE_ASK and session is not None:
+                    if not self._are_valid_questions(questions, key_size):
+                        # A protocol error: drop the connection.
+                        break
+                    parities = session.ask_parities_by_identifier(questions)
+                    self._ask_message_count += 1
+                    writer.write(parity_protocol.encode_frame(
+                        parity_protocol.encode_reply(parities)))
+                    await writer.drain()
+                else:
+                    # A protocol error: drop the connection.
+                    break
+        finally:
+            if session is not None:
+                self._end_session(session)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _are_valid_questions(questions, key_size):
+        # Bob must only ask about ranges of at least one bit within shuffles of the key.
+        valid_identifiers = set()
+        for (identifier, shuffle_start_index, shuffle_end_index) in questions:
+            if not 0 <= shuffle_start_index < shuffle_end_index <= key_size:
+                return False
+            if identifier not in valid_identifiers:
+                if not Shuffle.is_valid_identifier(identifier, key_size):
+                    return False
+                valid_identifiers.add(identifier)
+        return True
+
+    def _end_session(self, session):
+        session.end_reconciliation()
+        self._active_session_count -= 1
@@ -1,9 +1,17 @@
 import copy
-import heapq
 import math
 import time
+from bisect import bisect_right
+from cascade.async_classical_channel import AsyncClassicalChannel
 from cascade.block import Block
+from cascade.block_pool import BlockPool
+from cascade.block_tree import BlockTree
+from cascade.bucket_queue import BucketQueue
 from cascade.algorithm import get_algorithm_by_name
+from cascade import parity_protocol
+from cascade.parity_index import ParityIndex
+from cascade.parity_inference import ParityInference
+from cascade.reconciliation_plan import ReconciliationPlan
 from cascade.shuffle import Shuffle
 from cascade.stats import Stats
 
@@ -12,17 +20,62 @@ class Reconciliation:
     A single information reconciliation exchange between a client (Bob) and a server (Alice).
     """
 
-    def __init__(self, algorithm_name, classical_channel, noisy_key, estimated_bit_error_rate):
+    BLOCK_OBJECTS = "objects"
+    """Represent every block as a separate Block object."""
+    BLOCK_TREES = "trees"
+    """Represent the blocks of each iteration as a BlockTree, i.e. in arrays indexed by node."""
+    BLOCK_REPRESENTATIONS = [BLOCK_OBJECTS, BLOCK_TREES]
+
+    ENGINE_REFERENCE = "reference"
+    """The reference engine: Block objects."""
+    ENGINE_ARRAY = "array"
+    """The array-backed engine: BlockTree arrays."""
+    ENGINES = {
+        ENGINE_REFERENCE: BLOCK_OBJECTS,
+        ENGINE_ARRAY: BLOCK_TREES,
+    }
+    """The engines, by name, with their block_representation."""
+
+    NOISY_KEY_COPY = "copy"
+    """Reconcile a deep copy of the noisy key; the noisy key is not changed."""
+    NOISY_KEY_IN_PLACE = "in-place"
+    """Reconcile the noisy key itself; the noisy key is changed into the reconciled key."""
+    NOISY_KEY_COPY_ON_WRITE = "copy-on-write"
+    """Reconcile a copy of the noisy key that shares its bits until the first correction."""
+    NOISY_KEY_MODES = [NOISY_KEY_COPY, NOISY_KEY_IN_PLACE, NOISY_KEY_COPY_ON_WRITE]
+
+    def __init__(self, algorithm_name, classical_channel, noisy_key, estimated_bit_error_rate,
+                 shuffle_algorithm=Shuffle.SHUFFLE_RANDOM, block_representation=BLOCK_OBJECTS,
+                 measure_block_memory=False, engine=None,
+                 noisy_key_mode=NOISY_KEY_COPY):
         """
         Create a Cascade reconciliation.
 
         Args:
             algorithm_name (str): The name of the Cascade algorithm.
-            classical_channel (subclass of ClassicalChannel): The classical channel over which
-                Bob communicates with Alice.
+            classical_channel (subclass of ClassicalChannel or AsyncClassicalChannel): The
+                classical channel over which Bob communicates with Alice. An AsyncClassicalChannel
+                can only be used with reconcile_async.
             noisy_key (Key): The noisy key as Bob received it from Alice that needs to be
                 reconciliated.
             estimated_bit_error_rate (float): The estimated bit error rate in the noisy key.
+            shuffle_algorithm (int): The shuffle algorithm for the random shuffles, i.e. the
+                shuffles in all normal iterations except the first one, and in all BICONF
+                iterations. Alice reconstructs the shuffles from the shuffle identifiers, so she
+                does not need to know which algorithm Bob chose.
+            block_representation (str): How to represent the blocks: BLOCK_OBJECTS or BLOCK_TREES.
+                Both representations give exactly the same results. BLOCK_TREES usually uses less
+                memory; set measure_block_memory to compare them for a given case.
+            measure_block_memory (bool): Measure how much memory the blocks of each iteration use,
+                and report it in the stats. This walks all blocks after each iteration, so it is
+                disabled by default.
+            engine (str): The name of the engine, i.e. one of the keys of ENGINES. If given, the
+                engine determines block_representation. All engines send exactly the same
+                messages to Alice and produce the same reconciled key.
+            noisy_key_mode (str): What to reconcile: a copy of the noisy key (NOISY_KEY_COPY), the
+                noisy key itself (NOISY_KEY_IN_PLACE), which avoids copying it for callers that
+                don't need the noisy key anymore, or a copy that only copies the bits when the
+                first error is corrected (NOISY_KEY_COPY_ON_WRITE).
         """
 
         # Store the arguments.
@@ -30,33 +83,144 @@ class Reconciliation:
         self._algorithm = get_algorithm_by_name(algorithm_name)
         assert self._algorithm is not None
         self._estimated_bit_error_rate = estimated_bit_error_rate
+        self._shuffle_algorithm = shuffle_algorithm
+        if engine is not None:
+            assert engine in self.ENGINES
+            block_representation = self.ENGINES[engine]
+        assert block_representation in self.BLOCK_REPRESENTATIONS
+        self._block_representation = block_representation
+        self._measure_block_memory = measure_block_memory
+        assert noisy_key_mode in self.NOISY_KEY_MODES
+        self._noisy_key_mode = noisy_key_mode
         self._noisy_key = noisy_key
         self._reconciled_key = None
 
-        # Map key indexes to blocks.
-        self._key_index_to_blocks = {}
+        # The block sizes and block layouts only depend on the algorithm, the key size, and the
+        # estimated bit error rate, so they are shared with other reconciliations.
+        self._plan = ReconciliationPlan.get_plan(self._algorithm, noisy_key.get_size(),
+                                                 estimated_bit_error_rate)
+
+        # The top-level blocks of each normal cascade iteration, as a list of tuples (shuffle,
+        # block_size, blocks). Every block that contains a given key index can be found from these
+        # without having to store anything per key index: the top-level block is at position
+        # shuffle_index // block_size, and the sub-blocks are found by descending from there.
+        self._iterations_blocks = []
+
+        # If the algorithm prefetches the correct parities of the top-level blocks, the top-level
+        # blocks of the normal iterations that have not started yet, in the same format.
+        self._prefetched_iterations_blocks = []
+
+        # The shuffles for which we added a parity index to the reconciled key.
+        self._parity_index_shuffles = []
+
+        # The shuffles of cascading BICONF iterations that will get a parity index as soon as
+        # BINARY descends into one of their blocks, by shuffle identifier.
+        self._lazy_parity_index_shuffles = {}
+
+        # The top-level blocks of each BICONF iteration, as a list of tuples (shuffle,
+        # top_block_boundaries, blocks), but only if the algorithm cascades during BICONF
+        # iterations. Just like for the normal iterations, the blocks that contain a given key index
+        # are found through the shuffle instead of registering the blocks for every key index.
+        self._biconf_iterations_blocks = []
+
+        # The number of blocks (including sub-blocks) that are in use.
+        self._live_blocks = 0
 
         # Keep track of statistics.
         self.stats = Stats()
 
+        # The Block objects are created from a pool, so that they can be reused by the next
+        # reconciliation after a reset. Block trees don't need a pool: they only use a few arrays.
+        if self._block_representation == self.BLOCK_OBJECTS:
+            self._block_pool = BlockPool()
+        else:
+            self._block_pool = None
+
         # A set of blocks that are suspected to contain an error, pending to be corrected later.
-        # These are stored as a priority queue with items (block.size, block) so that we can correct
-        # the pending blocks in order of shortest block first.
-        self._pending_try_correct = []
+        # These are stored in a bucket queue so that we can correct the pending blocks in order of
+        # shortest block first (and in the order in which they were scheduled for equal sizes).
+        self._pending_try_correct = BucketQueue()
 
         # A set of blocks for which we have to ask Alice for the correct parity. To minimize the
         # number of message that Bob sends to Alice (i.e. the number of channel uses), we queue up
         # these pending parity questions until we can make no more progress correcting errors. Then
         # we send a single message to Alice to ask all queued parity questions, and proceed once we
         # get the answers.
-        self._pending_ask_correct_parity = []
+        #
+        # Each parity question is only asked once per message, even if several pending blocks need
+        # its answer: the questions are kept in a dict that maps (shuffle_identifier,
+        # shuffle_start_index, shuffle_end_index) to the question number, i.e. the index in the
+        # list of blocks that we ask about. The pending blocks, their correct_right_sibling flags,
+        # the number of the question that answers them, and the value to XOR with that answer
+        # (see _schedule_ask_correct_parity) are kept in separate lists in the same order, so that
+        # no entry objects have to be created.
+        self._pending_ask_questions = {}
+        self._pending_ask_blocks = []
+        self._pending_answer_blocks = []
+        self._pending_answer_flags = []
+        self._pending_answer_question_nrs = []
+        self._pending_answer_xors = []
+
+        # The blocks whose correct parity is asked before it is needed, and the number of the
+        # question that answers them: the top-level blocks of later normal iterations, whose
+        # correct parity is asked in the same message as the top-level blocks of the first normal
+        # iteration, and the sub-blocks that are asked speculatively by BINARY. Their correct
+        # parity is only recorded, they are not corrected until they are needed.
+        self._pending_prefetch_blocks = []
+        self._pending_prefetch_question_nrs = []
+
+        # The correct parity of the whole key, once we know it (it is the XOR of the correct
+        # parities of the top-level blocks of the first normal iteration).
+        self._correct_key_parity = None
+
+        # If the algorithm does block parity inference, all parities that Alice revealed, to infer
+        # the correct parities of other blocks from.
+        self._parity_inference = None
+
+    def reset(self, noisy_key, estimated_bit_error_rate, classical_channel=None):
+        """
+        Prepare for a new reconciliation of another noisy key, with the same algorithm and options.
+        This reuses the queues, the registries, and the Block objects of the previous
+        reconciliation, instead of creating a new Reconciliation object for every key.
+
+        The blocks of the previous reconciliation must not be used anymore. The reconciled key and
+        the stats of the previous reconciliation are not affected: the next reconciliation creates
+        new ones.
+
+        Args:
+            noisy_key (Key): The noisy key as Bob received it from Alice that needs to be
+                reconciliated.
+            estimated_bit_error_rate (float): The estimated bit error rate in the noisy key.
+            classical_channel (subclass of ClassicalChannel or AsyncClassicalChannel): The
+                classical channel over which Bob communicates with Alice. None means keep using the
+                same classical channel.
+        """
+        if classical_channel is not None:
+            self._classical_channel = classical_channel
+        self._estimated_bit_error_rate = estimated_bit_error_rate
+        self._noisy_key = noisy_key
+        self._reconciled_key = None
+        self._plan = ReconciliationPlan.get_plan(self._algorithm, noisy_key.get_size(),
+                                                 estimated_bit_error_rate)
+        # The blocks of the previous reconciliation are normally already released at the end of
+        # the reconciliation, but not if it was interrupted.
+        self._prune_all_blocks()
+        self._parity_index_shuffles.clear()
+        self._lazy_parity_index_shuffles.clear()
+        self.stats = Stats()
+        self._live_blocks = 0
+        self._pending_try_correct.clear()
+        self._clear_pending_ask_correct_parity()
+        self._correct_key_parity = None
+        self._parity_inference = None
 
     def get_noisy_key(self):
         """
         Get the noisy key, as Bob received it from Alice, that needs to be reconciled.
 
         Returns:
-            The noisy key.
+            The noisy key. In NOISY_KEY_IN_PLACE mode, this is the same key object as the
+            reconciled key, so after the reconciliation it contains the reconciled bits.
         """
         return self._noisy_key
 
@@ -76,29 +240,85 @@ class Reconciliation:
         Run the Cascade algorithm to reconciliate our ("Bob's") noisy key with the server's
         ("Alice's") correct key.
 
+        The classical channel must be a ClassicalChannel; use reconcile_async for an
+        AsyncClassicalChannel.
+
         Returns:
             The reconciled key. There is still a small but non-zero chance that the corrected key
             still contains errors.
         """
+        assert not isinstance(self._classical_channel, AsyncClassicalChannel)
+        # With a synchronous classical channel the reconciliation coroutine never waits for
+        # anything, so it runs to completion in a single step, without an event loop.
+        coroutine = self._reconcile()
+        try:
+            coroutine.send(None)
+        except StopIteration as stop:
+            return stop.value
+        coroutine.close()
+        raise RuntimeError("reconciliation was suspended by a synchronous classical channel")
+
+    async def reconcile_async(self):
+        """
+        Run the Cascade algorithm to reconciliate our ("Bob's") noisy key with the server's
+        ("Alice's") correct key, as a coroutine that awaits the answers from Alice. Any number of
+        reconciliations (each with its own Reconciliation object) can run concurrently in the same
+        event loop.
+
+        The classical channel may be a ClassicalChannel or an AsyncClassicalChannel, but only an
+        AsyncClassicalChannel lets other tasks run while Bob waits for Alice. Note that the
+        elapsed process time in the stats includes the time that other tasks ran in the meantime.
+
+        Returns:
+            The reconciled key. There is still a small but non-zero chance that the corrected key
+            still contains errors.
+        """
+        return await self._reconcile()
+
+    async def _reconcile(self):
 
         # Start measuring process and real time.
         start_process_time = time.process_time()
         start_real_time = time.perf_counter()
 
-        # Make a deep copy of the key, so that we continue to have access to the original noisy key.
-        self._reconciled_key = copy.deepcopy(self._noisy_key)
+        # Unless we were asked to reconcile the noisy key in place, make a copy of the key, so that
+        # we continue to have access to the original noisy key.
+        if self._noisy_key_mode == self.NOISY_KEY_IN_PLACE:
+            self._reconciled_key = self._noisy_key
+        elif self._noisy_key_mode == self.NOISY_KEY_COPY_ON_WRITE:
+            self._reconciled_key = self._noisy_key.copy_on_write()
+        else:
+            self._reconciled_key = copy.deepcopy(self._noisy_key)
+
+        if self._algorithm.block_parity_inference:
+            self._parity_inference = ParityInference(self._reconciled_key.get_size())
 
         # Inform Alice that we are starting a new reconciliation.
-        self._classical_channel.start_reconciliation()
+        if isinstance(self._classical_channel, AsyncClassicalChannel):
+            await self._classical_channel.start_reconciliation()
+        else:
+            self._classical_channel.start_reconciliation()
 
         # Do as many normal Cascade iterations as demanded by this particular Cascade algorithm.
-        self._all_normal_cascade_iterations()
+        await self._all_normal_cascade_iterations()
 
         # Do as many normal BICONF iterations as demanded by this particular Cascade algorithm.
-        self._all_biconf_iterations()
+        await self._all_biconf_iterations()
 
         # Inform Alice that we have finished the reconciliation.
-        self._classical_channel.end_reconciliation()
+        if isinstance(self._classical_channel, AsyncClassicalChannel):
+            await self._classical_channel.end_reconciliation()
+        else:
+            self._classical_channel.end_reconciliation()
+
+        # The parity indexes and the blocks are not needed anymore.
+        self._remove_parity_indexes()
+        self._prune_all_blocks()
+
+        # Record the cost of block parity inference.
+        if self._parity_inference is not None:
+            self.stats.parity_inference_equations = self._parity_inference.get_equation_count()
+            self.stats.parity_inference_steps = self._parity_inference.get_step_count()
 
         # Compute elapsed time.
         self.stats.elapsed_process_time = time.process_time() - start_process_time
@@ -117,17 +337,49 @@ class Reconciliation:
         # Return the probably, but not surely, corrected key.
         return self._reconciled_key
 
-    def _register_block_key_indexes(self, block):
-        # For every key bit covered by the block, append the block to the list of blocks that depend
-        # on that partial key bit.
-        for key_index in block.get_key_indexes():
-            if key_index in self._key_index_to_blocks:
-                self._key_index_to_blocks[key_index].append(block)
-            else:
-                self._key_index_to_blocks[key_index] = [block]
+    def _add_parity_index(self, shuffle):
+        # Building a parity index for an implicit shuffle computes the permutation for every bit,
+        # which defeats the purpose of not storing the permutation.
+        if shuffle.is_implicit():
+            return
+        self._reconciled_key.add_parity_index(ParityIndex(self._reconciled_key, shuffle))
+        self._parity_index_shuffles.append(shuffle)
+
+    def _remove_parity_indexes(self):
+        # Only remove the parity indexes that we added ourselves.
+        for shuffle in self._parity_index_shuffles:
+            self._reconciled_key.remove_parity_index(shuffle)
+        self._parity_index_shuffles = []
+        self._lazy_parity_index_shuffles = {}
+
+    def _add_lazy_parity_index(self, shuffle):
+        # Add the parity index for a shuffle that was registered for a lazy parity index, if it
+        # has not been added yet.
+        shuffle = self._lazy_parity_index_shuffles.pop(shuffle.get_identifier(), None)
+        if shuffle is not None:
+            self._add_parity_index(shuffle)
 
     def _get_blocks_containing_key_index(self, key_index):
-        return self._key_index_to_blocks.get(key_index, [])
+        blocks = []
+        for (shuffle, block_size, top_blocks) in self._iterations_blocks:
+            shuffle_index = shuffle.get_shuffle_index(key_index)
+            block = top_blocks[shuffle_index // block_size]
+            self._add_block_and_sub_blocks_containing(blocks, block, shuffle_index)
+        for (shuffle, top_block_boundaries, top_blocks) in self._biconf_iterations_blocks:
+            # The top-level blocks of a BICONF iteration don't necessarily cover the whole key.
+            shuffle_index = shuffle.get_shuffle_index(key_index)
+            top_block_nr = bisect_right(top_block_boundaries, shuffle_index) - 1
+            if top_block_nr < len(top_blocks):
+                block = top_blocks[top_block_nr]
+                self._add_block_and_sub_blocks_containing(blocks, block, shuffle_index)
+        return blocks
+
+    @staticmethod
+    def _add_block_and_sub_blocks_containing(blocks, block, shuffle_index):
+        # Add the block, and all of its (existing) sub-blocks that contain the shuffle index.
+        while block is not None:
+            blocks.append(block)
+            block = block.get_sub_block_containing(shuffle_index)
 
     def _correct_parity_is_known_or_can_be_inferred(self, block):
 
@@ -168,78 +420,191 @@ class Reconciliation:
         self.stats.infer_parity_blocks += 1
         return True
 
-    def _schedule_ask_correct_parity(self, block, correct_right_sibling):
-        # Adding an item to the end (not the start!) of a list is an efficient O(1) operation.
-        entry = (block, correct_right_sibling)
-        self._pending_ask_correct_parity.append(entry)
+    def _schedule_ask_correct_parity(self, block, correct_right_sibling, parity_block=None,
+                                     parity_xor=0):
+        # Schedule asking Alice for the correct parity of parity_block (the block itself by
+        # default). The correct parity of the block is that answer XOR parity_xor. Don't ask a
+        # question that is already pending, but use the answer to that question.
+        if parity_block is None:
+            parity_block = block
+        question = (parity_block.get_shuffle().get_identifier(), parity_block.get_start_index(),
+                    parity_block.get_end_index())
+        # Don't ask at all if the correct parity is implied by the parities that Alice revealed.
+        if self._parity_inference is not None and parity_block is block:
+            correct_parity = self._parity_inference.get_parity(*question)
+            if correct_parity is not None:
+                block.set_correct_parity(correct_parity)
+                self.stats.infer_parity_blocks += 1
+                self._schedule_try_correct(block, correct_right_sibling)
+                return
+        question_nr = self._pending_ask_questions.get(question)
+        if question_nr is None:
+            question_nr = len(self._pending_ask_blocks)
+            self._pending_ask_questions[question] = question_nr
+            # Adding an item to the end (not the start!) of a list is an efficient O(1) operation.
+            self._pending_ask_blocks.append(parity_block)
+        elif parity_block is block:
+            self.stats.ask_parity_cache_hits += 1
+        self._pending_answer_blocks.append(block)
+        self._pending_answer_flags.append(correct_right_sibling)
+        self._pending_answer_question_nrs.append(question_nr)
+        self._pending_answer_xors.append(parity_xor)
+
+    def _schedule_prefetch_correct_parity(self, block):
+        # Schedule asking Alice for the correct parity of a block before it is needed. Only record
+        # the answer, don't try to correct the block yet.
+        question = (block.get_shuffle().get_identifier(), block.get_start_index(),
+                    block.get_end_index())
+        if question in self._pending_ask_questions:
+            return False
+        question_nr = len(self._pending_ask_blocks)
+        self._pending_ask_questions[question] = question_nr
+        self._pending_ask_blocks.append(block)
+        self._pending_prefetch_blocks.append(block)
+        self._pending_prefetch_question_nrs.append(question_nr)
+        return True
 
-    def _have_pending_ask_correct_parity(self):
-        return self._pending_ask_correct_parity != []
+    def _schedule_speculative_asks(self, block):
+        # BINARY is about to ask for the correct parity of a left sub-block. Whatever the answer
+        # is, the bisection continues in the block or in its right sibling, and then in the left or
+        # the right sub-block of that block, etc. Ask for the correct parities of the left
+        # sub-blocks of all of those blocks in the next levels as well, so that BINARY can descend
+        # that many levels without asking Alice again. The correct parities of right sub-blocks
+        # are inferred from their parent and their sibling, so they never have to be asked.
+        parent_block = block.get_parent_block()
+        right_sibling_block = parent_block.get_right_sub_block()
+        if right_sibling_block is None:
+            right_sibling_block = parent_block.create_right_sub_block()
+            self._new_sub_block(right_sibling_block)
+        level_blocks = [block, right_sibling_block]
+        for _ in range(self._algorithm.binary_speculation_depth - 1):
+            next_level_blocks = []
+            for level_block in level_blocks:
+                if level_block.get_size() < 2:
+                    continue
+                left_sub_block = level_block.get_left_sub_block()
+                if left_sub_block is None:
+                    left_sub_block = level_block.create_left_sub_block()
+                    self._new_sub_block(left_sub_block)
+                right_sub_block = level_block.get_right_sub_block()
+                if right_sub_block is None:
+                    right_sub_block = level_block.create_right_sub_block()
+                    self._new_sub_block(right_sub_block)
+                if left_sub_block.get_correct_parity() is None and \
+                   self._schedule_prefetch_correct_parity(left_sub_block):
+                    self.stats.speculative_ask_parity_blocks += 1
+                next_level_blocks.append(left_sub_block)
+                next_level_blocks.append(right_sub_block)
+            level_blocks = next_level_blocks
 
-    @staticmethod
-    def _bits_in_int(int_value):
-        bits = 0
-        while int_value != 0:
-            bits += 1
-            int_value //= 2
-        if bits == 0:
-            bits = 1
-        return bits
+    def _have_pending_ask_correct_parity(self):
+        return self._pending_ask_blocks != []
 
-    @staticmethod
-    def _bits_in_block_ask_parity(block):
-        shuffle_identifier = block.get_shuffle().get_identifier()
-        shuffle_start_index = block.get_start_index()
-        shuffle_end_index = block.get_end_index()
-        return Reconciliation._bits_in_int(shuffle_identifier) + \
-               Reconciliation._bits_in_int(shuffle_start_index) + \
-               Reconciliation._bits_in_int(shuffle_end_index)
+    def _clear_pending_ask_correct_parity(self):
+        self._pending_ask_questions.clear()
+        self._pending_ask_blocks.clear()
+        self._pending_answer_blocks.clear()
+        self._pending_answer_flags.clear()
+        self._pending_answer_question_nrs.clear()
+        self._pending_answer_xors.clear()
+        self._pending_prefetch_blocks.clear()
+        self._pending_prefetch_question_nrs.clear()
 
-    def _service_pending_ask_correct_parity(self):
+    async def _service_pending_ask_correct_parity(self):
 
-        if not self._pending_ask_correct_parity:
+        if not self._pending_ask_blocks:
             return
 
         # Prepare the question for Alice, i.e. the list of shuffle ranges over which we want Alice
-        # to compute the correct parity.
-        ask_parity_blocks = []
-        for entry in self._pending_ask_correct_parity:
-            (block, _correct_right_sibling) = entry
-            ask_parity_blocks.append(block)
-            self.stats.ask_parity_bits += self._bits_in_block_ask_parity(block)
+        # to compute the correct parity. Leave out the ranges whose correct parity is implied by
+        # the answers to the other ones.
+        ask_parity_blocks = self._pending_ask_blocks
+        questions = list(self._pending_ask_questions)
+        implied_questions = None
+        if self._parity_inference is not None:
+            implied_questions = self._parity_inference.get_implied_questions(questions)
+            if any(implied_questions):
+                ask_parity_blocks = [block for (block, implied) in
+                                     zip(ask_parity_blocks, implied_questions) if not implied]
+                questions = [question for (question, implied) in
+                             zip(questions, implied_questions) if not implied]
+            else:
+                implied_questions = None
 
         # "Send a message" to Alice to ask her to compute the correct parities for the list that
-        # we prepared. For now, this is a synchronous blocking operations (i.e. we block here
-        # until we get the answer from Alice).
+        # we prepared. With a synchronous classical channel, we block here until we get the
+        # answer from Alice; with an asynchronous one, other tasks run until the answer arrives.
         self.stats.ask_parity_messages += 1
         self.stats.ask_parity_blocks += len(ask_parity_blocks)
-        correct_parities = self._classical_channel.ask_parities(ask_parity_blocks)
+        if isinstance(self._classical_channel, AsyncClassicalChannel):
+            correct_parities = await self._classical_channel.ask_parities(ask_parity_blocks)
+        else:
+            correct_parities = self._classical_channel.ask_parities(ask_parity_blocks)
+
+        # Count the bits that the question and the answer take in the compact wire encoding (see
+        # parity_protocol), whichever classical channel is used. A channel that encodes the
+        # messages reports their sizes; otherwise, compute what they would have been.
+        message_sizes = self._classical_channel.get_last_message_sizes()
+        if message_sizes is None:
+            message_sizes = (len(parity_protocol.encode_ask(questions)),
+                             parity_protocol.get_reply_size(len(correct_parities)))
+        self.stats.ask_parity_bits += 8 * message_sizes[0]
+        self.stats.reply_parity_bits += 8 * message_sizes[1]
 
         # Process the answer from Alice. IMPORTANT: Alice is required to send the list of parities
-        # in the exact same order as the ranges in the question; this allows us to zip.
-        for (correct_parity, entry) in zip(correct_parities, self._pending_ask_correct_parity):
-            self.stats.reply_parity_bits += 1
-            (block, correct_right_sibling) = entry
-            block.set_correct_parity(correct_parity)
+        # in the exact same order as the ranges in the question; this allows us to look up the
+        # answer by question number.
+        if self._parity_inference is not None:
+            correct_parities = self._add_revealed_parities(correct_parities, implied_questions)
+        for (block, correct_right_sibling, question_nr, parity_xor) in \
+                zip(self._pending_answer_blocks, self._pending_answer_flags,
+                    self._pending_answer_question_nrs, self._pending_answer_xors):
+            block.set_correct_parity(correct_parities[question_nr] ^ parity_xor)
             self._schedule_try_correct(block, correct_right_sibling)
+        for (block, question_nr) in zip(self._pending_prefetch_blocks,
+                                        self._pending_prefetch_question_nrs):
+            block.set_correct_parity(correct_parities[question_nr])
 
         # Clear the list of pending questions.
-        self._pending_ask_correct_parity = []
+        self._clear_pending_ask_correct_parity()
+
+    def _add_revealed_parities(self, correct_parities, implied_questions):
+        # Add the correct parities that Alice revealed to the parity inference, and infer the
+        # correct parities of the questions that were not asked because they were implied. Return
+        # the correct parities of all pending questions, in question number order.
+        questions = list(self._pending_ask_questions)
+        if implied_questions is None:
+            for (question, correct_parity) in zip(questions, correct_parities):
+                self._parity_inference.add_parity(*question, correct_parity)
+            return correct_parities
+        all_correct_parities = []
+        answers = iter(correct_parities)
+        for (question, implied) in zip(questions, implied_questions):
+            if implied:
+                all_correct_parities.append(None)
+            else:
+                correct_parity = next(answers)
+                self._parity_inference.add_parity(*question, correct_parity)
+                all_correct_parities.append(correct_parity)
+        for (question_nr, implied) in enumerate(implied_questions):
+            if implied:
+                all_correct_parities[question_nr] = self._parity_inference.get_parity(
+                    *questions[question_nr])
+                self.stats.infer_parity_blocks += 1
+        return all_correct_parities
 
     def _schedule_try_correct(self, block, correct_right_sibling):
-        # Push the error block onto the heap. It is pushed as a tuple (block.size, block) to allow
-        # us to correct the error blocks in order of shortest blocks first.
-        entry = (block, correct_right_sibling)
-        heapq.heappush(self._pending_try_correct, (block.get_size(), entry))
+        # Push the error block onto the bucket queue, which allows us to correct the error blocks in
+        # order of shortest blocks first.
+        self._pending_try_correct.push(block, correct_right_sibling)
 
     def _have_pending_try_correct(self):
-        return self._pending_try_correct != []
+        return len(self._pending_try_correct) > 0
 
     def _service_pending_try_correct(self, cascade):
         errors_corrected = 0
         while self._pending_try_correct:
-            (_, entry) = heapq.heappop(self._pending_try_correct)
-            (block, correct_right_sibling) = entry
+            (block, correct_right_sibling) = self._pending_try_correct.pop()
             errors_corrected += self._try_correct(block, correct_right_sibling, cascade)
         return errors_corrected
 
@@ -253,45 +618,87 @@ class Reconciliation:
             efficiency = None
         return efficiency
 
-    def _all_normal_cascade_iterations(self):
+    async def _all_normal_cascade_iterations(self):
+        # If the algorithm wants it, create the shuffles and top-level blocks of all later normal
+        # iterations up front, so that their correct parities can be asked in the first message.
+        if self._algorithm.prefetch_top_block_parities:
+            for iteration_nr in range(2, self._algorithm.cascade_iterations+1):
+                self._prefetched_iterations_blocks.append(
+                    self._create_normal_iteration_blocks(iteration_nr))
         for iteration_nr in range(1, self._algorithm.cascade_iterations+1):
-            self._one_normal_cascade_iteration(iteration_nr)
-
-    def _one_normal_cascade_iteration(self, iteration_nr):
-
-        self.stats.normal_iterations += 1
+            await self._one_normal_cascade_iteration(iteration_nr)
 
-        # Determine the block size to be used for this iteration, using the rules for this
-        # particular algorithm of the Cascade algorithm.
-        block_size = self._algorithm.block_size_function(self._estimated_bit_error_rate,
-                                                         self._reconciled_key.get_size(),
-                                                         iteration_nr)
+    def _create_normal_iteration_blocks(self, iteration_nr):
+        # The plan contains the block size to be used for this iteration, determined using the
+        # rules for this particular algorithm of the Cascade algorithm.
+        block_size = self._plan.get_block_size(iteration_nr)
 
         # In the first iteration, we don't shuffle the key. In all subsequent iterations we
         # shuffle the key, using a different random shuffling in each iteration.
         if iteration_nr == 1:
-            shuffle = Shuffle(self._reconciled_key.get_size(), Shuffle.SHUFFLE_KEEP_SAME)
+            shuffle = self._plan.get_identity_shuffle()
         else:
-            shuffle = Shuffle(self._reconciled_key.get_size(), Shuffle.SHUFFLE_RANDOM)
+            shuffle = Shuffle(self._reconciled_key.get_size(), self._shuffle_algorithm)
+
+        # Index the parities of the shuffled key, so that we don't have to scan all bits in a
+        # block each time that we create a block or a sub-block.
+        self._add_parity_index(shuffle)
 
         # Split the shuffled key into blocks, using the block size that we chose.
-        blocks = Block.create_covering_blocks(self._reconciled_key, shuffle, block_size)
+        shuffle_ranges = self._plan.get_shuffle_ranges(iteration_nr)
+        if self._block_representation == self.BLOCK_TREES:
+            blocks = BlockTree.create_tree(self._reconciled_key, shuffle,
+                                           self._plan.get_top_block_boundaries(iteration_nr),
+                                           shuffle_ranges)
+        else:
+            blocks = self._block_pool.create_blocks(self._reconciled_key, shuffle, shuffle_ranges)
+        self._add_live_blocks(len(blocks))
+        return (shuffle, block_size, blocks)
 
-        # For each top-level covering block...
-        for block in blocks:
+    async def _one_normal_cascade_iteration(self, iteration_nr):
 
-            # Update the key index to block map.
-            self._register_block_key_indexes(block)
+        self.stats.normal_iterations += 1
 
+        # Keep track of the blocks in this iteration, so that we can find the blocks that are
+        # affected when we correct a bit.
+        if iteration_nr > 1 and self._prefetched_iterations_blocks:
+            iteration_blocks = self._prefetched_iterations_blocks.pop(0)
+        else:
+            iteration_blocks = self._create_normal_iteration_blocks(iteration_nr)
+        self._iterations_blocks.append(iteration_blocks)
+        blocks = iteration_blocks[2]
+
+        if blocks[0].get_correct_parity() is not None:
+            # The correct parities of the top-level blocks were prefetched in the first message, so
+            # we can try to correct them right away, without asking Alice first.
+            self.stats.prefetch_saved_messages += 1
+            for block in blocks:
+                self._schedule_try_correct(block, False)
+        else:
             # We won't be able to do anything with the top-level covering blocks until we know what
             # the correct parity it.
-            self._schedule_ask_correct_parity(block, False)
+            for block in blocks:
+                self._schedule_ask_correct_parity(block, False)
+            if iteration_nr == 1:
+                for (_shuffle, _block_size, prefetch_blocks) in self._prefetched_iterations_blocks:
+                    for block in prefetch_blocks:
+                        self._schedule_prefetch_correct_parity(block)
 
         # Service all pending correction attempts (including Cascaded ones) and ask parity
         # messages.
-        self._service_all_pending_work(True)
+        await self._service_all_pending_work(True)
 
-    def _service_all_pending_work(self, cascade):
+        # Now that we know the correct parities of the top-level blocks, we also know the correct
+        # parity of the whole key.
+        if self._correct_key_parity is None:
+            self._correct_key_parity = 0
+            for block in blocks:
+                self._correct_key_parity ^= block.get_correct_parity()
+
+        self._record_block_memory(blocks)
+        self.stats.live_blocks_per_iteration.append(self._live_blocks)
+
+    async def _service_all_pending_work(self, cascade):
 
         # Keep track of how many errors were actually corrected in this call.
         errors_corrected = 0
@@ -309,31 +716,32 @@ class Reconciliation:
             # list" in the above loop. When we get the answer from Alice, we may discover that the
             # block as an odd number of errors, in which case we add it back to the "pending error
             # block" priority queue.
-            self._service_pending_ask_correct_parity()
+            await self._service_pending_ask_correct_parity()
 
         return errors_corrected
 
-    def _all_biconf_iterations(self):
+    async def _all_biconf_iterations(self):
 
         # Do nothing if BICONF is disabled.
         if not self._algorithm.biconf_iterations:
             return
 
-        # If we are not cascading during BICONF, clear the key indexes to blocks map to avoid
-        # wasting time keeping it up to date as correct blocks during the BICONF phase.
+        # If we are not cascading during BICONF, forget the blocks of the normal iterations to
+        # avoid wasting time keeping them up to date as correct blocks during the BICONF phase.
         if not self._algorithm.biconf_cascade:
-            self._key_index_to_blocks = {}
+            self.stats.pruned_blocks += self._prune_iterations_blocks()
+            self._remove_parity_indexes()
 
         # Do the required number of BICONF iterations, as determined by the protocol.
         iterations_to_go = self._algorithm.biconf_iterations
         while iterations_to_go > 0:
-            errors_corrected = self._one_biconf_iteration()
+            errors_corrected = await self._one_biconf_iteration()
             if self._algorithm.biconf_error_free_streak and errors_corrected > 0:
                 iterations_to_go = self._algorithm.biconf_iterations
             else:
                 iterations_to_go -= 1
 
-    def _one_biconf_iteration(self):
+    async def _one_biconf_iteration(self):
 
         self.stats.biconf_iterations += 1
 
@@ -342,40 +750,120 @@ class Reconciliation:
         # Randomly select half of the bits in the key. This is exactly the same as doing a new
         # random shuffle of the key and selecting the first half of newly shuffled key.
         key_size = self._reconciled_key.get_size()
-        shuffle = Shuffle(key_size, Shuffle.SHUFFLE_RANDOM)
-        mid_index = key_size // 2
-        chosen_block = Block(self._reconciled_key, shuffle, 0, mid_index, None)
+        shuffle = Shuffle(key_size, self._shuffle_algorithm)
+        # If we are not cascading, the blocks for this shuffle are only split by BINARY, which
+        # scans about as many bits in total as building a parity index would. If we are cascading,
+        # only build the parity index once BINARY needs the sub-blocks: in most BICONF iterations
+        # the chosen block has an even number of errors, and no error is ever cascaded into it.
+        if cascade and not shuffle.is_implicit():
+            self._lazy_parity_index_shuffles[shuffle.get_identifier()] = shuffle
+        top_block_boundaries = self._plan.get_biconf_top_block_boundaries()
+        if self._block_representation == self.BLOCK_TREES:
+            blocks = BlockTree(self._reconciled_key, shuffle, top_block_boundaries)
+        else:
+            blocks = [self._block_pool.create_block(self._reconciled_key, shuffle, start_index,
+                                                    end_index, None)
+                      for (start_index, end_index)
+                      in zip(top_block_boundaries, top_block_boundaries[1:])]
+        self._count_new_blocks(len(blocks))
+        self._add_live_blocks(len(blocks))
+        chosen_block = blocks[0]
         if cascade:
-            self._register_block_key_indexes(chosen_block)
+            self._biconf_iterations_blocks.append((shuffle, top_block_boundaries, blocks))
 
         # Ask Alice what the correct parity of the chosen block is.
         self._schedule_ask_correct_parity(chosen_block, False)
 
         # If the algorithm wants it, also ask Alice what the correct parity of the complementary
-        # block is.
+        # block is. If we know the correct parity of the whole key, we don't have to ask: it is the
+        # correct parity of the chosen block XOR the correct parity of the whole key.
         if self._algorithm.biconf_correct_complement:
-            complement_block = Block(self._reconciled_key, shuffle, mid_index, key_size, None)
-            if cascade:
-                self._register_block_key_indexes(complement_block)
-            self._schedule_ask_correct_parity(complement_block, False)
+            complement_block = blocks[1]
+            if self._correct_key_parity is None:
+                self._schedule_ask_correct_parity(complement_block, False)
+            else:
+                self._schedule_ask_correct_parity(complement_block, False, chosen_block,
+                                                  self._correct_key_parity)
+                self.stats.biconf_derived_complement_parities += 1
 
         # Service all pending correction attempts (potentially including Cascaded ones) and ask
         # parity messages.
-        errors_corrected = self._service_all_pending_work(cascade)
+        errors_corrected = await self._service_all_pending_work(cascade)
+
+        self._record_block_memory(blocks)
+
+        # If we are not cascading, nothing can reach the blocks of this iteration anymore.
+        if not cascade:
+            self.stats.pruned_blocks += self._prune_blocks(blocks)
+        self.stats.live_blocks_per_iteration.append(self._live_blocks)
+
         return errors_corrected
 
+    def _add_live_blocks(self, nr_blocks):
+        self._live_blocks += nr_blocks
+        if self._live_blocks > self.stats.peak_live_blocks:
+            self.stats.peak_live_blocks = self._live_blocks
+
+    def _prune_blocks(self, blocks):
+        # Release the given top-level blocks and all of their sub-blocks, which can no longer be
+        # reached by the algorithm. Return the number of released blocks.
+        if isinstance(blocks, BlockTree):
+            nr_blocks = blocks.get_block_count()
+        else:
+            nr_blocks = self._block_pool.release_blocks(blocks)
+        self._live_blocks -= nr_blocks
+        return nr_blocks
+
+    def _prune_iterations_blocks(self):
+        nr_blocks = 0
+        for (_shuffle, _block_size, blocks) in self._iterations_blocks:
+            nr_blocks += self._prune_blocks(blocks)
+        self._iterations_blocks = []
+        for (_shuffle, _block_size, blocks) in self._prefetched_iterations_blocks:
+            nr_blocks += self._prune_blocks(blocks)
+        self._prefetched_iterations_blocks = []
+        return nr_blocks
+
+    def _prune_all_blocks(self):
+        self._prune_iterations_blocks()
+        for (_shuffle, _top_block_boundaries, blocks) in self._biconf_iterations_blocks:
+            self._prune_blocks(blocks)
+        self._biconf_iterations_blocks = []
+
+    def _record_block_memory(self, blocks):
+        # Record how much memory is used by all blocks (including sub-blocks) of one iteration.
+        if not self._measure_block_memory:
+            return
+        if isinstance(blocks, BlockTree):
+            memory_bytes = blocks.get_memory_bytes()
+        else:
+            memory_bytes = 0
+            todo_blocks = list(blocks)
+            while todo_blocks:
+                block = todo_blocks.pop()
+                memory_bytes += block.get_memory_bytes()
+                for sub_block in (block.get_left_sub_block(), block.get_right_sub_block()):
+                    if sub_block is not None:
+                        todo_blocks.append(sub_block)
+        self.stats.block_memory_bytes += memory_bytes
+        self.stats.block_memory_bytes_per_iteration.append(memory_bytes)
+
     def _try_correct(self, block, correct_right_sibling, cascade):
 
         # If we don't know the correct parity of the block, we cannot make progress on this block
         # until Alice has told us what the correct parity is.
         if not self._correct_parity_is_known_or_can_be_inferred(block):
             self._schedule_ask_correct_parity(block, correct_right_sibling)
+            # A left sub-block in BINARY: speculatively ask for the next levels as well, if the
+            # algorithm wants it.
+            if correct_right_sibling and self._algorithm.binary_speculation_depth > 1:
+                self._schedule_speculative_asks(block)
             return 0
 
         # If there is an even number of errors in this block, we don't attempt to fix any errors
         # in this block. But if asked to do so, we will attempt to fix an error in the right
         # sibling block.
-        if block.get_error_parity() == Block.ERRORS_EVEN:
+        if self._get_error_parity(block) == Block.ERRORS_EVEN:
             if correct_right_sibling:
                 return self._try_correct_right_sibling_block(block, cascade)
             return 0
@@ -393,8 +881,10 @@ class Reconciliation:
         # there, in the right sub-block alternatively.
         left_sub_block = block.get_left_sub_block()
         if  left_sub_block is None:
+            if self._lazy_parity_index_shuffles:
+                self._add_lazy_parity_index(block.get_shuffle())
             left_sub_block = block.create_left_sub_block()
-            self._register_block_key_indexes(left_sub_block)
+            self._new_sub_block(left_sub_block)
         return self._try_correct(left_sub_block, True, cascade)
 
     def _try_correct_right_sibling_block(self, block, cascade):
@@ -402,9 +892,29 @@ class Reconciliation:
         right_sibling_block = parent_block.get_right_sub_block()
         if right_sibling_block is None:
             right_sibling_block = parent_block.create_right_sub_block()
-            self._register_block_key_indexes(right_sibling_block)
+            self._new_sub_block(right_sibling_block)
         return self._try_correct(right_sibling_block, False, cascade)
 
+    def _count_new_blocks(self, nr_blocks):
+        # The current parity of a block is only calculated by scanning its bits when it is first
+        # needed. Every new block counts as an avoided parity scan, until _get_error_parity finds
+        # that its parity has to be scanned after all.
+        self.stats.avoided_parity_scans += nr_blocks
+
+    def _new_sub_block(self, sub_block):
+        # If possible, derive the current parity of a new sub-block as the parity of the parent
+        # block XOR the parity of the sibling block, so that its bits never need to be scanned.
+        self._count_new_blocks(1)
+        self._add_live_blocks(1)
+        sub_block.try_derive_current_parity()
+
+    def _get_error_parity(self, block):
+        # Getting the error parity scans the bits of the block if the correct parity is known but
+        # the current parity is not known yet.
+        if block.get_correct_parity() is not None and not block.is_current_parity_known():
+            self.stats.avoided_parity_scans -= 1
+        return block.get_error_parity()
+
     def _flip_key_bit_corresponding_to_single_bit_block(self, block, cascade):
 
         flipped_shuffle_index = block.get_start_index()
@@ -419,7 +929,12 @@ class Reconciliation:
             affected_block.flip_parity()
 
             # If asked to do cascading, do so for blocks with an odd number of errors.
-            if cascade and affected_block.get_error_parity() != Block.ERRORS_EVEN:
+            if cascade and self._get_error_parity(affected_block) != Block.ERRORS_EVEN:
                 # If sub_block_reuse is disabled, then only cascade top-level blocks.
                 if self._algorithm.sub_block_reuse or affected_block.is_top_block():
                     self._schedule_try_correct(affected_block, False)
+
+        # Keep the current parities of the prefetched top-level blocks of later iterations up to
+        # date, but don't cascade into them: their iteration has not started yet.
+        for (shuffle, block_size, top_blocks) in self._prefetched_iterations_blocks:
+            top_blocks[shuffle.get_shuffle_index(flipped_key_index) // block_size].flip_parity()
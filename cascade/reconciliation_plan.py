@@ -0,0 +1,170 @@
+from cascade.shuffle import Shuffle
+
+class ReconciliationPlan:
+    """
+    Everything about a reconciliation that only depends on the algorithm, the key size, and the
+    estimated bit error rate, and not on the key itself: the block size and the top-level block
+    layout of each normal iteration, the layout of the BICONF iterations, and the shuffle of the
+    first normal iteration (which keeps the bits in the same order).
+
+    Plans are immutable, so one plan can be shared by any number of reconciliations. Use get_plan
+    to get a cached plan, so that reconciliations with the same parameters don't have to compute
+    the plan again. The random shuffles are not part of the plan: every reconciliation must use
+    new random shuffles.
+    """
+
+    MAX_CACHED_PLANS = 64
+    """The maximum number of plans that get_plan keeps in its cache."""
+
+    _cache = {}
+
+    def __init__(self, algorithm, key_size, estimated_bit_error_rate):
+        """
+        Create a reconciliation plan.
+
+        Args:
+            algorithm (Algorithm): The Cascade algorithm.
+            key_size (int): The size of the key in bits.
+            estimated_bit_error_rate (float): The estimated bit error rate in the noisy key.
+        """
+        self._algorithm = algorithm
+        self._key_size = key_size
+        self._estimated_bit_error_rate = estimated_bit_error_rate
+
+        # The block size, the top-level block boundaries, and the top-level block ranges of each
+        # normal iteration.
+        self._iterations = []
+        for iteration_nr in range(1, algorithm.cascade_iterations + 1):
+            block_size = algorithm.block_size_function(estimated_bit_error_rate, key_size,
+                                                       iteration_nr)
+            top_block_boundaries = tuple(range(0, key_size, block_size)) + (key_size,)
+            shuffle_ranges = tuple(zip(top_block_boundaries, top_block_boundaries[1:]))
+            self._iterations.append((block_size, top_block_boundaries, shuffle_ranges))
+
+        # The first normal iteration does not shuffle the key.
+        self._identity_shuffle = Shuffle(key_size, Shuffle.SHUFFLE_KEEP_SAME)
+
+        # A BICONF iteration selects the first half of the shuffled key, and, if the algorithm wants
+        # it, the complementary second half.
+        mid_index = key_size // 2
+        if algorithm.biconf_correct_complement:
+            self._biconf_top_block_boundaries = (0, mid_index, key_size)
+        else:
+            self._biconf_top_block_boundaries = (0, mid_index)
+
+    @staticmethod
+    def get_plan(algorithm, key_size, estimated_bit_error_rate):
+        """
+        Get a reconciliation plan from the cache, or create it and add it to the cache if there
+        is no such plan in the cache yet.
+
+        Args:
+            algorithm (Algorithm): The Cascade algorithm.
+            key_size (int): The size of the key in bits.
+            estimated_bit_error_rate (float): The estimated bit error rate in the noisy key.
+
+        Returns:
+            The reconciliation plan.
+        """
+        cache_key = (algorithm.name, key_size, estimated_bit_error_rate)
+        plan = ReconciliationPlan._cache.get(cache_key)
+        if plan is None or plan.get_algorithm() is not algorithm:
+            plan = ReconciliationPlan(algorithm, key_size, estimated_bit_error_rate)
+            if len(ReconciliationPlan._cache) >= ReconciliationPlan.MAX_CACHED_PLANS:
+                # Evict the plan that was added to the cache first.
+                del ReconciliationPlan._cache[next(iter(ReconciliationPlan._cache))]
+            ReconciliationPlan._cache[cache_key] = plan
+        return plan
+
+    @staticmethod
+    def clear_cache():
+        """
+        Remove all plans from the cache.
+        """
+        ReconciliationPlan._cache.clear()
+
+    def get_algorithm(self):
+        """
+        Get the Cascade algorithm of the plan.
+
+        Returns:
+            The Cascade algorithm.
+        """
+        return self._algorithm
+
+    def get_key_size(self):
+        """
+        Get the size of the key in bits.
+
+        Returns:
+            The size of the key in bits.
+        """
+        return self._key_size
+
+    def get_estimated_bit_error_rate(self):
+        """
+        Get the estimated bit error rate in the noisy key.
+
+        Returns:
+            The estimated bit error rate.
+        """
+        return self._estimated_bit_error_rate
+
+    def get_block_size(self, iteration_nr):
+        """
+        Get the size of the top-level blocks of a normal iteration.
+
+        Args:
+            iteration_nr (int): The number of the normal iteration, starting at 1.
+
+        Returns:
+            The size of the top-level blocks. The last top-level block may be smaller.
+        """
+        return self._iterations[iteration_nr - 1][0]
+
+    def get_top_block_boundaries(self, iteration_nr):
+        """
+        Get the top-level block boundaries of a normal iteration.
+
+        Args:
+            iteration_nr (int): The number of the normal iteration, starting at 1.
+
+        Returns:
+            A tuple with the shuffle indexes at which the top-level blocks start, followed by the
+            key size, as for the BlockTree constructor.
+        """
+        return self._iterations[iteration_nr - 1][1]
+
+    def get_shuffle_ranges(self, iteration_nr):
+        """
+        Get the ranges of the top-level blocks of a normal iteration.
+
+        Args:
+            iteration_nr (int): The number of the normal iteration, starting at 1.
+
+        Returns:
+            A tuple of tuples (shuffle_start_index, shuffle_end_index), one for each top-level
+            block, in order.
+        """
+        return self._iterations[iteration_nr - 1][2]
+
+    def get_identity_shuffle(self):
+        """
+        Get the shuffle of the first normal iteration, which keeps the bits in the same order.
+
+        Returns:
+            The shuffle.
+        """
+        return self._identity_shuffle
+
+    def get_biconf_top_block_boundaries(self):
+        """
+        Get the top-level block boundaries of a BICONF iteration.
+
+        Returns:
+            A tuple with the shuffle indexes at which the top-level blocks start, followed by the
+            shuffle index at which the last top-level block ends, as for the BlockTree
+            constructor. The first top-level block is the selected half of the shuffled key, and
+            the second one (if any) is its complement.
+        """
+        return self._biconf_top_block_boundaries
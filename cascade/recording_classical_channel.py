@@ -0,0 +1,45 @@
+from cascade.classical_channel import ClassicalChannel
+
+class RecordingClassicalChannel(ClassicalChannel):
+    """
+    A classical channel that passes all interactions on to another classical channel, and that
+    records the transcript of all parity questions and answers.
+    """
+
+    def __init__(self, classical_channel):
+        """
+        Create a recording classical channel.
+
+        Args:
+            classical_channel (subclass of ClassicalChannel): The classical channel to pass all
+                interactions on to.
+        """
+        self._classical_channel = classical_channel
+        self._transcript = []
+
+    def start_reconciliation(self):
+        self._classical_channel.start_reconciliation()
+
+    def end_reconciliation(self):
+        self._classical_channel.end_reconciliation()
+
+    def ask_parities(self, blocks):
+        parities = self._classical_channel.ask_parities(blocks)
+        questions = [(block.get_shuffle().get_identifier(), block.get_start_index(),
+                      block.get_end_index()) for block in blocks]
+        self._transcript.append((questions, list(parities)))
+        return parities
+
+    def get_last_message_sizes(self):
+        return self._classical_channel.get_last_message_sizes()
+
+    def get_transcript(self):
+        """
+        Get the transcript of all parity questions and answers so far.
+
+        Returns:
+            A list with one tuple (questions, parities) per ask_parities call, in order. The
+            questions are a list of tuples (shuffle_identifier, shuffle_start_index,
+            shuffle_end_index), and the parities are the list of answers.
+        """
+        return self._transcript
@@ -1,6 +1,18 @@
+from array import array
+from itertools import repeat
 import math
+import operator
 import random
 
+# Shuffle permutations are stored as compact arrays of unsigned integers, which must be able to hold
+# any index up to _MAX_KEY_SIZE.
+_INDEX_TYPECODE = "I" if array("I").itemsize >= 4 else "L"
+
+_MASK_64 = (1 << 64) - 1
+
+def _zero_indexes(size):
+    return array(_INDEX_TYPECODE, bytes(array(_INDEX_TYPECODE).itemsize * size))
+
 class Shuffle:
     """
     A shuffling (i.e. re-ordering) of the bits in a key.
@@ -12,6 +24,16 @@ class Shuffle:
     """Do not shuffle the bits in the key."""
     SHUFFLE_RANDOM = 1
     """Randomly shuffle the bits in the key."""
+    SHUFFLE_RANDOM_FAST = 2
+    """Randomly shuffle the bits in the key, using a faster algorithm than SHUFFLE_RANDOM (which
+    produces a different permutation for the same seed)."""
+    SHUFFLE_RANDOM_IMPLICIT = 3
+    """Randomly shuffle the bits in the key, computing the permutation on demand from the seed
+    instead of storing it (constant memory, but slower index lookups)."""
+    SHUFFLE_ALGORITHMS = [SHUFFLE_KEEP_SAME, SHUFFLE_RANDOM, SHUFFLE_RANDOM_FAST,
+                          SHUFFLE_RANDOM_IMPLICIT]
+
+    _FEISTEL_ROUNDS = 4
 
     _MAX_KEY_SIZE = 1_000_000_000
     _MAX_ALGORITHM = 100
@@ -31,20 +53,39 @@ class Shuffle:
             algorithm (int): The algorithm for generating the shuffle pattern:
                 SHUFFLE_KEEP_SAME: Do not shuffle the key (keep the key bits in the original order).
                 SHUFFLE_RANDOM: Randomly shuffle the key.
+                SHUFFLE_RANDOM_FAST: Randomly shuffle the key, using a faster algorithm.
+                SHUFFLE_RANDOM_IMPLICIT: Randomly shuffle the key, without storing the
+                    permutation.
             shuffle_seed (None or int): The seed value for the isolated shuffle random number
                 generator that is used to generate the shuffling permutation. If shuffle_seed is
                 None, then a random shuffle_seed value will be generated.
         """
         self._size = size
-        self._shuffle_index_to_key_index = {}
-        for shuffle_index in range(0, size):
-            self._shuffle_index_to_key_index[shuffle_index] = shuffle_index
-        if algorithm == self.SHUFFLE_RANDOM:
+        # The permutation and its inverse. Both are None for a shuffle that keeps the bits in the
+        # same order, so that such a shuffle does not need any per-bit memory.
+        self._shuffle_index_to_key_index = None
+        self._key_index_to_shuffle_index = None
+        # The Feistel round keys for an implicit shuffle; None for all other shuffles.
+        self._round_keys = None
+        self._half_bits = 0
+        if algorithm in [self.SHUFFLE_RANDOM, self.SHUFFLE_RANDOM_FAST,
+                         self.SHUFFLE_RANDOM_IMPLICIT]:
             if shuffle_seed is None:
                 shuffle_seed = \
                     Shuffle._shuffle_seed_random_generator.randint(1, Shuffle._MAX_SHUFFLE_SEED - 1)
             shuffle_random_generator = random.Random(shuffle_seed)
-            Shuffle._shuffle(self._shuffle_index_to_key_index, shuffle_random_generator.random)
+            if algorithm == self.SHUFFLE_RANDOM:
+                self._shuffle_index_to_key_index = array(_INDEX_TYPECODE, range(size))
+                Shuffle._shuffle(self._shuffle_index_to_key_index, shuffle_random_generator.random)
+                self._key_index_to_shuffle_index = \
+                    Shuffle._invert(self._shuffle_index_to_key_index)
+            elif algorithm == self.SHUFFLE_RANDOM_FAST:
+                (self._shuffle_index_to_key_index, self._key_index_to_shuffle_index) = \
+                    Shuffle._fast_shuffle(size, shuffle_random_generator)
+            else:
+                self._half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+                self._round_keys = tuple(shuffle_random_generator.getrandbits(64)
+                                         for _ in range(Shuffle._FEISTEL_ROUNDS))
         else:
             shuffle_seed = 0
         self._identifier = Shuffle._encode_identifier(size, algorithm, shuffle_seed)
@@ -64,6 +105,105 @@ class Shuffle:
             j = math.floor(random_function() * (i + 1))
             x[i], x[j] = x[j], x[i]
 
+    @staticmethod
+    def _fast_shuffle(size, random_generator):
+        """
+        Generate a random permutation and its inverse for the SHUFFLE_RANDOM_FAST algorithm.
+
+        This is an "inside-out" Fisher-Yates shuffle. It draws the random numbers for all swaps
+        with a single call to the random number generator, maps each 64-bit random number r to a
+        swap position in [0, i] as (r * (i + 1)) >> 64 (which is uniform to within a bias of
+        size / 2^64), and fills in the inverse permutation in the same pass. The result only
+        depends on random.Random.getrandbits, which is stable across Python versions.
+
+        Args:
+            size (int): The size of the permutation.
+            random_generator (random.Random): The seeded random number generator.
+
+        Returns:
+            A tuple (permutation, inverse_permutation) of arrays.
+        """
+        random_numbers = array("Q", random_generator.getrandbits(64 * size).to_bytes(8 * size,
+                                                                                 "little"))
+        swap_indexes = map(operator.rshift,
+                           map(operator.mul, random_numbers, range(1, size + 1)),
+                           repeat(64))
+        permutation = _zero_indexes(size)
+        inverse = _zero_indexes(size)
+        for i, j in enumerate(swap_indexes):
+            if j == i:
+                permutation[i] = i
+                inverse[i] = i
+            else:
+                moved = permutation[j]
+                permutation[i] = moved
+                inverse[moved] = i
+                permutation[j] = i
+                inverse[i] = j
+        return (permutation, inverse)
+
+    @staticmethod
+    def _feistel_round_function(value, round_key):
+        # A keyed 64-bit mixing function (the SplitMix64 finalizer applied to value XOR key).
+        value = ((value ^ round_key) * 0x9E3779B97F4A7C15) & _MASK_64
+        value ^= value >> 30
+        value = (value * 0xBF58476D1CE4E5B9) & _MASK_64
+        value ^= value >> 27
+        value = (value * 0x94D049BB133111EB) & _MASK_64
+        return value ^ (value >> 31)
+
+    def _implicit_permute(self, index, inverse):
+        """
+        Compute one index of an implicit shuffle (SHUFFLE_RANDOM_IMPLICIT).
+
+        The permutation is a balanced Feistel network with _FEISTEL_ROUNDS keyed rounds over the
+        smallest domain [0, 2^(2 * half_bits)) that contains [0, size). An index that falls
+        outside [0, size) is encrypted again ("cycle walking") until it falls inside. Since the
+        domain is less than four times the size, this takes few iterations on average.
+
+        Args:
+            index (int): The index to map, in range [0, size).
+            inverse (bool): False to map a shuffle index to a key index, True to map a key index
+                to a shuffle index.
+
+        Returns:
+            The mapped index.
+        """
+        half_bits = self._half_bits
+        half_mask = (1 << half_bits) - 1
+        round_keys = self._round_keys
+        if inverse:
+            round_keys = tuple(reversed(round_keys))
+        round_function = Shuffle._feistel_round_function
+        while True:
+            left = index >> half_bits
+            right = index & half_mask
+            if inverse:
+                for round_key in round_keys:
+                    (left, right) = (right ^ (round_function(left, round_key) & half_mask), left)
+            else:
+                for round_key in round_keys:
+                    (left, right) = (right, left ^ (round_function(right, round_key) & half_mask))
+            index = (left << half_bits) | right
+            if index < self._size:
+                return index
+
+    @staticmethod
+    def _invert(permutation):
+        """
+        Compute the inverse of a permutation.
+
+        Args:
+            permutation (array): The permutation, mapping index i to permutation[i].
+
+        Returns:
+            The inverse permutation, mapping permutation[i] back to i.
+        """
+        inverse = _zero_indexes(len(permutation))
+        for index, permuted_index in enumerate(permutation):
+            inverse[permuted_index] = index
+        return inverse
+
     @staticmethod
     def create_shuffle_from_identifier(identifier):
         """
@@ -81,6 +221,22 @@ class Shuffle:
         shuffle = Shuffle(size, algorithm, shuffle_seed)
         return shuffle
 
+    @staticmethod
+    def is_valid_identifier(identifier, size):
+        """
+        Is a shuffle identifier, e.g. one that Alice received from Bob, valid for keys of a given
+        size?
+
+        Args:
+            identifier (int): The shuffle identifier.
+            size (int): The size of the keys.
+
+        Returns:
+            True if the identifier is for a shuffle of the given size with a known algorithm.
+        """
+        (identifier_size, algorithm, _shuffle_seed) = Shuffle._decode_identifier(identifier)
+        return identifier_size == size and algorithm in Shuffle.SHUFFLE_ALGORITHMS
+
     @staticmethod
     def _encode_identifier(size, algorithm, shuffle_seed):
         identifier = shuffle_seed
@@ -125,7 +281,7 @@ class Shuffle:
         """
         string = ""
         for shuffle_index in range(self._size):
-            key_index = self._shuffle_index_to_key_index[shuffle_index]
+            key_index = self.get_key_index(shuffle_index)
             if string:
                 string += " "
             string += f"{shuffle_index}->{key_index}"
@@ -163,6 +319,16 @@ class Shuffle:
         """
         return self._identifier
 
+    def is_implicit(self):
+        """
+        Is the shuffle implicit, i.e. does it store no permutation and compute every index lookup
+        instead (SHUFFLE_RANDOM_IMPLICIT)?
+
+        Returns:
+            True if the shuffle is implicit, False otherwise.
+        """
+        return self._round_keys is not None
+
     def get_key_index(self, shuffle_index):
         """
         Get the key index that a given shuffle index is mapped to.
@@ -174,8 +340,29 @@ class Shuffle:
         Returns:
             The key index.
         """
+        if self._shuffle_index_to_key_index is None:
+            if self._round_keys is None:
+                return shuffle_index
+            return self._implicit_permute(shuffle_index, False)
         return self._shuffle_index_to_key_index[shuffle_index]
 
+    def get_shuffle_index(self, key_index):
+        """
+        Get the shuffle index that a given key index is mapped to (i.e. the inverse of
+        get_key_index).
+
+        Args:
+            key_index (int): The key index of the bit. Index must be in range [0, shuffle._size).
+
+        Returns:
+            The shuffle index.
+        """
+        if self._key_index_to_shuffle_index is None:
+            if self._round_keys is None:
+                return key_index
+            return self._implicit_permute(key_index, True)
+        return self._key_index_to_shuffle_index[key_index]
+
     def get_bit(self, key, shuffle_index):
         """
         Get a bit from a shuffled key.
@@ -190,8 +377,7 @@ class Shuffle:
         Returns:
             The value (0 or 1) of the shuffled key bit at the given index.
         """
-        key_index = self._shuffle_index_to_key_index[shuffle_index]
-        return key.get_bit(key_index)
+        return key.get_bit(self.get_key_index(shuffle_index))
 
     def set_bit(self, key, shuffle_index, value):
         """
@@ -205,8 +391,7 @@ class Shuffle:
                 range [0, shuffle.size).
             value (int): The new value of the bit. Must be 0 or 1.
         """
-        key_index = self._shuffle_index_to_key_index[shuffle_index]
-        key.set_bit(key_index, value)
+        key.set_bit(self.get_key_index(shuffle_index), value)
 
     def flip_bit(self, key, shuffle_index):
         """
@@ -219,8 +404,63 @@ class Shuffle:
             shuffle_index (int): The index of the bit in the shuffled key. The index must be in
                 range [0, shuffle.size).
         """
-        key_index = self._shuffle_index_to_key_index[shuffle_index]
-        key.flip_bit(key_index)
+        key.flip_bit(self.get_key_index(shuffle_index))
+
+    def get_shuffled_bits(self, key):
+        """
+        Get the values of all bits in a shuffled key, unpacked.
+
+        Args:
+            key (Key): The key to shuffle. The size of the key must be equal to the size of this
+                shuffle.
+
+        Returns:
+            A bytearray with one byte per key bit, indexed by shuffle index, with value 0 or 1.
+        """
+        key_bits = key.get_bits()
+        if self._round_keys is not None:
+            return bytearray(map(key_bits.__getitem__, map(self.get_key_index, range(self._size))))
+        if self._shuffle_index_to_key_index is None:
+            return key_bits
+        return bytearray(map(key_bits.__getitem__, self._shuffle_index_to_key_index))
+
+    def calculate_parities(self, key, shuffle_ranges):
+        """
+        Calculate the parities of many contiguous sub-ranges of bits in a shuffled key at once.
+
+        If there are many ranges, or if the ranges cover a large enough part of the key and there is
+        no parity index for this shuffle, the key is shuffled once (see get_shuffled_bits) and the
+        parity of each range is computed by counting the one bits in a slice of the shuffled bits.
+        Otherwise, the parity index is used if there is one, or the bits are looked up one by one.
+
+        Args:
+            key (Key): The key for which to calculate the parities after shuffling it.
+            shuffle_ranges (list): A list of tuples (shuffle_start_index, shuffle_end_index), each
+                of which is a range of bits in the shuffled key, as for calculate_parity.
+
+        Returns:
+            A list with the parity of each range, in the same order as the ranges.
+        """
+        # A parity index answers a question in O(log n) Python steps, whereas shuffling the key does
+        # O(n) steps in C; that pays off if there are many questions. Without an index, shuffling an
+        # explicit shuffle pays off if the ranges cover a quarter of the key. Shuffling an implicit
+        # shuffle computes the permutation for every bit, so only do that if the ranges cover the
+        # whole key.
+        if key.get_parity_index(self) is not None:
+            worth_shuffling = 32 * len(shuffle_ranges) >= self._size
+        else:
+            range_bits = sum(end_index - start_index
+                             for (start_index, end_index) in shuffle_ranges)
+            if self._round_keys is not None:
+                worth_shuffling = range_bits >= self._size
+            else:
+                worth_shuffling = 4 * range_bits >= self._size
+        if not worth_shuffling:
+            return [self.calculate_parity(key, start_index, end_index)
+                    for (start_index, end_index) in shuffle_ranges]
+        shuffled_bits = self.get_shuffled_bits(key)
+        return [shuffled_bits[start_index:end_index].count(1) & 1
+                for (start_index, end_index) in shuffle_ranges]
 
     def calculate_parity(self, key, shuffle_start_index, shuffle_end_index):
         """
@@ -236,9 +476,17 @@ class Shuffle:
         Returns:
             The parity of the contiguous sub-range of bits in the shuffled key.
         """
+        parity_index = key.get_parity_index(self)
+        if parity_index is not None:
+            return parity_index.calculate_parity(shuffle_start_index, shuffle_end_index)
+        if self._round_keys is not None:
+            key_indexes = map(self.get_key_index, range(shuffle_start_index, shuffle_end_index))
+        elif self._shuffle_index_to_key_index is None:
+            key_indexes = range(shuffle_start_index, shuffle_end_index)
+        else:
+            key_indexes = self._shuffle_index_to_key_index[shuffle_start_index:shuffle_end_index]
         parity = 0
-        for shuffle_index in range(shuffle_start_index, shuffle_end_index):
-            key_index = self._shuffle_index_to_key_index[shuffle_index]
-            if key.get_bit(key_index):
-                parity = 1 - parity
+        get_bit = key.get_bit
+        for key_index in key_indexes:
+            parity ^= get_bit(key_index)
         return parity
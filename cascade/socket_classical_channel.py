@@ -0,0 +1,85 @@
+import socket
+
+from cascade.classical_channel import ClassicalChannel
+from cascade import parity_protocol
+
+class SocketClassicalChannel(ClassicalChannel):
+    """
+    A concrete implementation of the ClassicalChannel base class that talks to Alice's parity
+    server (see ParityServer) over a TCP or Unix domain socket.
+    """
+
+    def __init__(self, address, key_number):
+        """
+        Create a socket classical channel. The connection is made when the first reconciliation
+        starts, and stays open until close is called.
+
+        Args:
+            address (tuple or str): The address of the parity server: a tuple (host, port) for
+                TCP, or the path of a Unix domain socket.
+            key_number (int): The number of the correct key in Alice's key store.
+        """
+        self._address = address
+        self._key_number = key_number
+        self._socket = None
+        self._last_message_sizes = None
+
+    def set_key_number(self, key_number):
+        """
+        Set the number of the correct key in Alice's key store for the next reconciliation.
+
+        Args:
+            key_number (int): The number of the key.
+        """
+        self._key_number = key_number
+
+    def close(self):
+        """
+        Close the connection to the parity server, if it is open.
+        """
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def start_reconciliation(self):
+        if self._socket is None:
+            if isinstance(self._address, str):
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            else:
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._socket.connect(self._address)
+        self._send(parity_protocol.encode_start(self._key_number))
+
+    def end_reconciliation(self):
+        self._send(parity_protocol.encode_end())
+
+    def ask_parities(self, blocks):
+        questions = [(block.get_shuffle().get_identifier(), block.get_start_index(),
+                      block.get_end_index()) for block in blocks]
+        wire_order = parity_protocol.get_wire_order(questions)
+        ask_message = parity_protocol.encode_ask(questions, wire_order)
+        self._send(ask_message)
+        reply_message = self._receive()
+        self._last_message_sizes = (len(ask_message), len(reply_message))
+        return parity_protocol.decode_reply(reply_message, wire_order)
+
+    def get_last_message_sizes(self):
+        return self._last_message_sizes
+
+    def _send(self, message):
+        self._socket.sendall(parity_protocol.encode_frame(message))
+
+    def _receive(self):
+        (message_size,) = parity_protocol.FRAME_HEADER.unpack(
+            self._receive_exactly(parity_protocol.FRAME_HEADER.size))
+        return self._receive_exactly(message_size)
+
+    def _receive_exactly(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("parity server closed the connection")
+            data += chunk
+        return bytes(data)
@@ -19,3 +19,15 @@ class Stats:
         self.reconciliation_bits_per_key_bit = None
         self.efficiency = None
         self.infer_parity_blocks = 0
+        self.ask_parity_cache_hits = 0
+        self.biconf_derived_complement_parities = 0
+        self.prefetch_saved_messages = 0
+        self.speculative_ask_parity_blocks = 0
+        self.parity_inference_equations = 0
+        self.parity_inference_steps = 0
+        self.avoided_parity_scans = 0
+        self.block_memory_bytes = 0
+        self.block_memory_bytes_per_iteration = []
+        self.peak_live_blocks = 0
+        self.live_blocks_per_iteration = []
+        self.pruned_blocks = 0
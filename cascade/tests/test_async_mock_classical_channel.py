@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from cascade.async_mock_classical_channel import AsyncMockClassicalChannel
+from cascade.block import Block
+from cascade.key import Key
+from cascade.mock_classical_channel import MockClassicalChannel
+from cascade.shuffle import Shuffle
+
+def test_create_async_mock_classical_channel():
+    Key.set_random_seed(1)
+    correct_key = Key.create_random_key(32)
+    _channel = AsyncMockClassicalChannel(correct_key, 0.01)
+
+def test_ask_parities():
+    Key.set_random_seed(3)
+    Shuffle.set_random_seed(77716)
+    correct_key = Key.create_random_key(32)
+    shuffle = Shuffle(correct_key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    blocks = Block.create_covering_blocks(correct_key, shuffle, 8)
+    channel = AsyncMockClassicalChannel(correct_key)
+    expected_parities = MockClassicalChannel(correct_key).ask_parities(blocks)
+
+    async def ask():
+        await channel.start_reconciliation()
+        parities = await channel.ask_parities(blocks)
+        await channel.end_reconciliation()
+        return parities
+
+    assert asyncio.run(ask()) == expected_parities
+
+def test_latency():
+    Key.set_random_seed(4)
+    correct_key = Key.create_random_key(32)
+    shuffle = Shuffle(correct_key.get_size(), Shuffle.SHUFFLE_KEEP_SAME)
+    blocks = Block.create_covering_blocks(correct_key, shuffle, 8)
+    channel = AsyncMockClassicalChannel(correct_key, 0.05)
+
+    async def ask_concurrently():
+        await asyncio.gather(*(channel.ask_parities(blocks) for _ in range(10)))
+
+    # The latencies of concurrent questions overlap.
+    start_time = time.perf_counter()
+    asyncio.run(ask_concurrently())
+    elapsed_time = time.perf_counter() - start_time
+    assert 0.05 <= elapsed_time < 0.45
@@ -274,6 +274,23 @@ def test_get_and_create_right_sub_block():
     right_right_sub_block = right_sub_block.create_right_sub_block()
     assert right_sub_block.get_right_sub_block() is right_right_sub_block
 
+def test_get_sub_block_containing():
+    Key.set_random_seed(6667)
+    Shuffle.set_random_seed(6668)
+    key = Key.create_random_key(12)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    blocks = Block.create_covering_blocks(key, shuffle, 7)
+    top_block = blocks[0]
+    assert top_block.get_sub_block_containing(0) is None
+    assert top_block.get_sub_block_containing(6) is None
+    left_sub_block = top_block.create_left_sub_block()
+    assert top_block.get_sub_block_containing(0) is left_sub_block
+    assert top_block.get_sub_block_containing(3) is left_sub_block
+    assert top_block.get_sub_block_containing(4) is None
+    right_sub_block = top_block.create_right_sub_block()
+    assert top_block.get_sub_block_containing(4) is right_sub_block
+    assert top_block.get_sub_block_containing(6) is right_sub_block
+
 def test_get_error_parity():
 
     # Create the original (sent) key.
@@ -356,3 +373,74 @@ def test_flip_parity():
     assert block.get_error_parity() == Block.ERRORS_ODD
     block.flip_parity()
     assert block.get_error_parity() == Block.ERRORS_EVEN
+
+def test_lazy_current_parity():
+    Key.set_random_seed(77717)
+    Shuffle.set_random_seed(77718)
+    key = Key.create_random_key(6)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    block = Block(key, shuffle, 0, 6, None)
+    assert not block.is_current_parity_known()
+    assert block.get_error_parity() == Block.ERRORS_UNKNOWN
+    assert not block.is_current_parity_known()
+    block.flip_bit(2)
+    block.flip_parity()
+    block.set_correct_parity(0)
+    block.get_error_parity()
+    assert block.is_current_parity_known()
+    assert block.get_current_parity() == shuffle.calculate_parity(key, 0, 6)
+
+def test_try_derive_current_parity():
+    for seed in range(20):
+        Key.set_random_seed(seed)
+        Shuffle.set_random_seed(seed + 100)
+        key = Key.create_random_key(11)
+        shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+        top_block = Block(key, shuffle, 0, 11, None)
+        assert not top_block.try_derive_current_parity()
+        left_sub_block = top_block.create_left_sub_block()
+        right_sub_block = top_block.create_right_sub_block()
+        assert not right_sub_block.try_derive_current_parity()
+        top_block.get_current_parity()
+        left_sub_block.get_current_parity()
+        assert right_sub_block.try_derive_current_parity()
+        assert not right_sub_block.try_derive_current_parity()
+        assert right_sub_block.get_current_parity() == shuffle.calculate_parity(key, 6, 11)
+
+def test_create_covering_blocks_calculates_parities():
+    Key.set_random_seed(77719)
+    Shuffle.set_random_seed(77720)
+    key = Key.create_random_key(100)
+    for algorithm in [Shuffle.SHUFFLE_KEEP_SAME, Shuffle.SHUFFLE_RANDOM,
+                      Shuffle.SHUFFLE_RANDOM_IMPLICIT]:
+        shuffle = Shuffle(key.get_size(), algorithm)
+        for block in Block.create_covering_blocks(key, shuffle, 7):
+            assert block.is_current_parity_known()
+            assert block.get_current_parity() == \
+                shuffle.calculate_parity(key, block.get_start_index(), block.get_end_index())
+
+def test_create_blocks():
+    Key.set_random_seed(77721)
+    Shuffle.set_random_seed(77722)
+    key = Key.create_random_key(100)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    shuffle_ranges = [(0, 10), (10, 60), (60, 61)]
+    blocks = Block.create_blocks(key, shuffle, shuffle_ranges)
+    assert len(blocks) == 3
+    for (block, (start_index, end_index)) in zip(blocks, shuffle_ranges):
+        assert block.get_start_index() == start_index
+        assert block.get_end_index() == end_index
+        assert block.is_top_block()
+        assert block.is_current_parity_known()
+        assert block.get_current_parity() == shuffle.calculate_parity(key, start_index, end_index)
+
+def test_set_current_parity():
+    Key.set_random_seed(77721)
+    Shuffle.set_random_seed(77722)
+    key = Key.create_random_key(8)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    block = Block(key, shuffle, 0, 8, None)
+    parity = shuffle.calculate_parity(key, 0, 8)
+    block.set_current_parity(parity)
+    assert block.is_current_parity_known()
+    assert block.get_current_parity() == parity
@@ -0,0 +1,59 @@
+from cascade.block import Block
+from cascade.block_pool import BlockPool
+from cascade.key import Key
+from cascade.shuffle import Shuffle
+
+def create_key_and_shuffle(seed, key_size):
+    Key.set_random_seed(seed)
+    Shuffle.set_random_seed(seed + 1)
+    key = Key.create_random_key(key_size)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    return (key, shuffle)
+
+def test_create_blocks():
+    (key, shuffle) = create_key_and_shuffle(1, 32)
+    pool = BlockPool()
+    blocks = pool.create_blocks(key, shuffle, [(0, 16), (16, 32)])
+    expected_blocks = Block.create_blocks(key, shuffle, [(0, 16), (16, 32)])
+    for (block, expected_block) in zip(blocks, expected_blocks):
+        assert block.__repr__() == expected_block.__repr__()
+        assert block.is_current_parity_known()
+        assert block.get_current_parity() == expected_block.get_current_parity()
+    assert pool.get_free_block_count() == 0
+
+def test_sub_blocks_come_from_pool():
+    (key, shuffle) = create_key_and_shuffle(2, 32)
+    pool = BlockPool()
+    block = pool.create_block(key, shuffle, 0, 32, None)
+    left_sub_block = block.create_left_sub_block()
+    right_sub_block = block.create_right_sub_block()
+    left_left_sub_block = left_sub_block.create_left_sub_block()
+    assert left_sub_block.get_parent_block() == block
+    assert right_sub_block.get_start_index() == 16
+    assert left_left_sub_block.get_end_index() == 8
+    assert pool.release_blocks([block]) == 4
+    assert pool.get_free_block_count() == 4
+    reused_block = pool.create_block(key, shuffle, 0, 1, None)
+    assert reused_block in [block, left_sub_block, right_sub_block, left_left_sub_block]
+    assert reused_block.get_parent_block() is None
+    assert pool.get_free_block_count() == 3
+
+def test_release_blocks():
+    (key, shuffle) = create_key_and_shuffle(3, 32)
+    pool = BlockPool()
+    old_blocks = pool.create_blocks(key, shuffle, [(0, 16), (16, 32)])
+    old_blocks[0].create_left_sub_block()
+    old_blocks[0].set_correct_parity(1)
+    assert pool.release_blocks(old_blocks) == 3
+    assert pool.get_free_block_count() == 3
+    (key, shuffle) = create_key_and_shuffle(4, 32)
+    blocks = pool.create_blocks(key, shuffle, [(0, 8), (8, 32)])
+    assert pool.get_free_block_count() == 1
+    for block in blocks:
+        assert block.get_shuffle() == shuffle
+        assert block.get_correct_parity() is None
+        assert block.get_left_sub_block() is None
+        assert block.get_current_parity() == \
+            shuffle.calculate_parity(key, block.get_start_index(), block.get_end_index())
+    pool.clear()
+    assert pool.get_free_block_count() == 0
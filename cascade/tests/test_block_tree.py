@@ -0,0 +1,184 @@
+from cascade.block import Block
+from cascade.block_tree import BlockTree
+from cascade.key import Key
+from cascade.shuffle import Shuffle
+
+def create_key_and_shuffle(seed, key_size):
+    Key.set_random_seed(seed)
+    Shuffle.set_random_seed(seed + 1)
+    key = Key.create_random_key(key_size)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    return (key, shuffle)
+
+def test_create_covering_tree():
+    (key, shuffle) = create_key_and_shuffle(3331, 16)
+    blocks = Block.create_covering_blocks(key, shuffle, 5)
+    tree = BlockTree.create_covering_tree(key, shuffle, 5)
+    assert len(tree) == 4
+    for (block, block_view) in zip(blocks, tree):
+        assert block_view.__repr__() == block.__repr__()
+        assert block_view.__str__() == block.__str__()
+        assert block_view.get_current_parity() == block.get_current_parity()
+        assert block_view.get_correct_parity() is None
+        assert block_view.is_top_block()
+        assert block_view.get_parent_block() is None
+    assert tree[3].get_size() == 1
+    assert tree[3].get_left_sub_block() is None
+    assert tree[3].get_sub_block_containing(15) is None
+
+def test_create_covering_tree_calculates_parities():
+    (key, shuffle) = create_key_and_shuffle(3333, 100)
+    for block_view in BlockTree.create_covering_tree(key, shuffle, 7):
+        assert block_view.is_current_parity_known()
+        assert block_view.get_current_parity() == \
+            shuffle.calculate_parity(key, block_view.get_start_index(), block_view.get_end_index())
+
+def test_create_tree_with_boundaries():
+    (key, shuffle) = create_key_and_shuffle(3331, 16)
+    tree = BlockTree(key, shuffle, [0, 8, 16])
+    assert len(tree) == 2
+    assert tree[0].get_start_index() == 0
+    assert tree[0].get_end_index() == 8
+    assert tree[1].get_start_index() == 8
+    assert tree[1].get_end_index() == 16
+    assert tree.get_top_block_containing(7) == tree[0]
+    assert tree.get_top_block_containing(8) == tree[1]
+    tree = BlockTree(key, shuffle, [0, 8])
+    assert len(tree) == 1
+    assert tree.get_top_block_containing(8) is None
+
+def test_sub_blocks():
+    (key, shuffle) = create_key_and_shuffle(6667, 12)
+    block = Block.create_covering_blocks(key, shuffle, 7)[0]
+    block_view = BlockTree.create_covering_tree(key, shuffle, 7)[0]
+    assert block_view.get_left_sub_block() is None
+    assert block_view.get_sub_block_containing(0) is None
+    left_sub_block = block.create_left_sub_block()
+    left_sub_block_view = block_view.create_left_sub_block()
+    assert left_sub_block_view.__repr__() == left_sub_block.__repr__()
+    assert left_sub_block_view.get_current_parity() == left_sub_block.get_current_parity()
+    assert block_view.get_left_sub_block() == left_sub_block_view
+    assert block_view.get_sub_block_containing(3) == left_sub_block_view
+    assert block_view.get_sub_block_containing(4) is None
+    assert not left_sub_block_view.is_top_block()
+    assert left_sub_block_view.get_parent_block() == block_view
+    right_left_sub_block = left_sub_block.create_right_sub_block()
+    right_left_sub_block_view = left_sub_block_view.create_right_sub_block()
+    assert right_left_sub_block_view.__repr__() == right_left_sub_block.__repr__()
+    assert right_left_sub_block_view.get_parent_block() == left_sub_block_view
+    assert right_left_sub_block_view.get_parent_block().get_parent_block() == block_view
+    assert left_sub_block_view.get_right_sub_block() == right_left_sub_block_view
+
+def test_parities():
+    (key, shuffle) = create_key_and_shuffle(8881, 16)
+    block_view = BlockTree.create_covering_tree(key, shuffle, 8)[1]
+    assert block_view.get_error_parity() == Block.ERRORS_UNKNOWN
+    current_parity = block_view.get_current_parity()
+    block_view.set_correct_parity(current_parity)
+    assert block_view.get_correct_parity() == current_parity
+    assert block_view.get_error_parity() == Block.ERRORS_EVEN
+    block_view.flip_parity()
+    assert block_view.get_current_parity() == 1 - current_parity
+    assert block_view.get_error_parity() == Block.ERRORS_ODD
+    block_view.set_correct_parity(current_parity)
+    assert block_view.get_correct_parity() == current_parity
+    block_view.set_correct_parity(1 - current_parity)
+    assert block_view.get_correct_parity() == 1 - current_parity
+    assert block_view.get_current_parity() == 1 - current_parity
+
+def test_flip_bit():
+    (key, shuffle) = create_key_and_shuffle(8883, 16)
+    block_view = BlockTree.create_covering_tree(key, shuffle, 8)[0]
+    key_index = block_view.get_key_index(3)
+    bit_value = key.get_bit(key_index)
+    block_view.flip_bit(3)
+    assert key.get_bit(key_index) == 1 - bit_value
+
+def split_all_blocks(blocks):
+    todo_blocks = list(blocks)
+    while todo_blocks:
+        block = todo_blocks.pop()
+        if block.get_size() > 1:
+            todo_blocks.append(block.create_left_sub_block())
+            todo_blocks.append(block.create_right_sub_block())
+
+def get_all_blocks_memory_bytes(blocks):
+    memory_bytes = 0
+    todo_blocks = list(blocks)
+    while todo_blocks:
+        block = todo_blocks.pop()
+        memory_bytes += block.get_memory_bytes()
+        for sub_block in (block.get_left_sub_block(), block.get_right_sub_block()):
+            if sub_block is not None:
+                todo_blocks.append(sub_block)
+    return memory_bytes
+
+def test_get_memory_bytes():
+    # A dense tree uses one byte per node (plus the top-level block boundaries), which is much less
+    # than the Block objects for the same blocks.
+    (key, shuffle) = create_key_and_shuffle(1111, 1000)
+    tree = BlockTree.create_covering_tree(key, shuffle, 100)
+    assert not tree.is_sparse()
+    assert tree.get_memory_bytes() == 10 * 256 + 11 * 8
+    blocks = Block.create_covering_blocks(key, shuffle, 100)
+    split_all_blocks(tree)
+    split_all_blocks(blocks)
+    assert tree.get_memory_bytes() * 20 < get_all_blocks_memory_bytes(blocks)
+    assert tree.get_memory_bytes() == 10 * 256 + 11 * 8
+
+def test_sparse_tree():
+    # A tree with large top-level blocks only stores the nodes of the blocks that were created.
+    (key, shuffle) = create_key_and_shuffle(2222, 10000)
+    tree = BlockTree(key, shuffle, [0, 5000, 10000])
+    assert tree.is_sparse()
+    empty_tree_memory_bytes = tree.get_memory_bytes()
+    assert empty_tree_memory_bytes < 1000
+    blocks = [Block(key, shuffle, 0, 5000, None), Block(key, shuffle, 5000, 10000, None)]
+    for (block, block_view) in zip(blocks, tree):
+        while block.get_size() > 1:
+            block.set_correct_parity(0)
+            block_view.set_correct_parity(0)
+            assert block_view.get_error_parity() == block.get_error_parity()
+            block = block.create_left_sub_block()
+            block_view.create_right_sub_block()
+            block_view = block_view.create_left_sub_block()
+            assert block_view.__repr__() == block.__repr__()
+    assert tree.get_memory_bytes() < get_all_blocks_memory_bytes(blocks)
+
+def test_try_derive_current_parity():
+    for seed in range(20):
+        (key, shuffle) = create_key_and_shuffle(seed, 22)
+        tree = BlockTree(key, shuffle, [0, 11, 22])
+        for top_block in tree:
+            assert not top_block.is_current_parity_known()
+            assert not top_block.try_derive_current_parity()
+            left_sub_block = top_block.create_left_sub_block()
+            right_sub_block = top_block.create_right_sub_block()
+            assert not right_sub_block.try_derive_current_parity()
+            top_block.get_current_parity()
+            left_sub_block.get_current_parity()
+            assert right_sub_block.try_derive_current_parity()
+            assert right_sub_block.is_current_parity_known()
+            start_index = right_sub_block.get_start_index()
+            end_index = right_sub_block.get_end_index()
+            assert right_sub_block.get_current_parity() == \
+                shuffle.calculate_parity(key, start_index, end_index)
+
+def test_set_current_parity():
+    (key, shuffle) = create_key_and_shuffle(3335, 16)
+    tree = BlockTree(key, shuffle, [0, 8, 16])
+    block_view = tree[1]
+    block_view.set_correct_parity(1)
+    for parity in [1, 0]:
+        block_view.set_current_parity(parity)
+        assert block_view.is_current_parity_known()
+        assert block_view.get_current_parity() == parity
+        assert block_view.get_correct_parity() == 1
+
+def test_get_block_count():
+    (key, shuffle) = create_key_and_shuffle(4444, 16)
+    tree = BlockTree(key, shuffle, [0, 8, 16])
+    assert tree.get_block_count() == 2
+    left_sub_block = tree[0].create_left_sub_block()
+    left_sub_block.create_right_sub_block()
+    assert tree.get_block_count() == 4
@@ -0,0 +1,61 @@
+from cascade.block import Block
+from cascade.bucket_queue import BucketQueue
+from cascade.key import Key
+from cascade.shuffle import Shuffle
+
+def create_blocks():
+    Key.set_random_seed(1)
+    key = Key.create_random_key(16)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_KEEP_SAME)
+    return [Block(key, shuffle, 0, 8, None),
+            Block(key, shuffle, 8, 16, None),
+            Block(key, shuffle, 0, 4, None),
+            Block(key, shuffle, 4, 8, None),
+            Block(key, shuffle, 0, 1, None)]
+
+def test_empty_queue():
+    queue = BucketQueue()
+    assert len(queue) == 0
+    assert not queue
+
+def test_smallest_block_first():
+    blocks = create_blocks()
+    queue = BucketQueue()
+    for (flag, block) in enumerate(blocks):
+        queue.push(block, flag)
+    assert len(queue) == 5
+    assert queue.pop() == (blocks[4], 4)
+    assert queue.pop() == (blocks[2], 2)
+    assert queue.pop() == (blocks[3], 3)
+    assert queue.pop() == (blocks[0], 0)
+    assert queue.pop() == (blocks[1], 1)
+    assert len(queue) == 0
+
+def test_first_in_first_out_for_equal_sizes():
+    blocks = create_blocks()
+    queue = BucketQueue()
+    queue.push(blocks[3], True)
+    queue.push(blocks[0], False)
+    queue.push(blocks[2], False)
+    assert queue.pop() == (blocks[3], True)
+    queue.push(blocks[4], True)
+    queue.push(blocks[3], False)
+    assert queue.pop() == (blocks[4], True)
+    assert queue.pop() == (blocks[2], False)
+    assert queue.pop() == (blocks[3], False)
+    assert queue.pop() == (blocks[0], False)
+    assert not queue
+
+def test_clear():
+    blocks = create_blocks()
+    queue = BucketQueue()
+    for block in blocks:
+        queue.push(block, False)
+    queue.pop()
+    queue.clear()
+    assert len(queue) == 0
+    queue.push(blocks[1], True)
+    queue.push(blocks[3], False)
+    assert queue.pop() == (blocks[3], False)
+    assert queue.pop() == (blocks[1], True)
+    assert len(queue) == 0
@@ -109,6 +109,21 @@ def test_copy_without_noise():
     assert key.__str__() == "1110011000011110100111010001100011100000010011010101110100000010"
     assert key_copy.__str__() == "1010011000011110100111010001100011100000010011010101110100000010"
 
+def test_copy_on_write():
+    Key.set_random_seed(3457)
+    key = Key.create_random_key(16)
+    original_string = key.__str__()
+    key_copy = key.copy_on_write()
+    assert key_copy.__str__() == original_string
+    key_copy.flip_bit(3)
+    key_copy.set_bit(4, 1 - key_copy.get_bit(4))
+    assert key.__str__() == original_string
+    assert key_copy.difference(key) == 2
+    key_copy = key.copy_on_write()
+    key.flip_bit(5)
+    assert key_copy.__str__() == original_string
+    assert key.difference(key_copy) == 1
+
 def test_copy_with_exact_noise():
 
     Key.set_random_seed(5678)
@@ -162,3 +177,56 @@ def test_difference():
     empty_key_1 = Key()
     empty_key_2 = Key()
     assert empty_key_1.difference(empty_key_2) == 0
+
+def test_bits_across_byte_boundaries():
+    key = Key.create_random_key(0).copy(0.0, Key.ERROR_METHOD_EXACT)
+    assert key.__str__() == ""
+    Key.set_random_seed(4567)
+    key = Key.create_random_key(20)
+    assert key.__str__() == "11011000001011110110"
+    key.flip_bit(7)
+    key.flip_bit(8)
+    key.set_bit(19, 0)
+    assert key.__str__() == "11011001101011110110"
+    assert key.get_bit(7) == 1
+    assert key.get_bit(8) == 1
+    assert key.get_bit(19) == 0
+    key_copy = key.copy(0.0, Key.ERROR_METHOD_EXACT)
+    key_copy.flip_bit(15)
+    key_copy.flip_bit(16)
+    assert key.difference(key_copy) == 2
+
+def test_set_random_method():
+    Key.set_random_method(Key.RANDOM_METHOD_BULK)
+    try:
+        # The bulk method is seedable too.
+        Key.set_random_seed(333)
+        key_1 = Key.create_random_key(1000)
+        noisy_key_1 = key_1.copy(0.1, Key.ERROR_METHOD_BERNOULLI)
+        Key.set_random_seed(333)
+        key_2 = Key.create_random_key(1000)
+        noisy_key_2 = key_2.copy(0.1, Key.ERROR_METHOD_BERNOULLI)
+        assert key_1.__str__() == key_2.__str__()
+        assert noisy_key_1.__str__() == noisy_key_2.__str__()
+        assert 50 <= key_1.difference(noisy_key_1) <= 150
+        # Extreme cases.
+        assert key_1.difference(key_1.copy(0.0, Key.ERROR_METHOD_BERNOULLI)) == 0
+        assert key_1.difference(key_1.copy(1.0, Key.ERROR_METHOD_BERNOULLI)) == 1000
+        assert Key.create_random_key(0).__str__() == ""
+        # Exact noise does not depend on the random method.
+        Key.set_random_seed(5678)
+        bulk_noisy_key = key_1.copy(0.25, Key.ERROR_METHOD_EXACT)
+        Key.set_random_method(Key.RANDOM_METHOD_PER_BIT)
+        Key.set_random_seed(5678)
+        per_bit_noisy_key = key_1.copy(0.25, Key.ERROR_METHOD_EXACT)
+        assert bulk_noisy_key.__str__() == per_bit_noisy_key.__str__()
+        assert key_1.difference(bulk_noisy_key) == 250
+    finally:
+        Key.set_random_method(Key.RANDOM_METHOD_PER_BIT)
+
+def test_get_bits():
+    assert Key().get_bits() == bytearray()
+    Key.set_random_seed(3456)
+    key = Key.create_random_key(9)
+    assert key.__str__() == "111001100"
+    assert key.get_bits() == bytearray([1, 1, 1, 0, 0, 1, 1, 0, 0])
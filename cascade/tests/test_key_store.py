@@ -0,0 +1,29 @@
+from cascade.key import Key
+from cascade.key_store import KeyStore
+
+def test_create_key_from_packed_bits():
+    Key.set_random_seed(1)
+    key = Key.create_random_key(21)
+    same_key = Key.create_key_from_packed_bits(21, key.get_packed_bits())
+    assert same_key.__str__() == key.__str__()
+    # Padding bits are ignored.
+    key = Key.create_key_from_packed_bits(3, b"\xff")
+    assert key.__str__() == "111"
+    assert key.get_packed_bits() == b"\x07"
+
+def test_write_and_read_key_store(tmp_path):
+    Key.set_random_seed(2)
+    keys = [Key.create_random_key(size) for size in [32, 0, 7, 1000]]
+    path = str(tmp_path / "keys")
+    KeyStore.write(path, keys)
+    key_store = KeyStore(path)
+    assert key_store.get_key_count() == 4
+    for (key_number, key) in enumerate(keys):
+        stored_key = key_store.get_key(key_number)
+        assert stored_key.get_size() == key.get_size()
+        assert stored_key.__str__() == key.__str__()
+    # Changing a loaded key does not change the key store.
+    stored_key = key_store.get_key(0)
+    stored_key.flip_bit(0)
+    assert key_store.get_key(0).__str__() == keys[0].__str__()
+    key_store.close()
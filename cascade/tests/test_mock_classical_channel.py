@@ -1,6 +1,7 @@
 from cascade.block import Block
 from cascade.mock_classical_channel import MockClassicalChannel
 from cascade.key import Key
+from cascade.parity_index import ParityIndex
 from cascade.shuffle import Shuffle
 
 def test_create_mock_classical_channel():
@@ -33,4 +34,42 @@ def test_ask_parities():
     assert parities[1] == 0
     assert parities[2] == 0
     assert parities[3] == 0
+    # Asking again (which uses a parity index) gives the same parities.
+    assert channel.ask_parities(blocks) == parities
+    assert channel.ask_parities(list(reversed(blocks))) == list(reversed(parities))
+    channel.end_reconciliation()
+
+def test_ask_parities_does_not_modify_correct_key():
+    Key.set_random_seed(4)
+    Shuffle.set_random_seed(77717)
+    correct_key = Key.create_random_key(32)
+    own_shuffle = Shuffle(correct_key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    own_parity_index = ParityIndex(correct_key, own_shuffle)
+    correct_key.add_parity_index(own_parity_index)
+    shuffle = Shuffle(correct_key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    blocks = Block.create_covering_blocks(correct_key, shuffle, 8)
+    channel = MockClassicalChannel(correct_key)
+    channel.start_reconciliation()
+    channel.ask_parities(blocks)
+    channel.ask_parities(blocks)
+    assert correct_key.get_parity_index(shuffle) is None
+    channel.end_reconciliation()
+    assert correct_key.get_parity_index(own_shuffle) is own_parity_index
+
+def test_ask_parities_for_multiple_shuffles():
+    Key.set_random_seed(5)
+    Shuffle.set_random_seed(77718)
+    correct_key = Key.create_random_key(64)
+    blocks = []
+    for algorithm in [Shuffle.SHUFFLE_KEEP_SAME, Shuffle.SHUFFLE_RANDOM,
+                      Shuffle.SHUFFLE_RANDOM_IMPLICIT]:
+        shuffle = Shuffle(correct_key.get_size(), algorithm)
+        blocks += Block.create_covering_blocks(correct_key, shuffle, 5)
+    # Interleave the blocks of the different shuffles.
+    blocks = blocks[0::2] + blocks[1::2]
+    expected_parities = [block.get_current_parity() for block in blocks]
+    channel = MockClassicalChannel(correct_key)
+    channel.start_reconciliation()
+    assert channel.ask_parities(blocks) == expected_parities
+    assert channel.ask_parities(blocks) == expected_parities
     channel.end_reconciliation()
@@ -0,0 +1,69 @@
+from cascade.key import Key
+from cascade.parity_index import ParityIndex
+from cascade.shuffle import Shuffle
+
+def scan_parity(key, shuffle, start_index, end_index):
+    parity = 0
+    for shuffle_index in range(start_index, end_index):
+        parity ^= shuffle.get_bit(key, shuffle_index)
+    return parity
+
+def test_create_parity_index():
+    Key.set_random_seed(1231)
+    Shuffle.set_random_seed(1232)
+    key = Key.create_random_key(16)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    parity_index = ParityIndex(key, shuffle)
+    assert parity_index.get_key() == key
+    assert parity_index.get_shuffle() == shuffle
+    # An empty parity index.
+    parity_index = ParityIndex(Key(), Shuffle(0, Shuffle.SHUFFLE_KEEP_SAME))
+    assert parity_index.calculate_parity(0, 0) == 0
+
+def test_calculate_parity():
+    Key.set_random_seed(2231)
+    Shuffle.set_random_seed(2232)
+    key = Key.create_random_key(37)
+    for algorithm in [Shuffle.SHUFFLE_KEEP_SAME, Shuffle.SHUFFLE_RANDOM,
+                      Shuffle.SHUFFLE_RANDOM_IMPLICIT]:
+        shuffle = Shuffle(key.get_size(), algorithm)
+        parity_index = ParityIndex(key, shuffle)
+        for start_index in range(key.get_size()):
+            for end_index in range(start_index, key.get_size() + 1):
+                assert parity_index.calculate_parity(start_index, end_index) == \
+                       scan_parity(key, shuffle, start_index, end_index)
+
+def test_flip_key_bit():
+    Key.set_random_seed(3231)
+    Shuffle.set_random_seed(3232)
+    key = Key.create_random_key(50)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    parity_index = ParityIndex(key, shuffle)
+    key.add_parity_index(parity_index)
+    assert key.get_parity_index(shuffle) == parity_index
+    key.flip_bit(7)
+    key.flip_bit(49)
+    key.set_bit(0, 1 - key.get_bit(0))
+    key.set_bit(1, key.get_bit(1))
+    for start_index in range(key.get_size()):
+        for end_index in range(start_index, key.get_size() + 1):
+            assert parity_index.calculate_parity(start_index, end_index) == \
+                   scan_parity(key, shuffle, start_index, end_index)
+    key.remove_parity_index(shuffle)
+    assert key.get_parity_index(shuffle) is None
+    # Without the index, the parity index does not follow the key anymore.
+    key.flip_bit(7)
+    assert parity_index.calculate_parity(0, 50) != scan_parity(key, shuffle, 0, 50)
+
+def test_shuffle_calculate_parity_uses_parity_index():
+    Key.set_random_seed(4231)
+    Shuffle.set_random_seed(4232)
+    key = Key.create_random_key(20)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    parity_index = ParityIndex(key, shuffle)
+    key.add_parity_index(parity_index)
+    # Corrupt the index to check that Shuffle.calculate_parity really uses it.
+    parity_index.flip_key_bit(shuffle.get_key_index(0))
+    assert shuffle.calculate_parity(key, 0, 20) != scan_parity(key, shuffle, 0, 20)
+    key.remove_all_parity_indexes()
+    assert shuffle.calculate_parity(key, 0, 20) == scan_parity(key, shuffle, 0, 20)
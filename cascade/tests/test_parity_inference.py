@@ -0,0 +1,63 @@
+from cascade.parity_inference import ParityInference
+
+def test_create_parity_inference():
+    inference = ParityInference(16)
+    assert inference.get_parity(1, 0, 8) is None
+    assert inference.get_equation_count() == 0
+    assert inference.get_redundant_equation_count() == 0
+
+def test_get_parity_revealed():
+    inference = ParityInference(16)
+    inference.add_parity(1, 0, 8, 1)
+    assert inference.get_parity(1, 0, 8) == 1
+    assert inference.get_parity(1, 0, 4) is None
+    # Ranges of other shuffles are not related.
+    assert inference.get_parity(2, 0, 8) is None
+
+def test_get_parity_sibling():
+    inference = ParityInference(16)
+    inference.add_parity(1, 0, 8, 1)
+    inference.add_parity(1, 0, 4, 1)
+    assert inference.get_parity(1, 4, 8) == 0
+    inference.add_parity(1, 4, 6, 1)
+    assert inference.get_parity(1, 6, 8) == 1
+
+def test_get_parity_parent():
+    inference = ParityInference(16)
+    inference.add_parity(1, 2, 5, 1)
+    inference.add_parity(1, 5, 11, 0)
+    assert inference.get_parity(1, 2, 11) == 1
+    assert inference.get_parity(1, 2, 12) is None
+
+def test_get_parity_whole_key():
+    inference = ParityInference(16)
+    inference.add_parity(1, 0, 8, 1)
+    inference.add_parity(1, 8, 16, 0)
+    # The parity of the whole key is the same for every shuffle.
+    assert inference.get_parity(2, 0, 16) == 1
+    inference.add_parity(2, 0, 5, 0)
+    inference.add_parity(2, 5, 10, 1)
+    assert inference.get_parity(2, 10, 16) == 0
+    assert inference.get_parity(2, 5, 16) == 1
+
+def test_redundant_equations():
+    inference = ParityInference(16)
+    inference.add_parity(1, 0, 8, 1)
+    inference.add_parity(1, 0, 4, 0)
+    inference.add_parity(1, 4, 8, 1)
+    assert inference.get_equation_count() == 3
+    assert inference.get_redundant_equation_count() == 1
+    assert inference.get_step_count() > 0
+
+def test_get_implied_questions():
+    inference = ParityInference(16)
+    inference.add_parity(1, 0, 8, 1)
+    inference.add_parity(1, 8, 16, 0)
+    questions = [(2, 0, 5), (2, 5, 10), (2, 10, 16), (2, 0, 10), (2, 3, 4)]
+    assert inference.get_implied_questions(questions) == [False, False, True, True, False]
+    # Asking does not reveal anything yet.
+    assert inference.get_parity(2, 10, 16) is None
+    inference.add_parity(2, 0, 5, 1)
+    inference.add_parity(2, 5, 10, 1)
+    assert inference.get_parity(2, 10, 16) == 1
+    assert inference.get_parity(2, 0, 10) == 0
@@ -0,0 +1,59 @@
+from cascade import parity_protocol
+
+def test_start():
+    message = parity_protocol.encode_start(12345)
+    assert parity_protocol.get_message_type(message) == parity_protocol.MESSAGE_START
+    assert parity_protocol.decode_start(message) == 12345
+
+def test_end():
+    message = parity_protocol.encode_end()
+    assert parity_protocol.get_message_type(message) == parity_protocol.MESSAGE_END
+
+def test_ask():
+    questions = [(10 ** 22 + 1000, 0, 8), (10 ** 22 + 1000, 8, 16), (5000, 3, 4)]
+    message = parity_protocol.encode_ask(questions)
+    assert parity_protocol.get_message_type(message) == parity_protocol.MESSAGE_ASK
+    assert parity_protocol.decode_ask(message) == questions
+    assert parity_protocol.decode_ask(parity_protocol.encode_ask([])) == []
+
+def test_ask_wire_order():
+    # Grouped by shuffle identifier in order of first appearance, sorted by range within a group.
+    questions = [(7, 100, 200), (3, 50, 60), (7, 0, 100), (7, 0, 50), (3, 0, 1), (7, 150, 200)]
+    wire_order = parity_protocol.get_wire_order(questions)
+    assert wire_order == [3, 2, 0, 5, 4, 1]
+    message = parity_protocol.encode_ask(questions, wire_order)
+    assert parity_protocol.decode_ask(message) == [questions[question_nr]
+                                                   for question_nr in wire_order]
+
+def test_ask_size():
+    # Consecutive ranges take one byte for the start and one or two bytes for the size.
+    identifier = 10 ** 22 + 1000
+    questions = [(identifier, start_index, start_index + 100)
+                 for start_index in range(0, 10_000, 100)]
+    message = parity_protocol.encode_ask(questions)
+    assert len(message) == 1 + 1 + 11 + 1 + 100 * 2
+    assert parity_protocol.decode_ask(message) == questions
+
+def test_reply():
+    parities = [0, 1, 1, 0, 1, 0, 0, 0, 1, 1]
+    wire_order = list(range(len(parities)))
+    message = parity_protocol.encode_reply(parities)
+    assert parity_protocol.get_message_type(message) == parity_protocol.MESSAGE_REPLY
+    assert len(message) == 3
+    assert parity_protocol.get_reply_size(len(parities)) == 3
+    assert parity_protocol.decode_reply(message, wire_order) == parities
+
+def test_reply_wire_order():
+    questions = [(7, 100, 200), (3, 50, 60), (7, 0, 100)]
+    parities = [1, 0, 0]
+    wire_order = parity_protocol.get_wire_order(questions)
+    message = parity_protocol.encode_reply([parities[question_nr] for question_nr in wire_order])
+    assert parity_protocol.decode_reply(message, wire_order) == parities
+
+def test_frame():
+    message = parity_protocol.encode_reply([1, 0])
+    frame = parity_protocol.encode_frame(message)
+    (message_size,) = parity_protocol.FRAME_HEADER.unpack(
+        frame[:parity_protocol.FRAME_HEADER.size])
+    assert message_size == len(message)
+    assert frame[parity_protocol.FRAME_HEADER.size:] == message
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+
+from cascade.async_socket_classical_channel import AsyncSocketClassicalChannel
+from cascade.key import Key
+from cascade.key_store import KeyStore
+from cascade import parity_protocol
+from cascade.parity_server import ParityServer
+from cascade.reconciliation import Reconciliation
+from cascade.recording_classical_channel import RecordingClassicalChannel
+from cascade.shuffle import Shuffle
+from cascade.socket_classical_channel import SocketClassicalChannel
+
+def create_key_store(tmp_path, seed, key_count, key_size):
+    Key.set_random_seed(seed)
+    Shuffle.set_random_seed(seed + 1)
+    correct_keys = [Key.create_random_key(key_size) for _ in range(key_count)]
+    path = str(tmp_path / "keys")
+    KeyStore.write(path, correct_keys)
+    return (KeyStore(path), correct_keys)
+
+def test_reconcile_over_unix_socket(tmp_path):
+    (key_store, correct_keys) = create_key_store(tmp_path, 1, 20, 2000)
+
+    async def reconcile_all():
+        server = ParityServer(key_store)
+        address = await server.start(str(tmp_path / "socket"))
+        reconciliations = []
+        channels = []
+        for (key_number, correct_key) in enumerate(correct_keys):
+            noisy_key = correct_key.copy(0.05, Key.ERROR_METHOD_EXACT)
+            channel = AsyncSocketClassicalChannel(address, key_number)
+            channels.append(channel)
+            reconciliations.append(Reconciliation("original", channel, noisy_key, 0.05))
+        reconciled_keys = await asyncio.gather(*(reconciliation.reconcile_async()
+                                                 for reconciliation in reconciliations))
+        for channel in channels:
+            await channel.close()
+        await server.close()
+        return (server, reconciled_keys, reconciliations)
+
+    (server, reconciled_keys, reconciliations) = asyncio.run(reconcile_all())
+    for (reconciled_key, correct_key) in zip(reconciled_keys, correct_keys):
+        assert reconciled_key.__str__() == correct_key.__str__()
+    assert server.get_session_count() == 20
+    assert server.get_active_session_count() == 0
+    assert server.get_ask_message_count() == sum(reconciliation.stats.ask_parity_messages
+                                                 for reconciliation in reconciliations)
+    key_store.close()
+
+def test_reconcile_over_tcp(tmp_path):
+    (key_store, correct_keys) = create_key_store(tmp_path, 2, 3, 5000)
+    loop = asyncio.new_event_loop()
+    server = ParityServer(key_store)
+    address = loop.run_until_complete(server.start(("127.0.0.1", 0)))
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        # One synchronous channel (i.e. one connection) for several reconciliations in a row.
+        channel = SocketClassicalChannel(address, 0)
+        recording_channel = RecordingClassicalChannel(channel)
+        reconciliation = None
+        for (key_number, correct_key) in enumerate(correct_keys):
+            noisy_key = correct_key.copy(0.05, Key.ERROR_METHOD_EXACT)
+            channel.set_key_number(key_number)
+            if reconciliation is None:
+                reconciliation = Reconciliation("biconf", recording_channel, noisy_key, 0.05)
+            else:
+                reconciliation.reset(noisy_key, 0.05)
+            message_count = len(recording_channel.get_transcript())
+            reconciled_key = reconciliation.reconcile()
+            assert reconciled_key.__str__() == correct_key.__str__()
+            # The stats count the sizes of the messages that were actually sent and received.
+            transcript = recording_channel.get_transcript()[message_count:]
+            stats = reconciliation.stats
+            assert stats.ask_parity_bits == sum(8 * len(parity_protocol.encode_ask(questions))
+                                                for (questions, _parities) in transcript)
+            assert stats.reply_parity_bits == sum(8 * len(parity_protocol.encode_reply(parities))
+                                                  for (_questions, parities) in transcript)
+        channel.close()
+    finally:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    assert server.get_session_count() == 3
+    key_store.close()
+
+def test_drop_connection_on_bad_message(tmp_path):
+    (key_store, correct_keys) = create_key_store(tmp_path, 3, 2, 1000)
+    identifier = Shuffle(1000, Shuffle.SHUFFLE_RANDOM).get_identifier()
+    # pylint:disable=protected-access
+    unknown_algorithm_identifier = Shuffle._encode_identifier(1000, 99, 1)
+    valid_ask = parity_protocol.encode_ask([(identifier, 0, 500)])
+    bad_messages = [
+        b"",
+        parity_protocol.encode_start(0)[:-1],
+        parity_protocol.encode_start(2),
+        valid_ask[:-1],
+        bytes([parity_protocol.MESSAGE_ASK, 1]),
+        bytes([parity_protocol.MESSAGE_ASK, 1, 0x80]),
+        bytes([parity_protocol.MESSAGE_REPLY]),
+        parity_protocol.encode_ask([(Shuffle(999, Shuffle.SHUFFLE_RANDOM).get_identifier(), 0, 1)]),
+        parity_protocol.encode_ask([(unknown_algorithm_identifier, 0, 1)]),
+        parity_protocol.encode_ask([(identifier, 0, 500), (identifier, 500, 500)]),
+        parity_protocol.encode_ask([(identifier, -1, 500)]),
+        parity_protocol.encode_ask([(identifier, 500, 1001)]),
+    ]
+
+    async def send_bad_messages():
+        server = ParityServer(key_store)
+        address = await server.start(str(tmp_path / "socket"))
+        for bad_message in bad_messages:
+            (reader, writer) = await asyncio.open_unix_connection(address)
+            writer.write(parity_protocol.encode_frame(parity_protocol.encode_start(0)))
+            writer.write(parity_protocol.encode_frame(valid_ask))
+            writer.write(parity_protocol.encode_frame(bad_message))
+            await writer.drain()
+            # The valid question is answered, and then the connection is dropped.
+            reply_size = parity_protocol.FRAME_HEADER.size + len(parity_protocol.encode_reply([0]))
+            assert len(await reader.readexactly(reply_size)) == reply_size
+            assert await asyncio.wait_for(reader.read(), 10) == b""
+            writer.close()
+            await writer.wait_closed()
+            # The server keeps serving other sessions.
+            noisy_key = correct_keys[1].copy(0.05, Key.ERROR_METHOD_EXACT)
+            channel = AsyncSocketClassicalChannel(address, 1)
+            reconciliation = Reconciliation("original", channel, noisy_key, 0.05)
+            reconciled_key = await reconciliation.reconcile_async()
+            assert reconciled_key.__str__() == correct_keys[1].__str__()
+            await channel.close()
+        await server.close()
+        return server
+
+    server = asyncio.run(send_bad_messages())
+    assert server.get_session_count() == 2 * len(bad_messages)
+    assert server.get_active_session_count() == 0
+    key_store.close()
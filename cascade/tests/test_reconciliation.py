@@ -1,15 +1,25 @@
+import asyncio
+
+import cascade.algorithm
+import cascade.reconciliation
+from cascade.algorithm import ALGORITHMS, Algorithm, get_algorithm_by_name
+from cascade.async_mock_classical_channel import AsyncMockClassicalChannel
 from cascade.key import Key
 from cascade.mock_classical_channel import MockClassicalChannel
+from cascade import parity_protocol
+from cascade.parity_index import ParityIndex
 from cascade.reconciliation import Reconciliation
+from cascade.recording_classical_channel import RecordingClassicalChannel
 from cascade.shuffle import Shuffle
 
-def create_reconciliation(seed, algorithm, key_size, error_rate):
+def create_reconciliation(seed, algorithm, key_size, error_rate, **kwargs):
     Key.set_random_seed(seed)
     Shuffle.set_random_seed(seed + 1)
     correct_key = Key.create_random_key(key_size)
     noisy_key = correct_key.copy(error_rate, Key.ERROR_METHOD_EXACT)
     mock_classical_channel = MockClassicalChannel(correct_key)
-    reconciliation = Reconciliation(algorithm, mock_classical_channel, noisy_key, error_rate)
+    reconciliation = Reconciliation(algorithm, mock_classical_channel, noisy_key, error_rate,
+                                    **kwargs)
     return (reconciliation, correct_key)
 
 def test_create_reconciliation():
@@ -76,3 +86,348 @@ def test_reconcile_tiny_key():
     (reconciliation, correct_key) = create_reconciliation(11, "original", 1, 0.01)
     reconciliation.reconcile()
     assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+
+def test_reconcile_shuffle_random_fast():
+    shuffle_algorithm = Shuffle.SHUFFLE_RANDOM_FAST
+    (reconciliation, correct_key) = create_reconciliation(12, "biconf", 10000, 0.02,
+                                                          shuffle_algorithm=shuffle_algorithm)
+    reconciliation.reconcile()
+    assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+
+def test_reconcile_block_trees():
+    for (seed, algorithm) in enumerate(["original", "biconf", "yanetal", "option7"]):
+        block_memory_bytes = {}
+        for block_representation in Reconciliation.BLOCK_REPRESENTATIONS:
+            (reconciliation, correct_key) = create_reconciliation(13 + seed, algorithm, 10000, 0.02,
+                                                                  block_representation=
+                                                                  block_representation,
+                                                                  measure_block_memory=True)
+            reconciliation.reconcile()
+            assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+            stats = reconciliation.stats
+            assert stats.block_memory_bytes == sum(stats.block_memory_bytes_per_iteration)
+            block_memory_bytes[block_representation] = stats.block_memory_bytes
+        assert block_memory_bytes[Reconciliation.BLOCK_TREES] * 2 < \
+               block_memory_bytes[Reconciliation.BLOCK_OBJECTS]
+
+def test_reconcile_block_memory_not_measured():
+    (reconciliation, _correct_key) = create_reconciliation(19, "original", 1000, 0.02)
+    reconciliation.reconcile()
+    assert reconciliation.stats.block_memory_bytes == 0
+    assert reconciliation.stats.block_memory_bytes_per_iteration == []
+
+def test_reconcile_avoided_parity_scans():
+    for block_representation in Reconciliation.BLOCK_REPRESENTATIONS:
+        (reconciliation, correct_key) = create_reconciliation(17, "original", 10000, 0.02,
+                                                              block_representation=
+                                                              block_representation)
+        reconciliation.reconcile()
+        assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+        assert reconciliation.stats.avoided_parity_scans > 0
+
+def test_reconcile_shuffle_random_implicit():
+    shuffle_algorithm = Shuffle.SHUFFLE_RANDOM_IMPLICIT
+    (reconciliation, correct_key) = create_reconciliation(18, "biconf", 2000, 0.02,
+                                                          shuffle_algorithm=shuffle_algorithm)
+    reconciliation.reconcile()
+    assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+
+def test_reconcile_is_deterministic():
+    transcript_stats = []
+    for _ in range(2):
+        (reconciliation, correct_key) = create_reconciliation(20, "original", 10000, 0.05)
+        reconciliation.reconcile()
+        assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+        stats = reconciliation.stats
+        transcript_stats.append((stats.ask_parity_messages, stats.ask_parity_blocks,
+                                 stats.ask_parity_bits, stats.infer_parity_blocks))
+    assert transcript_stats[0] == transcript_stats[1]
+
+def test_reconcile_engines_are_equivalent():
+    for (seed, algorithm) in enumerate(ALGORITHMS):
+        results = []
+        for engine in Reconciliation.ENGINES:
+            Key.set_random_seed(30 + seed)
+            Shuffle.set_random_seed(31 + seed)
+            correct_key = Key.create_random_key(2000)
+            noisy_key = correct_key.copy(0.05, Key.ERROR_METHOD_EXACT)
+            channel = RecordingClassicalChannel(MockClassicalChannel(correct_key))
+            reconciliation = Reconciliation(algorithm, channel, noisy_key, 0.05, engine=engine)
+            reconciled_key = reconciliation.reconcile()
+            assert reconciled_key.__str__() == correct_key.__str__()
+            results.append((reconciled_key.__str__(), channel.get_transcript()))
+        for result in results[1:]:
+            assert result == results[0]
+
+def test_reset():
+    for block_representation in Reconciliation.BLOCK_REPRESENTATIONS:
+        reconciliation = None
+        for seed in range(3):
+            Key.set_random_seed(40 + seed)
+            Shuffle.set_random_seed(41 + seed)
+            correct_key = Key.create_random_key(5000)
+            noisy_key = correct_key.copy(0.05, Key.ERROR_METHOD_EXACT)
+            channel = MockClassicalChannel(correct_key)
+            if reconciliation is None:
+                reconciliation = Reconciliation("option7", channel, noisy_key, 0.05,
+                                                block_representation=block_representation)
+            else:
+                reconciliation.reset(noisy_key, 0.05, channel)
+            reconciled_key = reconciliation.reconcile()
+            assert reconciled_key.__str__() == correct_key.__str__()
+            # A reconciliation with a new Reconciliation object sends the same messages.
+            (new_reconciliation, _correct_key) = create_reconciliation(40 + seed, "option7", 5000,
+                                                                       0.05)
+            new_reconciliation.reconcile()
+            assert reconciliation.stats.ask_parity_blocks == \
+                new_reconciliation.stats.ask_parity_blocks
+            assert reconciliation.stats.ask_parity_messages == \
+                new_reconciliation.stats.ask_parity_messages
+
+def test_reconcile_noisy_key_modes():
+    for noisy_key_mode in Reconciliation.NOISY_KEY_MODES:
+        (reconciliation, correct_key) = create_reconciliation(50, "original", 5000, 0.05,
+                                                              noisy_key_mode=noisy_key_mode)
+        noisy_key = reconciliation.get_noisy_key()
+        noisy_key_string = noisy_key.__str__()
+        reconciled_key = reconciliation.reconcile()
+        assert reconciled_key.__str__() == correct_key.__str__()
+        if noisy_key_mode == Reconciliation.NOISY_KEY_IN_PLACE:
+            assert reconciled_key is noisy_key
+        else:
+            assert reconciled_key is not noisy_key
+            assert noisy_key.__str__() == noisy_key_string
+
+def test_reconcile_live_blocks():
+    for block_representation in Reconciliation.BLOCK_REPRESENTATIONS:
+        for algorithm in ["original", "biconf", "option7"]:
+            (reconciliation, correct_key) = create_reconciliation(
+                60, algorithm, 10000, 0.05, block_representation=block_representation)
+            reconciliation.reconcile()
+            assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+            stats = reconciliation.stats
+            live_blocks = stats.live_blocks_per_iteration
+            assert len(live_blocks) == stats.normal_iterations + stats.biconf_iterations
+            # Blocks are only added during the normal iterations, so the number of live blocks
+            # peaks at the end of the last normal iteration.
+            assert stats.peak_live_blocks == live_blocks[stats.normal_iterations - 1]
+            assert live_blocks[:stats.normal_iterations] == \
+                sorted(live_blocks[:stats.normal_iterations])
+            if stats.biconf_iterations > 0:
+                # Without cascading in BICONF, the blocks of the normal iterations are pruned when
+                # the BICONF iterations start, and the blocks of each BICONF iteration when it ends.
+                assert stats.pruned_blocks > stats.peak_live_blocks
+                assert live_blocks[stats.normal_iterations:] == [0] * stats.biconf_iterations
+            else:
+                assert stats.pruned_blocks == 0
+
+def test_reconcile_biconf_cascade(monkeypatch):
+    # None of the predefined algorithms cascades during BICONF, so define such algorithms, without
+    # leaving them registered after the test.
+    monkeypatch.setattr(cascade.algorithm, "ALGORITHMS", dict(ALGORITHMS))
+    # Count the parity indexes that are built.
+    parity_indexes = []
+    class CountingParityIndex(ParityIndex):
+        def __init__(self, key, shuffle):
+            super().__init__(key, shuffle)
+            parity_indexes.append(shuffle)
+    monkeypatch.setattr(cascade.reconciliation, "ParityIndex", CountingParityIndex)
+    block_size_function = get_algorithm_by_name("biconf").block_size_function
+    for biconf_correct_complement in [False, True]:
+        name = f"biconf-cascade-{biconf_correct_complement}"
+        Algorithm(name=name, cascade_iterations=2, block_size_function=block_size_function,
+                  biconf_iterations=5, biconf_error_free_streak=True,
+                  biconf_correct_complement=biconf_correct_complement, biconf_cascade=True,
+                  sub_block_reuse=True, block_parity_inference=False)
+        results = []
+        for engine in Reconciliation.ENGINES:
+            Key.set_random_seed(70)
+            Shuffle.set_random_seed(71)
+            correct_key = Key.create_random_key(3000)
+            noisy_key = correct_key.copy(0.08, Key.ERROR_METHOD_EXACT)
+            channel = RecordingClassicalChannel(MockClassicalChannel(correct_key))
+            reconciliation = Reconciliation(name, channel, noisy_key, 0.08, engine=engine)
+            parity_indexes.clear()
+            reconciled_key = reconciliation.reconcile()
+            assert reconciled_key.__str__() == correct_key.__str__()
+            assert reconciliation.stats.biconf_iterations >= 5
+            assert reconciliation.stats.pruned_blocks == 0
+            # The last 5 BICONF iterations find no errors, so they don't build a parity index.
+            assert len(parity_indexes) <= 2 + reconciliation.stats.biconf_iterations - 5
+            results.append(channel.get_transcript())
+        for result in results[1:]:
+            assert result == results[0]
+
+def test_reconcile_ask_parity_cache():
+    for algorithm in ["original", "option8"]:
+        Key.set_random_seed(80)
+        Shuffle.set_random_seed(81)
+        correct_key = Key.create_random_key(5000)
+        noisy_key = correct_key.copy(0.1, Key.ERROR_METHOD_EXACT)
+        channel = RecordingClassicalChannel(MockClassicalChannel(correct_key))
+        reconciliation = Reconciliation(algorithm, channel, noisy_key, 0.1)
+        reconciled_key = reconciliation.reconcile()
+        assert reconciled_key.__str__() == correct_key.__str__()
+        # No message asks the same question twice.
+        for (questions, _parities) in channel.get_transcript():
+            assert len(set(questions)) == len(questions)
+        stats = reconciliation.stats
+        assert (sum(len(parities) for (_questions, parities) in channel.get_transcript()) ==
+                stats.ask_parity_blocks)
+        if algorithm == "option8":
+            # With sub-block reuse, a sub-block that is waiting for its correct parity is often
+            # scheduled again because of a cascading correction.
+            assert stats.ask_parity_cache_hits > 0
+
+def test_reconcile_biconf_complement_parity_is_derived(monkeypatch):
+    monkeypatch.setattr(cascade.algorithm, "ALGORITHMS", dict(ALGORITHMS))
+    Algorithm(name="biconf-complement", cascade_iterations=2,
+              block_size_function=get_algorithm_by_name("biconf").block_size_function,
+              biconf_iterations=10, biconf_error_free_streak=False,
+              biconf_correct_complement=True, biconf_cascade=False, sub_block_reuse=False,
+              block_parity_inference=False)
+    (reconciliation, correct_key) = create_reconciliation(82, "biconf-complement", 3000, 0.05)
+    reconciliation.reconcile()
+    assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+    # The correct parity of the complement of every BICONF block is derived from the correct
+    # parity of the chosen block and of the whole key.
+    assert reconciliation.stats.biconf_derived_complement_parities >= 10
+    assert reconciliation.stats.ask_parity_cache_hits == 0
+
+def test_reconcile_block_parity_inference(monkeypatch):
+    monkeypatch.setattr(cascade.algorithm, "ALGORITHMS", dict(ALGORITHMS))
+    option7 = get_algorithm_by_name("option7")
+    Algorithm(name="option7-inference", cascade_iterations=option7.cascade_iterations,
+              block_size_function=option7.block_size_function,
+              biconf_iterations=option7.biconf_iterations,
+              biconf_error_free_streak=option7.biconf_error_free_streak,
+              biconf_correct_complement=option7.biconf_correct_complement,
+              biconf_cascade=option7.biconf_cascade, sub_block_reuse=option7.sub_block_reuse,
+              block_parity_inference=True)
+    (reconciliation, _correct_key) = create_reconciliation(83, "option7", 5000, 0.05)
+    reconciliation.reconcile()
+    stats = reconciliation.stats
+    (reconciliation, correct_key) = create_reconciliation(83, "option7-inference", 5000, 0.05)
+    reconciliation.reconcile()
+    assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+    inference_stats = reconciliation.stats
+    # The last top-level block of every normal iteration after the first is implied by the other
+    # top-level blocks and the parity of the whole key.
+    assert (inference_stats.ask_parity_blocks ==
+            stats.ask_parity_blocks - (option7.cascade_iterations - 1))
+    assert inference_stats.parity_inference_equations == inference_stats.ask_parity_blocks
+    assert inference_stats.parity_inference_steps > 0
+
+def test_reconcile_prefetch_top_block_parities(monkeypatch):
+    monkeypatch.setattr(cascade.algorithm, "ALGORITHMS", dict(ALGORITHMS))
+    option3 = get_algorithm_by_name("option3")
+    Algorithm(name="option3-prefetch", cascade_iterations=option3.cascade_iterations,
+              block_size_function=option3.block_size_function,
+              biconf_iterations=option3.biconf_iterations,
+              biconf_error_free_streak=option3.biconf_error_free_streak,
+              biconf_correct_complement=option3.biconf_correct_complement,
+              biconf_cascade=option3.biconf_cascade, sub_block_reuse=option3.sub_block_reuse,
+              block_parity_inference=option3.block_parity_inference,
+              prefetch_top_block_parities=True)
+    (reconciliation, _correct_key) = create_reconciliation(84, "option3", 5000, 0.05)
+    reconciliation.reconcile()
+    stats = reconciliation.stats
+    assert stats.prefetch_saved_messages == 0
+    (reconciliation, correct_key) = create_reconciliation(84, "option3-prefetch", 5000, 0.05)
+    reconciliation.reconcile()
+    assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+    prefetch_stats = reconciliation.stats
+    # The shuffles are the same, so the same blocks are asked, but the top-level blocks of every
+    # normal iteration after the first don't need a message of their own.
+    assert prefetch_stats.ask_parity_blocks == stats.ask_parity_blocks
+    assert prefetch_stats.prefetch_saved_messages == option3.cascade_iterations - 1
+    assert (prefetch_stats.ask_parity_messages ==
+            stats.ask_parity_messages - prefetch_stats.prefetch_saved_messages)
+
+def test_reconcile_binary_speculation_depth(monkeypatch):
+    monkeypatch.setattr(cascade.algorithm, "ALGORITHMS", dict(ALGORITHMS))
+    original = get_algorithm_by_name("original")
+    for depth in [2, 3]:
+        Algorithm(name=f"original-speculation-{depth}",
+                  cascade_iterations=original.cascade_iterations,
+                  block_size_function=original.block_size_function,
+                  biconf_iterations=original.biconf_iterations,
+                  biconf_error_free_streak=original.biconf_error_free_streak,
+                  biconf_correct_complement=original.biconf_correct_complement,
+                  biconf_cascade=original.biconf_cascade,
+                  sub_block_reuse=original.sub_block_reuse,
+                  block_parity_inference=original.block_parity_inference,
+                  binary_speculation_depth=depth)
+    (reconciliation, _correct_key) = create_reconciliation(85, "original", 5000, 0.02)
+    reconciliation.reconcile()
+    previous_stats = reconciliation.stats
+    assert previous_stats.speculative_ask_parity_blocks == 0
+    for depth in [2, 3]:
+        (reconciliation, correct_key) = create_reconciliation(85, f"original-speculation-{depth}",
+                                                              5000, 0.02)
+        reconciliation.reconcile()
+        assert reconciliation.get_reconciled_key().__str__() == correct_key.__str__()
+        stats = reconciliation.stats
+        # Deeper speculation needs fewer messages, but asks for more parities.
+        assert stats.ask_parity_messages < previous_stats.ask_parity_messages
+        assert stats.ask_parity_blocks > previous_stats.ask_parity_blocks
+        assert stats.speculative_ask_parity_blocks > previous_stats.speculative_ask_parity_blocks
+        previous_stats = stats
+
+def test_reconcile_async():
+    (reconciliation, _correct_key) = create_reconciliation(86, "option7", 3000, 0.05)
+    reconciliation.reconcile()
+    stats = reconciliation.stats
+    Key.set_random_seed(86)
+    Shuffle.set_random_seed(87)
+    correct_key = Key.create_random_key(3000)
+    noisy_key = correct_key.copy(0.05, Key.ERROR_METHOD_EXACT)
+    async_reconciliation = Reconciliation("option7", AsyncMockClassicalChannel(correct_key),
+                                          noisy_key, 0.05)
+    reconciled_key = asyncio.run(async_reconciliation.reconcile_async())
+    assert reconciled_key.__str__() == correct_key.__str__()
+    assert async_reconciliation.stats.ask_parity_messages == stats.ask_parity_messages
+    assert async_reconciliation.stats.ask_parity_blocks == stats.ask_parity_blocks
+
+def test_reconcile_async_concurrently():
+    Key.set_random_seed(88)
+    reconciliations = []
+    correct_keys = []
+    for _ in range(20):
+        correct_key = Key.create_random_key(1000)
+        noisy_key = correct_key.copy(0.05, Key.ERROR_METHOD_EXACT)
+        channel = AsyncMockClassicalChannel(correct_key, 0.001)
+        reconciliations.append(Reconciliation("original", channel, noisy_key, 0.05))
+        correct_keys.append(correct_key)
+
+    async def reconcile_all():
+        return await asyncio.gather(*(reconciliation.reconcile_async()
+                                      for reconciliation in reconciliations))
+
+    reconciled_keys = asyncio.run(reconcile_all())
+    for (reconciled_key, correct_key) in zip(reconciled_keys, correct_keys):
+        assert reconciled_key.__str__() == correct_key.__str__()
+
+def test_reconcile_async_with_synchronous_channel():
+    (reconciliation, correct_key) = create_reconciliation(89, "biconf", 2000, 0.05)
+    reconciled_key = asyncio.run(reconciliation.reconcile_async())
+    assert reconciled_key.__str__() == correct_key.__str__()
+
+def test_reconcile_parity_bits_are_wire_sizes():
+    Key.set_random_seed(90)
+    Shuffle.set_random_seed(91)
+    correct_key = Key.create_random_key(5000)
+    noisy_key = correct_key.copy(0.05, Key.ERROR_METHOD_EXACT)
+    channel = RecordingClassicalChannel(MockClassicalChannel(correct_key))
+    reconciliation = Reconciliation("option7", channel, noisy_key, 0.05)
+    reconciliation.reconcile()
+    stats = reconciliation.stats
+    transcript = channel.get_transcript()
+    assert stats.ask_parity_bits == sum(8 * len(parity_protocol.encode_ask(questions))
+                                        for (questions, _parities) in transcript)
+    assert stats.reply_parity_bits == sum(8 * len(parity_protocol.encode_reply(parities))
+                                          for (_questions, parities) in transcript)
+    # The ranges of a message take far fewer bits than the shuffle identifier, the start index
+    # and the end index would take separately.
+    assert stats.ask_parity_bits < 40 * stats.ask_parity_blocks
+    assert stats.reply_parity_bits < 2 * stats.ask_parity_blocks + 16 * stats.ask_parity_messages
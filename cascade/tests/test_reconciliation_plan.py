@@ -0,0 +1,55 @@
+import copy
+from cascade.algorithm import get_algorithm_by_name
+from cascade.reconciliation_plan import ReconciliationPlan
+from cascade.shuffle import Shuffle
+
+def test_create_plan():
+    algorithm = get_algorithm_by_name("original")
+    plan = ReconciliationPlan(algorithm, 1000, 0.01)
+    assert plan.get_algorithm() == algorithm
+    assert plan.get_key_size() == 1000
+    assert plan.get_estimated_bit_error_rate() == 0.01
+    for iteration_nr in range(1, algorithm.cascade_iterations + 1):
+        block_size = algorithm.block_size_function(0.01, 1000, iteration_nr)
+        assert plan.get_block_size(iteration_nr) == block_size
+        top_block_boundaries = plan.get_top_block_boundaries(iteration_nr)
+        assert list(top_block_boundaries) == list(range(0, 1000, block_size)) + [1000]
+        assert list(plan.get_shuffle_ranges(iteration_nr)) == \
+            list(zip(top_block_boundaries, top_block_boundaries[1:]))
+    assert plan.get_top_block_boundaries(4) == (0, 584, 1000)
+    identity_shuffle = plan.get_identity_shuffle()
+    assert identity_shuffle.get_size() == 1000
+    assert identity_shuffle.get_identifier() == \
+        Shuffle(1000, Shuffle.SHUFFLE_KEEP_SAME).get_identifier()
+    assert plan.get_biconf_top_block_boundaries() == (0, 500)
+
+def test_biconf_correct_complement():
+    # None of the predefined algorithms corrects the complement, and creating a new Algorithm would
+    # register it, so use a modified copy.
+    algorithm = copy.copy(get_algorithm_by_name("option7"))
+    algorithm.biconf_correct_complement = True
+    plan = ReconciliationPlan(algorithm, 1001, 0.01)
+    assert plan.get_biconf_top_block_boundaries() == (0, 500, 1001)
+
+def test_get_plan():
+    ReconciliationPlan.clear_cache()
+    algorithm = get_algorithm_by_name("biconf")
+    plan = ReconciliationPlan.get_plan(algorithm, 1000, 0.01)
+    assert ReconciliationPlan.get_plan(algorithm, 1000, 0.01) is plan
+    assert ReconciliationPlan.get_plan(algorithm, 1000, 0.02) is not plan
+    assert ReconciliationPlan.get_plan(algorithm, 2000, 0.01) is not plan
+    assert ReconciliationPlan.get_plan(get_algorithm_by_name("original"), 1000, 0.01) is not plan
+    ReconciliationPlan.clear_cache()
+    assert ReconciliationPlan.get_plan(algorithm, 1000, 0.01) is not plan
+
+def test_get_plan_evicts_oldest_plan():
+    ReconciliationPlan.clear_cache()
+    algorithm = get_algorithm_by_name("original")
+    first_plan = ReconciliationPlan.get_plan(algorithm, 1, 0.01)
+    last_plan = None
+    for key_size in range(2, ReconciliationPlan.MAX_CACHED_PLANS + 2):
+        last_plan = ReconciliationPlan.get_plan(algorithm, key_size, 0.01)
+    assert ReconciliationPlan.get_plan(algorithm, ReconciliationPlan.MAX_CACHED_PLANS + 1,
+                                       0.01) is last_plan
+    assert ReconciliationPlan.get_plan(algorithm, 1, 0.01) is not first_plan
+    ReconciliationPlan.clear_cache()
@@ -0,0 +1,33 @@
+from cascade.block import Block
+from cascade.key import Key
+from cascade.mock_classical_channel import MockClassicalChannel
+from cascade.recording_classical_channel import RecordingClassicalChannel
+from cascade.shuffle import Shuffle
+
+def test_start_and_end_reconciliation():
+    Key.set_random_seed(1)
+    correct_key = Key.create_random_key(32)
+    channel = RecordingClassicalChannel(MockClassicalChannel(correct_key))
+    channel.start_reconciliation()
+    channel.end_reconciliation()
+    assert channel.get_transcript() == []
+
+def test_ask_parities():
+    Key.set_random_seed(2)
+    Shuffle.set_random_seed(3)
+    correct_key = Key.create_random_key(32)
+    shuffle = Shuffle(correct_key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    blocks = Block.create_covering_blocks(correct_key, shuffle, 8)
+    mock_channel = MockClassicalChannel(correct_key)
+    channel = RecordingClassicalChannel(mock_channel)
+    channel.start_reconciliation()
+    parities = channel.ask_parities(blocks)
+    assert parities == mock_channel.ask_parities(blocks)
+    assert parities == [block.get_current_parity() for block in blocks]
+    channel.ask_parities(blocks[1:2])
+    channel.end_reconciliation()
+    identifier = shuffle.get_identifier()
+    assert channel.get_transcript() == [
+        ([(identifier, 0, 8), (identifier, 8, 16), (identifier, 16, 24), (identifier, 24, 32)],
+         parities),
+        ([(identifier, 8, 16)], parities[1:2])]
@@ -66,6 +66,14 @@ def test_create_shuffle_from_identifier():
     recreated_shuffle = Shuffle.create_shuffle_from_identifier(original_shuffle.get_identifier())
     assert original_shuffle.__repr__() == recreated_shuffle.__repr__()
 
+def test_is_valid_identifier():
+    for algorithm in Shuffle.SHUFFLE_ALGORITHMS:
+        identifier = Shuffle(32, algorithm).get_identifier()
+        assert Shuffle.is_valid_identifier(identifier, 32)
+        assert not Shuffle.is_valid_identifier(identifier, 33)
+    # pylint:disable=protected-access
+    assert not Shuffle.is_valid_identifier(Shuffle._encode_identifier(32, 99, 1), 32)
+
 def test_encode_identifier():
     # pylint:disable=protected-access
     assert Shuffle._encode_identifier(0, 0, 0) == 0
@@ -171,3 +179,101 @@ def test_calculate_parity():
     assert shuffle.calculate_parity(key, 0, 10) == 1
     assert shuffle.calculate_parity(key, 4, 8) == 0
     assert shuffle.calculate_parity(key, 1, 2) == 1
+
+def test_get_shuffle_index():
+    Shuffle.set_random_seed(9992)
+    shuffle = Shuffle(6, Shuffle.SHUFFLE_RANDOM)
+    assert shuffle.__repr__() == "Shuffle: 0->5 1->4 2->2 3->0 4->1 5->3"
+    assert shuffle.get_shuffle_index(5) == 0
+    assert shuffle.get_shuffle_index(4) == 1
+    assert shuffle.get_shuffle_index(3) == 5
+    for shuffle_index in range(6):
+        assert shuffle.get_shuffle_index(shuffle.get_key_index(shuffle_index)) == shuffle_index
+    shuffle = Shuffle(6, Shuffle.SHUFFLE_KEEP_SAME)
+    assert shuffle.get_shuffle_index(4) == 4
+    assert shuffle.get_key_index(4) == 4
+
+def test_create_shuffle_random_fast():
+    Shuffle.set_random_seed(1112)
+
+    # Empty shuffle.
+    shuffle = Shuffle(0, Shuffle.SHUFFLE_RANDOM_FAST)
+    assert shuffle.__str__() == ""
+
+    # Non-empty shuffle.
+    shuffle = Shuffle(16, Shuffle.SHUFFLE_RANDOM_FAST, 1234)
+    assert shuffle.__str__() == ("0->11 1->15 2->1 3->8 4->6 5->2 6->14 7->5 8->12 "
+                                 "9->7 10->10 11->9 12->3 13->4 14->13 15->0")
+    for shuffle_index in range(16):
+        assert shuffle.get_shuffle_index(shuffle.get_key_index(shuffle_index)) == shuffle_index
+
+    # The shuffle can be recreated from its identifier.
+    shuffle = Shuffle(1000, Shuffle.SHUFFLE_RANDOM_FAST)
+    # pylint:disable=protected-access
+    assert Shuffle._decode_identifier(shuffle.get_identifier())[1] == Shuffle.SHUFFLE_RANDOM_FAST
+    recreated_shuffle = Shuffle.create_shuffle_from_identifier(shuffle.get_identifier())
+    assert shuffle.__repr__() == recreated_shuffle.__repr__()
+    assert sorted(shuffle.get_key_index(index) for index in range(1000)) == list(range(1000))
+
+def test_create_shuffle_random_implicit():
+    Key.set_random_seed(1111)
+    Shuffle.set_random_seed(1112)
+
+    # Empty and single bit shuffles.
+    assert Shuffle(0, Shuffle.SHUFFLE_RANDOM_IMPLICIT).__str__() == ""
+    assert Shuffle(1, Shuffle.SHUFFLE_RANDOM_IMPLICIT).__str__() == "0->0"
+
+    # Non-empty shuffle.
+    shuffle = Shuffle(16, Shuffle.SHUFFLE_RANDOM_IMPLICIT, 1234)
+    assert shuffle.__str__() == ("0->1 1->10 2->11 3->2 4->5 5->4 6->13 7->6 8->9 "
+                                 "9->8 10->3 11->0 12->7 13->14 14->15 15->12")
+
+    # Sizes that are not a power of 4 need cycle walking.
+    for size in [2, 3, 7, 100, 1001]:
+        shuffle = Shuffle(size, Shuffle.SHUFFLE_RANDOM_IMPLICIT)
+        key_indexes = [shuffle.get_key_index(index) for index in range(size)]
+        assert sorted(key_indexes) == list(range(size))
+        for shuffle_index in range(size):
+            assert shuffle.get_shuffle_index(key_indexes[shuffle_index]) == shuffle_index
+
+    # The shuffle can be recreated from its identifier.
+    key = Key.create_random_key(100)
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM_IMPLICIT)
+    recreated_shuffle = Shuffle.create_shuffle_from_identifier(shuffle.get_identifier())
+    assert shuffle.__repr__() == recreated_shuffle.__repr__()
+    assert shuffle.calculate_parity(key, 10, 60) == recreated_shuffle.calculate_parity(key, 10, 60)
+
+def test_get_shuffled_bits():
+    Key.set_random_seed(5551)
+    Shuffle.set_random_seed(5552)
+    key = Key.create_random_key(13)
+    assert key.__str__() == "1011010010010"
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM)
+    assert shuffle.__str__() == ("0->5 1->9 2->3 3->12 4->10 5->6 6->11 7->7 8->0 9->4 "
+                                 "10->1 11->2 12->8")
+    assert shuffle.get_shuffled_bits(key) == bytearray([1, 0, 1, 0, 0, 0, 1, 0, 1, 0, 0, 1, 1])
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_KEEP_SAME)
+    assert shuffle.get_shuffled_bits(key) == key.get_bits()
+    shuffle = Shuffle(key.get_size(), Shuffle.SHUFFLE_RANDOM_IMPLICIT)
+    shuffled_bits = shuffle.get_shuffled_bits(key)
+    for shuffle_index in range(key.get_size()):
+        assert shuffled_bits[shuffle_index] == shuffle.get_bit(key, shuffle_index)
+
+def test_is_implicit():
+    assert not Shuffle(8, Shuffle.SHUFFLE_KEEP_SAME).is_implicit()
+    assert not Shuffle(8, Shuffle.SHUFFLE_RANDOM).is_implicit()
+    assert not Shuffle(8, Shuffle.SHUFFLE_RANDOM_FAST).is_implicit()
+    assert Shuffle(8, Shuffle.SHUFFLE_RANDOM_IMPLICIT).is_implicit()
+
+def test_calculate_parities():
+    Key.set_random_seed(1236)
+    Shuffle.set_random_seed(1237)
+    key = Key.create_random_key(50)
+    for algorithm in [Shuffle.SHUFFLE_KEEP_SAME, Shuffle.SHUFFLE_RANDOM,
+                      Shuffle.SHUFFLE_RANDOM_FAST, Shuffle.SHUFFLE_RANDOM_IMPLICIT]:
+        shuffle = Shuffle(key.get_size(), algorithm)
+        # Ranges that cover the whole key, and ranges that cover only a small part of it.
+        for shuffle_ranges in [[(0, 10), (10, 25), (25, 50)], [(3, 4), (7, 9)], []]:
+            parities = shuffle.calculate_parities(key, shuffle_ranges)
+            assert parities == [shuffle.calculate_parity(key, start_index, end_index)
+                                for (start_index, end_index) in shuffle_ranges]
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import time
+
+from cascade.async_mock_classical_channel import AsyncMockClassicalChannel
+from cascade.key import Key
+from cascade.reconciliation import Reconciliation
+from cascade.shuffle import Shuffle
+
+def parse_command_line_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark concurrent async reconciliations over a channel with latency")
+    parser.add_argument('-a', '--algorithm', type=str, default="original",
+                        help="cascade algorithm")
+    parser.add_argument('-k', '--key-size', type=int, default=10_000, help="key size")
+    parser.add_argument('-e', '--error-rate', type=float, default=0.02, help="bit error rate")
+    parser.add_argument('-l', '--latency', type=float, default=10.0,
+                        help="round-trip latency of the classical channel in milliseconds")
+    parser.add_argument('-s', '--sessions', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help="numbers of concurrent reconciliations")
+    args = parser.parse_args()
+    return args
+
+def create_reconciliations(args, sessions):
+    Key.set_random_seed(1)
+    Shuffle.set_random_seed(2)
+    reconciliations = []
+    for _ in range(sessions):
+        correct_key = Key.create_random_key(args.key_size)
+        noisy_key = correct_key.copy(args.error_rate, Key.ERROR_METHOD_EXACT)
+        channel = AsyncMockClassicalChannel(correct_key, args.latency / 1000.0)
+        reconciliations.append(Reconciliation(args.algorithm, channel, noisy_key,
+                                              args.error_rate))
+    return reconciliations
+
+async def reconcile_concurrently(reconciliations):
+    await asyncio.gather(*(reconciliation.reconcile_async()
+                           for reconciliation in reconciliations))
+
+def run_sessions(args, sessions):
+    reconciliations = create_reconciliations(args, sessions)
+    start_process_time = time.process_time()
+    start_real_time = time.perf_counter()
+    asyncio.run(reconcile_concurrently(reconciliations))
+    elapsed_process_time = time.process_time() - start_process_time
+    elapsed_real_time = time.perf_counter() - start_real_time
+    messages = sum(reconciliation.stats.ask_parity_messages
+                   for reconciliation in reconciliations) / sessions
+    return (messages, elapsed_real_time, elapsed_process_time)
+
+def main():
+    args = parse_command_line_arguments()
+    # Without concurrency, the sessions would have to run one after the other (or in one OS thread
+    # each), so compare with the time that a single session takes.
+    (_messages, single_session_time, _process_time) = run_sessions(args, 1)
+    print(f"{'sessions':>8} {'messages':>8} {'elapsed_s':>9} {'process_s':>9} "
+          f"{'frames_per_s':>12} {'speedup':>7}")
+    for sessions in args.sessions:
+        (messages, elapsed_real_time, elapsed_process_time) = run_sessions(args, sessions)
+        speedup = sessions * single_session_time / elapsed_real_time
+        print(f"{sessions:>8} {messages:>8.1f} {elapsed_real_time:>9.2f} "
+              f"{elapsed_process_time:>9.2f} {sessions / elapsed_real_time:>12.1f} "
+              f"{speedup:>7.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import gc
+import time
+
+from cascade.key import Key
+from cascade.mock_classical_channel import MockClassicalChannel
+from cascade.reconciliation import Reconciliation
+from cascade.shuffle import Shuffle
+
+def parse_command_line_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark reusing a Reconciliation object for a sequence of frames")
+    parser.add_argument('-a', '--algorithm', type=str, default="original",
+                        help="cascade algorithm")
+    parser.add_argument('-k', '--key-size', type=int, default=10_000, help="key size")
+    parser.add_argument('-e', '--error-rate', type=float, default=0.02, help="bit error rate")
+    parser.add_argument('-f', '--frames', type=int, default=100, help="number of frames")
+    parser.add_argument('-b', '--block-representation', type=str,
+                        default=Reconciliation.BLOCK_OBJECTS,
+                        choices=Reconciliation.BLOCK_REPRESENTATIONS,
+                        help="block representation")
+    args = parser.parse_args()
+    return args
+
+def create_frames(key_size, error_rate, frames):
+    Key.set_random_seed(1)
+    Shuffle.set_random_seed(2)
+    keys = []
+    for _ in range(frames):
+        correct_key = Key.create_random_key(key_size)
+        keys.append((correct_key, correct_key.copy(error_rate, Key.ERROR_METHOD_EXACT)))
+    return keys
+
+def run_frames(args, keys, reuse):
+    reconciliation = None
+    gc.collect()
+    start_collections = sum(stats["collections"] for stats in gc.get_stats())
+    start_time = time.perf_counter()
+    for (correct_key, noisy_key) in keys:
+        channel = MockClassicalChannel(correct_key)
+        if reuse and reconciliation is not None:
+            reconciliation.reset(noisy_key, args.error_rate, channel)
+        else:
+            reconciliation = Reconciliation(args.algorithm, channel, noisy_key, args.error_rate,
+                                            block_representation=args.block_representation)
+        reconciliation.reconcile()
+    elapsed_time = time.perf_counter() - start_time
+    collections = sum(stats["collections"] for stats in gc.get_stats()) - start_collections
+    return (elapsed_time, collections)
+
+def main():
+    args = parse_command_line_arguments()
+    keys = create_frames(args.key_size, args.error_rate, args.frames)
+    print(f"{'mode':<6} {'frame_ms':>9} {'gc_collections':>14}")
+    for reuse in [False, True, False, True]:
+        (elapsed_time, collections) = run_frames(args, keys, reuse)
+        mode = "reset" if reuse else "new"
+        print(f"{mode:<6} {elapsed_time * 1000.0 / args.frames:>9.2f} {collections:>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import heapq
+import time
+
+from cascade.bucket_queue import BucketQueue
+from cascade.key import Key
+from cascade.mock_classical_channel import MockClassicalChannel
+from cascade.reconciliation import Reconciliation
+from cascade.shuffle import Shuffle
+
+class HeapQueue:
+    """
+    The scheduler that Reconciliation used before BucketQueue: a heap of (size, (block, flag))
+    tuples, where ties between blocks of the same size are broken by Block.__lt__.
+    """
+
+    def __init__(self):
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, block, flag):
+        heapq.heappush(self._heap, (block.get_size(), (block, flag)))
+
+    def pop(self):
+        (_size, entry) = heapq.heappop(self._heap)
+        return entry
+
+class RecordingQueue(BucketQueue):
+    """
+    A bucket queue that records the sequence of pushes and pops, so that it can be replayed.
+    """
+
+    def __init__(self):
+        BucketQueue.__init__(self)
+        self.trace = []
+
+    def push(self, block, flag):
+        self.trace.append((block, flag))
+        BucketQueue.push(self, block, flag)
+
+    def pop(self):
+        self.trace.append(None)
+        return BucketQueue.pop(self)
+
+SCHEDULERS = {
+    "bucket": BucketQueue,
+    "heap": HeapQueue,
+}
+
+def parse_command_line_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark Cascade pending correction schedulers")
+    parser.add_argument('-a', '--algorithm', type=str, default="original",
+                        help="cascade algorithm")
+    parser.add_argument('-k', '--key-size', type=int, default=100_000, help="key size")
+    parser.add_argument('-e', '--error-rate', type=float, nargs='+', default=[0.05, 0.10, 0.15],
+                        help="bit error rates to benchmark")
+    parser.add_argument('-r', '--runs', type=int, default=3,
+                        help="number of runs per scheduler and error rate")
+    args = parser.parse_args()
+    return args
+
+def create_reconciliation(algorithm, key_size, error_rate, seed, queue):
+    Key.set_random_seed(seed)
+    Shuffle.set_random_seed(seed + 1)
+    correct_key = Key.create_random_key(key_size)
+    noisy_key = correct_key.copy(error_rate, Key.ERROR_METHOD_EXACT)
+    reconciliation = Reconciliation(algorithm, MockClassicalChannel(correct_key), noisy_key,
+                                    error_rate)
+    # pylint:disable=protected-access
+    reconciliation._pending_try_correct = queue
+    return reconciliation
+
+def time_reconciliation(algorithm, key_size, error_rate, seed, scheduler):
+    reconciliation = create_reconciliation(algorithm, key_size, error_rate, seed,
+                                           SCHEDULERS[scheduler]())
+    start_time = time.perf_counter()
+    reconciliation.reconcile()
+    return time.perf_counter() - start_time
+
+def time_replay(trace, scheduler):
+    queue = SCHEDULERS[scheduler]()
+    start_time = time.perf_counter()
+    for entry in trace:
+        if entry is None:
+            queue.pop()
+        else:
+            queue.push(entry[0], entry[1])
+    return time.perf_counter() - start_time
+
+def main():
+    args = parse_command_line_arguments()
+    print(f"{'error_rate':>10} {'scheduler':<9} {'pushes':>8} {'queue_ms':>9} "
+          f"{'reconcile_ms':>13}")
+    for error_rate in args.error_rate:
+        recording_queue = RecordingQueue()
+        reconciliation = create_reconciliation(args.algorithm, args.key_size, error_rate, 1,
+                                               recording_queue)
+        reconciliation.reconcile()
+        trace = recording_queue.trace
+        pushes = sum(1 for entry in trace if entry is not None)
+        for scheduler in SCHEDULERS:
+            queue_time = min(time_replay(trace, scheduler) for _ in range(args.runs))
+            reconcile_time = min(time_reconciliation(args.algorithm, args.key_size, error_rate,
+                                                     run + 1, scheduler)
+                                 for run in range(args.runs))
+            print(f"{error_rate:>10} {scheduler:<9} {pushes:>8} {queue_time * 1000.0:>9.1f} "
+                  f"{reconcile_time * 1000.0:>13.1f}")
+
+if __name__ == "__main__":
+    main()
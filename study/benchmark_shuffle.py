@@ -0,0 +1,54 @@
+import argparse
+import time
+import tracemalloc
+
+from cascade.shuffle import Shuffle
+
+ALGORITHMS = {
+    "keep_same": Shuffle.SHUFFLE_KEEP_SAME,
+    "random": Shuffle.SHUFFLE_RANDOM,
+    "random_fast": Shuffle.SHUFFLE_RANDOM_FAST,
+    "random_implicit": Shuffle.SHUFFLE_RANDOM_IMPLICIT,
+}
+
+def parse_command_line_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark Cascade shuffle algorithms")
+    parser.add_argument('-a', '--algorithm', type=str, nargs='+', choices=list(ALGORITHMS),
+                        default=list(ALGORITHMS), help="shuffle algorithms to benchmark")
+    parser.add_argument('-k', '--key-size', type=int, nargs='+',
+                        default=[10_000, 100_000, 1_000_000], help="key sizes to benchmark")
+    parser.add_argument('-l', '--lookups', type=int, default=10_000,
+                        help="number of index lookups to time per shuffle")
+    args = parser.parse_args()
+    return args
+
+def benchmark_shuffle(algorithm, key_size, lookups):
+    # Measure memory in a separate construction, since tracing slows down the construction a lot.
+    tracemalloc.start()
+    shuffle = Shuffle(key_size, algorithm, 12345)
+    (memory, _peak_memory) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del shuffle
+    start_time = time.perf_counter()
+    shuffle = Shuffle(key_size, algorithm, 12345)
+    construction_time = time.perf_counter() - start_time
+    lookups = min(lookups, key_size)
+    start_time = time.perf_counter()
+    for shuffle_index in range(lookups):
+        shuffle.get_key_index(shuffle_index)
+    lookup_time = (time.perf_counter() - start_time) / lookups
+    return (construction_time, memory, lookup_time)
+
+def main():
+    args = parse_command_line_arguments()
+    print(f"{'algorithm':<16} {'key_size':>10} {'construct_ms':>13} {'memory_bytes':>13} "
+          f"{'lookup_us':>10}")
+    for algorithm_name in args.algorithm:
+        for key_size in args.key_size:
+            (construction_time, memory, lookup_time) = \
+                benchmark_shuffle(ALGORITHMS[algorithm_name], key_size, args.lookups)
+            print(f"{algorithm_name:<16} {key_size:>10} {construction_time * 1000.0:>13.3f} "
+                  f"{memory:>13} {lookup_time * 1_000_000.0:>10.3f}")
+
+if __name__ == "__main__":
+    main()
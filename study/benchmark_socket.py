@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import multiprocessing
+import os.path
+import statistics
+import tempfile
+import time
+
+from cascade.async_socket_classical_channel import AsyncSocketClassicalChannel
+from cascade.key import Key
+from cascade.key_store import KeyStore
+from cascade.reconciliation import Reconciliation
+from cascade.shuffle import Shuffle
+from cascade.socket_classical_channel import SocketClassicalChannel
+
+from study.run_parity_server import serve
+
+def parse_command_line_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark reconciliations against a parity server on localhost")
+    parser.add_argument('-a', '--algorithm', type=str, default="original",
+                        help="cascade algorithm")
+    parser.add_argument('-k', '--key-size', type=int, default=10_000, help="key size")
+    parser.add_argument('-e', '--error-rate', type=float, default=0.02, help="bit error rate")
+    parser.add_argument('-s', '--sessions', type=int, nargs='+', default=[1, 10, 1000],
+                        help="numbers of concurrent reconciliations")
+    parser.add_argument('--unix-socket', action='store_true',
+                        help="use a Unix domain socket instead of TCP")
+    args = parser.parse_args()
+    return args
+
+class TimedSocketClassicalChannel(SocketClassicalChannel):
+
+    def __init__(self, address, key_number):
+        super().__init__(address, key_number)
+        self.round_trip_times = []
+
+    def ask_parities(self, blocks):
+        start_time = time.perf_counter()
+        parities = super().ask_parities(blocks)
+        self.round_trip_times.append(time.perf_counter() - start_time)
+        return parities
+
+class TimedAsyncSocketClassicalChannel(AsyncSocketClassicalChannel):
+
+    def __init__(self, address, key_number):
+        super().__init__(address, key_number)
+        self.round_trip_times = []
+
+    async def ask_parities(self, blocks):
+        start_time = time.perf_counter()
+        parities = await super().ask_parities(blocks)
+        self.round_trip_times.append(time.perf_counter() - start_time)
+        return parities
+
+def run_server(key_store_path, address, ready):
+    asyncio.run(serve(key_store_path, address, ready))
+
+def create_noisy_keys(args, key_store_path, key_count):
+    Key.set_random_seed(1)
+    Shuffle.set_random_seed(2)
+    correct_keys = [Key.create_random_key(args.key_size) for _ in range(key_count)]
+    KeyStore.write(key_store_path, correct_keys)
+    return [correct_key.copy(args.error_rate, Key.ERROR_METHOD_EXACT)
+            for correct_key in correct_keys]
+
+def run_sync_session(args, address, noisy_key):
+    channel = TimedSocketClassicalChannel(address, 0)
+    reconciliation = Reconciliation(args.algorithm, channel, noisy_key, args.error_rate)
+    start_time = time.perf_counter()
+    reconciliation.reconcile()
+    elapsed_time = time.perf_counter() - start_time
+    channel.close()
+    return (elapsed_time, [channel])
+
+async def run_async_sessions(args, address, noisy_keys):
+    channels = [TimedAsyncSocketClassicalChannel(address, key_number)
+                for key_number in range(len(noisy_keys))]
+    reconciliations = [Reconciliation(args.algorithm, channel, noisy_key, args.error_rate)
+                       for (channel, noisy_key) in zip(channels, noisy_keys)]
+    start_time = time.perf_counter()
+    await asyncio.gather(*(reconciliation.reconcile_async()
+                           for reconciliation in reconciliations))
+    elapsed_time = time.perf_counter() - start_time
+    for channel in channels:
+        await channel.close()
+    return (elapsed_time, channels)
+
+def print_result(client, sessions, elapsed_time, channels):
+    round_trip_times = sorted(round_trip_time for channel in channels
+                              for round_trip_time in channel.round_trip_times)
+    p99_round_trip_time = round_trip_times[int(0.99 * (len(round_trip_times) - 1))]
+    print(f"{client:<6} {sessions:>8} {len(round_trip_times) / sessions:>8.1f} "
+          f"{elapsed_time:>9.2f} {sessions / elapsed_time:>12.1f} "
+          f"{statistics.mean(round_trip_times) * 1000.0:>8.2f} "
+          f"{p99_round_trip_time * 1000.0:>8.2f}")
+
+def main():
+    args = parse_command_line_arguments()
+    with tempfile.TemporaryDirectory() as directory:
+        key_store_path = os.path.join(directory, "keys")
+        noisy_keys = create_noisy_keys(args, key_store_path, max(args.sessions))
+        if args.unix_socket:
+            address = os.path.join(directory, "socket")
+        else:
+            address = ("127.0.0.1", 0)
+        # Run the server in its own process, so that it does not compete with the clients for the
+        # interpreter.
+        (ready_receiver, ready_sender) = multiprocessing.Pipe(duplex=False)
+        server_process = multiprocessing.Process(target=run_server,
+                                                 args=(key_store_path, address, ready_sender),
+                                                 daemon=True)
+        server_process.start()
+        address = ready_receiver.recv()
+        print(f"{'client':<6} {'sessions':>8} {'messages':>8} {'elapsed_s':>9} "
+              f"{'frames_per_s':>12} {'rtt_ms':>8} {'p99_ms':>8}")
+        (elapsed_time, channels) = run_sync_session(args, address, noisy_keys[0])
+        print_result("sync", 1, elapsed_time, channels)
+        for sessions in args.sessions:
+            (elapsed_time, channels) = asyncio.run(run_async_sessions(args, address,
+                                                                      noisy_keys[:sessions]))
+            print_result("async", sessions, elapsed_time, channels)
+        server_process.terminate()
+        server_process.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import sys
+
+from cascade.algorithm import ALGORITHMS
+from cascade.key import Key
+from cascade.mock_classical_channel import MockClassicalChannel
+from cascade.reconciliation import Reconciliation
+from cascade.recording_classical_channel import RecordingClassicalChannel
+from cascade.shuffle import Shuffle
+
+def parse_command_line_arguments():
+    parser = argparse.ArgumentParser(
+        description="Check that all Cascade engines produce bit-exact identical results")
+    parser.add_argument('-a', '--algorithm', type=str, nargs='+', choices=list(ALGORITHMS),
+                        default=list(ALGORITHMS), help="cascade algorithms to check")
+    parser.add_argument('-e', '--engine', type=str, nargs='+',
+                        choices=list(Reconciliation.ENGINES),
+                        default=list(Reconciliation.ENGINES),
+                        help="engines to check (the first one is the reference)")
+    parser.add_argument('-k', '--key-size', type=int, nargs='+', default=[1_000, 10_000],
+                        help="key sizes to check")
+    parser.add_argument('-b', '--error-rate', type=float, nargs='+', default=[0.01, 0.05, 0.1],
+                        help="bit error rates to check")
+    parser.add_argument('-s', '--seeds', type=int, default=3, help="number of seeds to check")
+    parser.add_argument('--shuffle-algorithm', type=int, default=Shuffle.SHUFFLE_RANDOM,
+                        help="shuffle algorithm")
+    args = parser.parse_args()
+    return args
+
+def run_engine(engine, algorithm, key_size, error_rate, seed, shuffle_algorithm):
+    Key.set_random_seed(seed)
+    Shuffle.set_random_seed(seed + 1)
+    correct_key = Key.create_random_key(key_size)
+    noisy_key = correct_key.copy(error_rate, Key.ERROR_METHOD_EXACT)
+    channel = RecordingClassicalChannel(MockClassicalChannel(correct_key))
+    reconciliation = Reconciliation(algorithm, channel, noisy_key, error_rate,
+                                    shuffle_algorithm=shuffle_algorithm, engine=engine)
+    reconciled_key = reconciliation.reconcile()
+    return (reconciled_key.__str__(), channel.get_transcript(), reconciliation.stats)
+
+def check_case(engines, algorithm, key_size, error_rate, seed, shuffle_algorithm):
+    results = [run_engine(engine, algorithm, key_size, error_rate, seed, shuffle_algorithm)
+               for engine in engines]
+    (reference_key, reference_transcript, _reference_stats) = results[0]
+    mismatches = []
+    for (engine, (key, transcript, _stats)) in zip(engines[1:], results[1:]):
+        if key != reference_key:
+            mismatches.append(f"{engine}: reconciled key differs")
+        if transcript != reference_transcript:
+            mismatches.append(f"{engine}: ask parity transcript differs")
+    times = [stats.elapsed_real_time for (_key, _transcript, stats) in results]
+    return (mismatches, len(reference_transcript), times)
+
+def main():
+    args = parse_command_line_arguments()
+    engines = args.engine
+    print(f"{'algorithm':<10} {'key_size':>8} {'error_rate':>10} {'seed':>4} {'messages':>8} " +
+          " ".join(f"{engine + '_ms':>14}" for engine in engines) + "  result")
+    failures = 0
+    for algorithm in args.algorithm:
+        for key_size in args.key_size:
+            for error_rate in args.error_rate:
+                for seed in range(1, args.seeds + 1):
+                    (mismatches, messages, times) = check_case(engines, algorithm, key_size,
+                                                               error_rate, seed,
+                                                               args.shuffle_algorithm)
+                    result = "; ".join(mismatches) if mismatches else "identical"
+                    failures += len(mismatches) > 0
+                    print(f"{algorithm:<10} {key_size:>8} {error_rate:>10} {seed:>4} "
+                          f"{messages:>8} " +
+                          " ".join(f"{time * 1000.0:>14.1f}" for time in times) +
+                          f"  {result}")
+    if failures:
+        print(f"{failures} case(s) with differences")
+        sys.exit(1)
+    print("All engines are equivalent")
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,14 @@ class DataPoint:
         self.reconciliation_bits_per_key_bit = AggregateStats()
         self.efficiency = AggregateStats()
         self.infer_parity_blocks = AggregateStats()
+        self.ask_parity_cache_hits = AggregateStats()
+        self.biconf_derived_complement_parities = AggregateStats()
+        self.prefetch_saved_messages = AggregateStats()
+        self.speculative_ask_parity_blocks = AggregateStats()
+        self.avoided_parity_scans = AggregateStats()
+        self.parity_inference_equations = AggregateStats()
+        self.parity_inference_steps = AggregateStats()
+        self.peak_live_blocks = AggregateStats()
         self.remaining_bit_errors = AggregateStats()
         self.remaining_bit_error_rate = AggregateStats()
         self.remaining_frame_error_rate = AggregateStats()
@@ -41,3 +49,12 @@ class DataPoint:
         self.reconciliation_bits_per_key_bit.record_value(stats.reconciliation_bits_per_key_bit)
         self.efficiency.record_value(stats.efficiency)
         self.infer_parity_blocks.record_value(stats.infer_parity_blocks)
+        self.ask_parity_cache_hits.record_value(stats.ask_parity_cache_hits)
+        self.biconf_derived_complement_parities.record_value(
+            stats.biconf_derived_complement_parities)
+        self.prefetch_saved_messages.record_value(stats.prefetch_saved_messages)
+        self.speculative_ask_parity_blocks.record_value(stats.speculative_ask_parity_blocks)
+        self.avoided_parity_scans.record_value(stats.avoided_parity_scans)
+        self.parity_inference_equations.record_value(stats.parity_inference_equations)
+        self.parity_inference_steps.record_value(stats.parity_inference_steps)
+        self.peak_live_blocks.record_value(stats.peak_live_blocks)
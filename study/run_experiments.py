@@ -9,6 +9,7 @@ from cascade.algorithm import ALGORITHMS
 from cascade.key import Key
 from cascade.mock_classical_channel import MockClassicalChannel
 from cascade.reconciliation import Reconciliation
+from cascade.shuffle import Shuffle
 
 from study.data_point import DataPoint
 
@@ -159,12 +160,19 @@ def report_data_point_done(data_point):
 
 def produce_data_point(reconciliation_params):
     (algorithm, key_size, error_rate, runs) = reconciliation_params
+    # Experiments are not seeded, so there is no need to reproduce the original per-bit random
+    # sequences; use the much faster bulk key and noise generation.
+    Key.set_random_method(Key.RANDOM_METHOD_BULK)
     data_point = DataPoint(algorithm, key_size, error_rate, get_code_version())
+    # Reuse the same reconciliation object for all runs.
+    reconciliation = None
     for _ in range(runs):
-        run_reconciliation(data_point, algorithm, key_size, 'exact', error_rate)
+        reconciliation = run_reconciliation(data_point, algorithm, key_size, 'exact', error_rate,
+                                            reconciliation)
     return data_point
 
-def run_reconciliation(data_point, algorithm, key_size, error_method, error_rate):
+def run_reconciliation(data_point, algorithm, key_size, error_method, error_rate,
+                       reconciliation=None):
     # Key.set_random_seed(seed)
     # Shuffle.set_random_seed(seed+1)
     correct_key = Key.create_random_key(key_size)
@@ -174,7 +182,13 @@ def run_reconciliation(data_point, algorithm, key_size, error_method, error_rate
     actual_bit_error_rate = actual_bit_errors / key_size
     data_point.actual_bit_error_rate.record_value(actual_bit_error_rate)
     mock_classical_channel = MockClassicalChannel(correct_key)
-    reconciliation = Reconciliation(algorithm, mock_classical_channel, noisy_key, error_rate)
+    if reconciliation is None:
+        # The noisy key is not needed after the reconciliation, so reconcile it in place.
+        reconciliation = Reconciliation(algorithm, mock_classical_channel, noisy_key, error_rate,
+                                        shuffle_algorithm=Shuffle.SHUFFLE_RANDOM_FAST,
+                                        noisy_key_mode=Reconciliation.NOISY_KEY_IN_PLACE)
+    else:
+        reconciliation.reset(noisy_key, error_rate, mock_classical_channel)
     reconciliated_key = reconciliation.reconcile()
     data_point.record_reconciliation_stats(reconciliation.stats)
     remaining_bit_errors = correct_key.difference(reconciliated_key)
@@ -185,6 +199,7 @@ def run_reconciliation(data_point, algorithm, key_size, error_method, error_rate
         data_point.remaining_frame_error_rate.record_value(1.0)
     else:
         data_point.remaining_frame_error_rate.record_value(0.0)
+    return reconciliation
 
 def get_code_version():
     try:
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+
+from cascade.key_store import KeyStore
+from cascade.parity_server import ParityServer
+
+def parse_command_line_arguments():
+    parser = argparse.ArgumentParser(
+        description="Run Alice's parity server for the keys in a key store")
+    parser.add_argument('key_store', type=str, help="path of the key store file")
+    parser.add_argument('--host', type=str, default="127.0.0.1", help="TCP host to listen on")
+    parser.add_argument('--port', type=int, default=8123, help="TCP port to listen on")
+    parser.add_argument('--unix-socket', type=str, default=None,
+                        help="path of a Unix domain socket to listen on instead of TCP")
+    args = parser.parse_args()
+    return args
+
+async def serve(key_store_path, address, ready=None):
+    key_store = KeyStore(key_store_path)
+    server = ParityServer(key_store)
+    address = await server.start(address)
+    if ready is None:
+        print(f"Serving {key_store.get_key_count()} keys on {address}", flush=True)
+    else:
+        ready.send(address)
+    try:
+        await server.serve_forever()
+    finally:
+        key_store.close()
+
+def main():
+    args = parse_command_line_arguments()
+    address = args.unix_socket if args.unix_socket is not None else (args.host, args.port)
+    try:
+        asyncio.run(serve(args.key_store, address))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()